@@ -3,44 +3,15 @@
 
 import os
 import time
-import pandas as pd
 import streamlit as st
-import base64
 
-# --- FUNÇÃO DE BACKGROUND ---
-    
-def set_background_image_with_blur(image_file):
-    with open(image_file, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode()
-    st.markdown(
-        f"""
-        <style>
-        [data-testid="stAppViewContainer"] {{
-            position: relative;
-            z-index: 0;
-        }}
-        [data-testid="stAppViewContainer"]::before {{
-            content: "";
-            background-image: url("data:image/png;base64,{encoded}");
-            background-size: cover;
-            background-repeat: no-repeat;
-            background-attachment: fixed;
-            background-position: center;
-            filter: blur(8px) brightness(0.5);
-            position: absolute;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            z-index: -1;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
-    
-    
-set_background_image_with_blur("BackGround/Dasa.png")
+from estoque import graficos
+from estoque.assets import imagem
+from estoque.bootstrap import finalizar_pagina, iniciar_pagina
+from estoque.cenarios import INCERTEZA, cenarios
+from estoque.eventos import ACOES, CATALOGO, Evento, ingestor_padrao, ler_qr
+from estoque.perf import etapa
+from estoque.saldos import saldos_padrao
 
 # ======= (Opcional) Lottie para dar vida =======
 try:
@@ -50,7 +21,7 @@ except Exception:
     _HAS_LOTTIE = False
 
 # ----------------- Config -----------------
-st.set_page_config(
+iniciar_pagina(
     page_title="Introdução | Estoque Inteligente (QR → ML)",
     page_icon="📦",
     layout="wide",
@@ -74,7 +45,7 @@ candidate_paths = [
 pipeline_img = next((p for p in candidate_paths if os.path.exists(p)), None)
 
 IMG_WIDTH = st.slider("Largura da imagem (px)", 380, 900, 700 , 10)
-st.image(pipeline_img, width=IMG_WIDTH)
+st.image(imagem(pipeline_img, IMG_WIDTH), width=IMG_WIDTH)  # variante WebP mais próxima da largura
 
 
 with st.expander("O que este pipeline entrega na prática?"):
@@ -145,23 +116,43 @@ with col3:
 with col4:
     adocao_ml = st.slider("Adoção ML (fase 2)", 0, 100, 0, 5, format="%d%%")
 
-# Cálculo simples
-erros_atuais = int(eventos_mes * erro_manual)
-redu_qr = int(erros_atuais * (adocao_qr/100) * 0.75)   # suposição: QR reduz 75% dos erros nas áreas cobertas
-redu_ml = int(erros_atuais * (adocao_ml/100) * 0.90)   # suposição: ML reduz 90% dos erros nas áreas cobertas
-erros_proj = max(erros_atuais - redu_qr - redu_ml, 0)
+with st.expander("Premissas da simulação"):
+    p1, p2, p3 = st.columns(3)
+    eficacia_qr = p1.slider("Eficácia do QR nas áreas cobertas", 0, 100, 75, 5, format="%d%%")
+    eficacia_ml = p2.slider("Eficácia do ML nas áreas cobertas", 0, 100, 90, 5, format="%d%%")
+    incerteza = p3.select_slider("Incerteza das premissas", list(INCERTEZA), value="média")
+
+# Monte Carlo: cada premissa vira uma distribuição em torno do valor escolhido (memorizado por combinação)
+with etapa("Cenários Monte Carlo", cache="hit"):
+    r = cenarios(int(eventos_mes), erro_manual, adocao_qr / 100, adocao_ml / 100,
+                 eficacia_qr / 100, eficacia_ml / 100, incerteza)
+bandas = r["bandas"]
+
 
+def _n(v) -> str:
+    return f"{round(v):,}".replace(",", ".")
+
+
+def _faixa(cenario: str) -> str:
+    b = bandas.loc[cenario]
+    return f"90% das simulações entre {_n(b['p5'])} e {_n(b['p95'])} erros/mês (média {_n(b['média'])})."
+
+
+erros_atuais, erros_proj = bandas.loc["Hoje (manual)", "p50"], bandas.loc["Com QR + ML", "p50"]
 m1, m2, m3 = st.columns(3)
-m1.metric("Erros/mês (estimado - hoje)", f"{erros_atuais:,}".replace(",", "."))
-m2.metric("Erros/mês (projeção com QR→ML)", f"{erros_proj:,}".replace(",", "."), delta=f"-{(erros_atuais-erros_proj):,}".replace(",", "."))
+m1.metric("Erros/mês (estimado - hoje)", _n(erros_atuais), help=_faixa("Hoje (manual)"))
+m2.metric("Erros/mês (projeção com QR→ML)", _n(erros_proj), delta=f"-{_n(erros_atuais - erros_proj)}",
+          help=_faixa("Com QR + ML"))
 m3.metric("Automação prevista", f"{adocao_qr + adocao_ml}%")
 
-# Gráfico
-df_plot = pd.DataFrame({
-    "Cenário": ["Hoje (manual)", "Com QR", "Com QR + ML"],
-    "Erros": [erros_atuais, max(erros_atuais - redu_qr, 0), erros_proj],
-})
-st.bar_chart(df_plot, x="Cenário", y="Erros", use_container_width=True)
+# Gráficos: faixas por cenário e o que mais pesa no resultado
+g1, g2 = st.columns([0.55, 0.45])
+with g1:
+    graficos.mostrar(graficos.cenarios(bandas))
+with g2:
+    graficos.mostrar(graficos.sensibilidade(r["sensibilidade"]))
+st.caption(f"Medianas de {_n(r['n'])} simulações (semente fixa), calculadas em {r['ms']:.0f} ms; "
+           "combinações já vistas voltam do cache.")
 
 # ----------------- Mini “replay” do pipeline -----------------
 st.divider()
@@ -170,27 +161,36 @@ st.subheader("🧪 Mini replay do pipeline (QR → ML)")
 colL, colR = st.columns([0.55, 0.45])
 with colL:
     modo = st.radio("Selecione o modo para visualizar o fluxo:", ["QR/Barcode", "Machine Learning"], horizontal=True)
+    r1, r2 = st.columns([0.6, 0.4])
+    sku = r1.selectbox("Insumo diante da câmera", list(CATALOGO), index=1,
+                       format_func=lambda s: f"{s} ({CATALOGO[s]})")
+    acao = r2.radio("Movimento", ACOES, horizontal=True)
     if st.button("▶️ Executar replay"):
-        with st.spinner("Iniciando captura de câmera..."):
-            time.sleep(0.6)
-        st.toast("🎥 Câmera conectada", icon="✅")
-        time.sleep(0.4)
+        # Leitura de verdade: o evento passa pelo log local e é gravado no banco de eventos
+        camera = "CAM-QR-01" if modo == "QR/Barcode" else "CAM-ML-01"
+        st.toast(f"🎥 {camera} conectada", icon="✅")
         if modo == "QR/Barcode":
-            st.info("🔍 Lendo código QR/Barcode...", icon="🔎")
-            time.sleep(0.8)
-            st.success("✅ Código identificado: INS-002 (Swab estéril)")
-            time.sleep(0.6)
-            st.info("📦 Ação: **BAIXA** no estoque (1 unidade)")
-            time.sleep(0.5)
-            st.success("💾 Evento registrado (timestamp, SKU, ação)")
+            etiqueta = f"SKU={sku};CAM={camera}"
+            st.info(f"🔍 Etiqueta lida: `{etiqueta}`", icon="🔎")
+            sku = ler_qr(etiqueta)
+            st.success(f"✅ Código identificado: {sku} ({CATALOGO[sku]})")
+        else:
+            st.success(f"✅ Classe detectada: **{CATALOGO[sku]}** → {sku}")
+            st.info(f"↔️ Tracking + linha virtual: direção → **{'SAÍDA' if acao == 'BAIXA' else 'ENTRADA'}**")
+        st.info(f"📦 Ação: **{acao}** no estoque (1 unidade)")
+
+        ing, saldos = ingestor_padrao(), saldos_padrao()
+        ev = Evento(sku, acao, camera)
+        with st.spinner("Gravando evento…"):
+            gravado = ing.aguardar(ing.registrar(ev))
+        if gravado:
+            st.success(f"💾 Evento `{ev.id[:8]}` gravado em {ing.destino.descricao} "
+                       f"{(time.time() - ev.ts) * 1000:.0f} ms após a leitura.")
+            st.caption(f"Saldo de {sku} em {ev.local}: {saldos.saldo(sku, ev.local)} "
+                       f"(todos os locais: {saldos.saldo(sku)}).")
         else:
-            st.info("🧠 Rodando modelo de classificação/detecção...", icon="🧠")
-            time.sleep(0.8)
-            st.success("✅ Classe detectada: **Seringa 5ml** (conf. 0.94)")
-            time.sleep(0.6)
-            st.info("↔️ Tracking + linha virtual: direção detectada → **SAÍDA**")
-            time.sleep(0.6)
-            st.success("💾 Evento registrado (timestamp, classe, confiança, ação)")
+            st.warning(f"💾 Evento guardado no log local; o banco ainda não confirmou ({ing.metricas()['erro']}). "
+                       "Ele será reenviado automaticamente.")
 
 with colR:
     st.markdown("**Fluxo esperado:**")
@@ -207,3 +207,4 @@ with colR:
 # ----------------- Navegação -----------------
 st.info("Esta página apresenta a **introdução**. As próximas páginas aprofundam solução, protótipos e métricas.")
 
+finalizar_pagina()
@@ -0,0 +1,3 @@
+# estoque/__init__.py
+# -*- coding: utf-8 -*-
+"""Módulos compartilhados pelas páginas do dashboard (fora de `pages/` para não virarem páginas)."""
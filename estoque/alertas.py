@@ -0,0 +1,249 @@
+# estoque/alertas.py
+# -*- coding: utf-8 -*-
+"""Alertas de estoque mínimo e de validade (FEFO), reavaliados evento a evento.
+
+`Alertas` assina os `Saldos` (`estoque.saldos`): a cada evento aplicado só o SKU e
+os lotes tocados por ele são reavaliados, nunca o catálogo inteiro.
+
+- Mínimo: `minimos[sku]` é o limite e `_abaixo` é o índice dos SKUs que cruzaram
+  para baixo dele. Cada evento compara o saldo novo do SKU com o limite (O(1)) e
+  registra quando o alerta dispara ou normaliza.
+- Validade: um heap de (validade, sku, lote) com uma entrada por lote que já teve
+  saldo. O lote que ganha saldo entra no heap (O(log n)); o que zera fica como
+  entrada obsoleta e sai quando chega ao topo. Os próximos k vencimentos saem
+  percorrendo o heap em ordem sem esvaziá-lo (O(k log k)).
+
+    python -m estoque.alertas --lotes 200000 --eventos 100000   # custo por evento
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+from datetime import date, timedelta
+
+import streamlit as st
+
+from estoque.saldos import SEM_VALIDADE
+
+HISTORICO = 200   # disparos/normalizações guardados
+
+# Padrões (sobrescritos pela seção [alertas] do secrets.toml; mínimos em [alertas.minimos])
+ALERTAS_DEFAULTS = {
+    "antecedencia_dias": 30,   # lote que vence dentro disso já alerta
+}
+
+# Mínimo operacional dos insumos com etiqueta QR (`estoque.eventos.CATALOGO`)
+MINIMOS_PADRAO = {
+    "INS-001": 80, "INS-002": 50, "INS-003": 150, "INS-004": 100,
+    "INS-005": 120, "INS-006": 60, "INS-007": 20, "INS-008": 150,
+}
+
+
+def alertas_config(sec) -> dict:
+    """Extrai a configuração dos alertas de um dict de secrets, com fallback nos padrões."""
+    sec = sec or {}
+    cfg = {k: type(v)(sec.get(k, v)) for k, v in ALERTAS_DEFAULTS.items()}
+    cfg["minimos"] = {**MINIMOS_PADRAO, **{str(k).upper(): int(v) for k, v in (sec.get("minimos") or {}).items()}}
+    return cfg
+
+
+class Alertas:
+    """Índice de SKUs abaixo do mínimo + heap de vencimentos, sobre um `Saldos`."""
+
+    def __init__(self, saldos, minimos: dict = None, antecedencia_dias: int = ALERTAS_DEFAULTS["antecedencia_dias"]):
+        self.saldos = saldos
+        self.minimos = dict(minimos or {})
+        self.antecedencia = antecedencia_dias
+        self._lock = threading.RLock()
+        self._abaixo = {}           # sku -> instante em que cruzou o mínimo
+        self._heap = []             # (validade, sku, lote)
+        self._no_heap = set()       # (sku, lote) com entrada no heap
+        self.historico = deque(maxlen=HISTORICO)   # (instante, "disparou"/"normalizou", sku, saldo, mínimo)
+        self.avaliacoes = 0
+        saldos.assinar(self.avaliar, self._reconstruir)
+
+    def _reconstruir(self) -> None:
+        """Estado inicial a partir dos saldos atuais: O(n) (heapify), uma vez."""
+        with self._lock:
+            agora = time.time()
+            self._abaixo = {sku: agora for sku, m in self.minimos.items() if self.saldos.saldo(sku) < m}
+            self._heap = [(val or SEM_VALIDADE, s, l) for s, l, _, val in self.saldos.lotes()]
+            heapq.heapify(self._heap)
+            self._no_heap = {(s, l) for _, s, l in self._heap}
+
+    # ---- atualização (a cada evento) ----
+    def avaliar(self, sku: str, lotes=()) -> None:
+        """Para `Saldos.assinar`: reavalia só o SKU e os lotes do evento."""
+        with self._lock:
+            self.avaliacoes += 1
+            self._checar_minimo(sku)
+            for lote in lotes:
+                if (sku, lote) not in self._no_heap and self.saldos.saldo_lote(sku, lote) > 0:
+                    heapq.heappush(self._heap, (self.saldos.validade(sku, lote) or SEM_VALIDADE, sku, lote))
+                    self._no_heap.add((sku, lote))
+            # Obsoletas no topo saem já (amortizado: cada entrada sai uma vez)
+            while self._heap and not self._valido(self._heap[0]):
+                _, s, l = heapq.heappop(self._heap)
+                self._no_heap.discard((s, l))
+
+    def _checar_minimo(self, sku: str) -> None:
+        m = self.minimos.get(sku)
+        if m is None:
+            return
+        saldo = self.saldos.saldo(sku)
+        if saldo < m:
+            if sku not in self._abaixo:
+                self._abaixo[sku] = time.time()
+                self.historico.append((time.time(), "disparou", sku, saldo, m))
+        elif self._abaixo.pop(sku, None) is not None:
+            self.historico.append((time.time(), "normalizou", sku, saldo, m))
+
+    def definir_minimo(self, sku: str, minimo: int = None) -> None:
+        """Muda (ou remove, com None) o mínimo de um SKU e reavalia só ele."""
+        with self._lock:
+            if minimo is None:
+                self.minimos.pop(sku, None)
+                self._abaixo.pop(sku, None)
+            else:
+                self.minimos[sku] = minimo
+                self._checar_minimo(sku)
+
+    # ---- consulta ----
+    def abaixo(self, sku: str) -> bool:
+        """O SKU está com o alerta de mínimo disparado: O(1)."""
+        return sku in self._abaixo
+
+    def _valido(self, item) -> bool:
+        return self.saldos.saldo_lote(item[1], item[2]) > 0
+
+    def _em_ordem(self):
+        """Entradas válidas do heap por validade, sem alterá-lo: um heap auxiliar com a
+        fronteira (filhos 2i+1 e 2i+2 de cada posição já visitada)."""
+        h = self._heap
+        fronteira = [(h[0], 0)] if h else []
+        while fronteira:
+            item, i = heapq.heappop(fronteira)
+            if self._valido(item):
+                yield item
+            for j in (2 * i + 1, 2 * i + 2):
+                if j < len(h):
+                    heapq.heappush(fronteira, (h[j], j))
+
+    def proximos(self, n: int = 10) -> list:
+        """Os `n` lotes com saldo que vencem primeiro: [(validade, sku, lote, saldo)]."""
+        out = []
+        with self._lock:
+            for val, sku, lote in self._em_ordem():
+                if len(out) >= n:
+                    break
+                out.append((None if val == SEM_VALIDADE else val, sku, lote, self.saldos.saldo_lote(sku, lote)))
+        return out
+
+    def ativos(self, hoje: date = None) -> list:
+        """Alertas disparados agora: SKUs abaixo do mínimo e lotes vencidos ou vencendo
+        dentro da antecedência. Custo proporcional ao número de alertas, não ao catálogo."""
+        hoje = hoje or date.today()
+        limite = (hoje + timedelta(days=self.antecedencia)).isoformat()
+        out = []
+        with self._lock:
+            for sku, desde in sorted(self._abaixo.items(), key=lambda kv: self.saldos.saldo(kv[0]) - self.minimos[kv[0]]):
+                saldo, m = self.saldos.saldo(sku), self.minimos[sku]
+                out.append({"tipo": "mínimo", "sku": sku, "lote": None, "saldo": saldo,
+                            "detalhe": f"saldo {saldo} < mínimo {m}", "desde": desde})
+            for val, sku, lote in self._em_ordem():
+                if val > limite:
+                    break
+                dias = (date.fromisoformat(val) - hoje).days
+                out.append({"tipo": "vencido" if dias < 0 else "validade", "sku": sku, "lote": lote,
+                            "saldo": self.saldos.saldo_lote(sku, lote),
+                            "detalhe": f"venceu há {-dias} dia(s)" if dias < 0 else f"vence em {dias} dia(s) ({val})",
+                            "desde": None})
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"avaliacoes": self.avaliacoes, "abaixo_minimo": len(self._abaixo),
+                    "heap": len(self._heap), "skus_com_minimo": len(self.minimos)}
+
+
+@st.cache_resource(show_spinner=False)
+def alertas_padrao() -> Alertas:
+    """Alertas sobre os saldos do processo, com mínimos/antecedência da seção [alertas]."""
+    from estoque.saldos import saldos_padrao
+
+    try:
+        cfg = alertas_config(st.secrets.get("alertas"))
+    except Exception:   # sem secrets.toml
+        cfg = alertas_config(None)
+    return Alertas(saldos_padrao(), cfg["minimos"], cfg["antecedencia_dias"])
+
+
+class _RazaoMemoria:
+    """Razão em lista (posição = índice + 1), para medir sem banco."""
+    descricao = "memória"
+
+    def __init__(self):
+        self.linhas = []
+
+    def ler_desde(self, posicao: int, limite: int) -> list:
+        return self.linhas[posicao:posicao + limite]
+
+
+def main(argv=None):
+    import argparse
+    import random
+    import tempfile
+
+    from estoque.saldos import Saldos
+
+    ap = argparse.ArgumentParser(description="Custo por evento dos alertas incrementais (razão em memória).")
+    ap.add_argument("--skus", type=int, default=50_000)
+    ap.add_argument("--lotes", type=int, default=200_000, help="lotes recebidos antes da medição")
+    ap.add_argument("--eventos", type=int, default=100_000, help="eventos medidos")
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(42)
+    hoje = date.today()
+    razao = _RazaoMemoria()
+
+    def entrada(i):
+        sku = f"SKU-{rnd.randrange(args.skus):06d}"
+        val = (hoje + timedelta(days=rnd.randrange(-30, 720))).isoformat()
+        return (i, sku, "ALMOXARIFADO", "ENTRADA", rnd.randint(5, 50), f"L{i:07d}", val)
+
+    razao.linhas = [entrada(i + 1) for i in range(args.lotes)]
+    with tempfile.TemporaryDirectory() as pasta:
+        saldos = Saldos(razao, pasta, snapshot_cada=10**12)
+        t0 = time.perf_counter()
+        alertas = Alertas(saldos, {f"SKU-{i:06d}": 20 for i in range(args.skus)})
+        print(f"partida: {args.lotes} lotes indexados em {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        n0 = len(razao.linhas)
+        for i in range(n0 + 1, n0 + args.eventos + 1):
+            if rnd.random() < 0.2:
+                razao.linhas.append(entrada(i))
+            else:
+                razao.linhas.append((i, f"SKU-{rnd.randrange(args.skus):06d}", "ALMOXARIFADO", "BAIXA",
+                                     rnd.randint(1, 10), "", None))
+        t0 = time.perf_counter()
+        saldos.atualizar()
+        us = (time.perf_counter() - t0) / args.eventos * 1e6
+        print(f"{args.eventos} eventos: {us:.1f} µs/evento (saldos + FEFO + alertas)")
+
+        t0 = time.perf_counter()
+        prox = alertas.proximos(10)
+        ms_prox = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        ativos = alertas.ativos()
+        ms_ativos = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        varredura = sorted((val, s, l) for s, l, _, val in saldos.lotes())[:10]
+        ms_varredura = (time.perf_counter() - t0) * 1000
+        assert [(v, s, l) for v, s, l, _ in prox] == varredura
+        print(f"próximos 10 vencimentos: {ms_prox:.2f} ms (varrendo todos os lotes: {ms_varredura:.0f} ms)")
+        print(f"{len(ativos)} alertas ativos em {ms_ativos:.0f} ms; {alertas.stats()}")
+
+
+if __name__ == "__main__":
+    main()
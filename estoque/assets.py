@@ -0,0 +1,93 @@
+# estoque/assets.py
+# -*- coding: utf-8 -*-
+"""Imagens das páginas em faixas de largura (WebP, cache em disco) e ícones locais."""
+
+import base64
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+CACHE = RAIZ / ".cache" / "imagens"
+ICONES = RAIZ / "images" / "icons"
+LARGURAS = (320, 480, 640, 800, 960, 1280, 1600)   # faixas pré-renderizadas
+QUALIDADE = 80
+
+_MIME = {".svg": "image/svg+xml", ".png": "image/png", ".webp": "image/webp", ".jpg": "image/jpeg"}
+_travas = {}
+_travas_lock = threading.Lock()
+
+
+def _trava(chave) -> threading.Lock:
+    with _travas_lock:
+        return _travas.setdefault(chave, threading.Lock())
+
+
+def _assinatura(origem: Path) -> str:
+    # tamanho + mtime bastam para invalidar variantes antigas sem ler a imagem inteira
+    info = origem.stat()
+    return f"{info.st_size:x}{int(info.st_mtime):x}"
+
+
+def _renderizar(origem: Path, pasta: Path) -> dict:
+    """Decodifica a original uma vez e grava todas as faixas menores que ela."""
+    from PIL import Image
+
+    pasta.mkdir(parents=True, exist_ok=True)
+    with Image.open(origem) as img:
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        out = {}
+        for w in LARGURAS:
+            if w >= img.width:
+                break
+            destino = pasta / f"{w}.webp"
+            tmp = destino.with_suffix(f".{os.getpid()}.tmp")
+            img.resize((w, round(img.height * w / img.width)), Image.LANCZOS).save(
+                tmp, "WEBP", quality=QUALIDADE, method=4)
+            os.replace(tmp, destino)   # leitores nunca veem um arquivo pela metade
+            out[w] = destino
+        # Largura cheia também em WebP (a PNG original costuma ser bem maior)
+        destino = pasta / f"{img.width}.webp"
+        tmp = destino.with_suffix(f".{os.getpid()}.tmp")
+        img.save(tmp, "WEBP", quality=QUALIDADE, method=4)
+        os.replace(tmp, destino)
+        out[img.width] = destino
+    (pasta / "pronto").touch()   # só uma renderização completa é reaproveitada
+    return out
+
+
+@lru_cache(maxsize=32)
+def variantes(origem: str, assinatura: str) -> dict:
+    """{largura: caminho} das variantes de `origem`; renderiza só se ainda não estão no disco."""
+    src = RAIZ / origem
+    pasta = CACHE / f"{src.stem}-{assinatura}"
+    with _trava(pasta):
+        if (pasta / "pronto").exists():
+            prontas = {int(p.stem): p for p in pasta.glob("*.webp")}
+        else:
+            prontas = _renderizar(src, pasta)
+    return dict(sorted(prontas.items()))
+
+
+def imagem(origem, largura: int, densidade: float = 1.0):
+    """Menor variante com pelo menos `largura * densidade` px (ou a maior que houver).
+
+    Sem Pillow, ou se a conversão falhar, devolve a própria `origem`.
+    """
+    if origem is None:
+        return None
+    try:
+        vs = variantes(str(origem), _assinatura(RAIZ / origem))
+    except Exception:
+        return origem
+    alvo = largura * densidade
+    return str(next((p for w, p in vs.items() if w >= alvo), vs[max(vs)]))
+
+
+@lru_cache(maxsize=None)
+def icone(nome: str) -> str:
+    """Ícone local de `images/icons/` como data URI (funciona dentro de iframes de componentes)."""
+    p = ICONES / nome
+    mime = _MIME.get(p.suffix.lower(), "application/octet-stream")
+    return f"data:{mime};base64,{base64.b64encode(p.read_bytes()).decode()}"
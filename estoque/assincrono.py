@@ -0,0 +1,129 @@
+# estoque/assincrono.py
+# -*- coding: utf-8 -*-
+"""Consultas do modo "no banco" em paralelo, num event loop asyncio do processo.
+
+Com filtros e agregações no banco, KPIs, preview, Top-N, agregação e comparação são
+consultas independentes; uma depois da outra, as latências somam. Aqui a página
+dispara todas juntas (`planejar`) e cada seção só espera a sua (`obter`), então o
+tempo fica limitado pela consulta mais lenta. No Oracle a execução usa a API asyncio
+do `oracledb` (pool assíncrono, modo thin); nos bancos locais, `asyncio.to_thread`.
+
+- Concorrência limitada por um semáforo (no máximo o tamanho do pool).
+- Consultas idênticas em voo (mesmo banco, SQL e binds) rodam uma vez só, mesmo
+  vindas de sessões diferentes.
+- Cada sessão é um *grupo*: quando os filtros mudam, o que o grupo pediu e ninguém
+  mais espera é cancelado (ainda na fila do semáforo, nem chega ao banco).
+- Resultados prontos ficam num LRU do processo.
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError
+
+from estoque.perf import anotar
+
+MAX_RESULTADOS = 256   # resultados guardados no LRU (todas as sessões)
+
+
+def _chave(backend, sql: str, binds) -> tuple:
+    return (backend.chave, sql, tuple(sorted((binds or {}).items())))
+
+
+class Executor:
+    """Event loop numa thread própria + consultas em voo + LRU de resultados."""
+
+    def __init__(self, max_concorrentes: int = 4, max_resultados: int = MAX_RESULTADOS):
+        self.max_concorrentes = max(1, int(max_concorrentes))
+        self.max_resultados = max_resultados
+        self._lock = threading.RLock()   # o callback de término pode rodar dentro de `cancel()`
+        self._loop = None
+        self._sem = None
+        self._resultados = OrderedDict()
+        self._em_voo = {}    # chave -> [Future, grupos que ainda esperam]
+        self._geracao = 0    # `limpar` descarta o que estava em voo
+        self.contadores = {"hit": 0, "miss": 0, "em voo": 0, "canceladas": 0}
+
+    def _iniciar(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="estoque-consultas", daemon=True).start()
+            self._sem = asyncio.Semaphore(self.max_concorrentes)   # liga-se ao loop no primeiro uso
+            self._loop = loop
+        return self._loop
+
+    async def _executar(self, backend, sql: str, binds):
+        async with self._sem:
+            return await backend.consultar_async(sql, binds)
+
+    def _submeter(self, chave, backend, sql: str, binds, grupo) -> tuple:
+        """(future, nova?) da consulta; se já está em voo, o grupo passa a esperar a mesma."""
+        voo = self._em_voo.get(chave)
+        if voo is not None:
+            voo[1].add(grupo)
+            return voo[0], False
+        fut = asyncio.run_coroutine_threadsafe(self._executar(backend, sql, binds), self._iniciar())
+        self._em_voo[chave] = [fut, {grupo}]
+        geracao = self._geracao
+        fut.add_done_callback(lambda f: self._terminar(chave, f, geracao))
+        return fut, True
+
+    def _terminar(self, chave, fut, geracao: int) -> None:
+        with self._lock:
+            if self._em_voo.get(chave, (None,))[0] is fut:
+                del self._em_voo[chave]
+            if fut.cancelled() or fut.exception() is not None or geracao != self._geracao:
+                return   # erro não fica no cache: a próxima chamada tenta de novo
+            self._resultados[chave] = fut.result()
+            self._resultados.move_to_end(chave)
+            while len(self._resultados) > self.max_resultados:
+                self._resultados.popitem(last=False)
+
+    def planejar(self, backend, consultas, grupo) -> dict:
+        """Dispara as consultas `(sql, binds)` que ainda não têm resultado e cancela as
+        que o grupo tinha pedido antes, não estão no plano novo e ninguém mais espera."""
+        chaves = {_chave(backend, sql, binds): (sql, binds) for sql, binds in consultas}
+        disparadas = canceladas = 0
+        with self._lock:
+            for chave, (fut, grupos) in list(self._em_voo.items()):
+                if grupo in grupos and chave not in chaves:
+                    grupos.discard(grupo)
+                    if not grupos and fut.cancel():
+                        canceladas += 1
+            for chave, (sql, binds) in chaves.items():
+                if chave not in self._resultados:
+                    disparadas += self._submeter(chave, backend, sql, binds, grupo)[1]
+            self.contadores["canceladas"] += canceladas
+        return {"disparadas": disparadas, "canceladas": canceladas}
+
+    def obter(self, backend, sql: str, binds=None, grupo=None):
+        """Resultado da consulta: do LRU, da execução já em voo ou de uma nova (bloqueia)."""
+        chave = _chave(backend, sql, binds)
+        while True:
+            with self._lock:
+                if chave in self._resultados:
+                    self._resultados.move_to_end(chave)
+                    self.contadores["hit"] += 1
+                    anotar(cache="hit")
+                    return self._resultados[chave]
+                fut, nova = self._submeter(chave, backend, sql, binds, grupo)
+                origem = "miss" if nova else "em voo"
+                self.contadores[origem] += 1
+            anotar(cache=origem)
+            try:
+                return fut.result()
+            except CancelledError:
+                continue   # cancelada por `limpar` enquanto esperávamos: pede de novo
+
+    def limpar(self) -> None:
+        """Descarta os resultados e cancela o que está em voo (dados mudaram no banco)."""
+        with self._lock:
+            self._geracao += 1
+            self._resultados.clear()
+            for fut, _ in list(self._em_voo.values()):
+                fut.cancel()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.contadores, "rodando": len(self._em_voo), "resultados": len(self._resultados),
+                    "max_concorrentes": self.max_concorrentes}
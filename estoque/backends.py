@@ -0,0 +1,190 @@
+# estoque/backends.py
+# -*- coding: utf-8 -*-
+"""Bancos intercambiáveis para a página de análise: Oracle (pool), SQLite e DuckDB/Parquet locais."""
+
+import asyncio
+import os
+import sqlite3
+import statistics
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from estoque.dataset import InsumosDataset
+from estoque.dialect import DUCKDB, ORACLE, SQLITE
+from estoque.loader import FETCH_BATCH, arrow_to_pandas, iter_lotes, normalizar
+from estoque.perf import etapa
+from estoque.query import Filtros, SqlBuilder
+
+
+class Backend:
+    """Interface comum: `SqlSource` usa `consultar`/`lotes`; o modo em memória usa `carregar`.
+
+    `chave` identifica o banco nos caches da página (nunca inclui senha). Nos bancos
+    locais ela leva o mtime do arquivo: regerar os dados invalida os resultados antigos.
+    """
+    dialeto = ORACLE
+    schema = None
+
+    @property
+    def chave(self) -> tuple:
+        raise NotImplementedError
+
+    def consultar(self, sql: str, binds=None) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def lotes(self, sql: str, binds=None, batch: int = FETCH_BATCH):
+        raise NotImplementedError
+
+    async def consultar_async(self, sql: str, binds=None) -> pd.DataFrame:
+        """`consultar` sem bloquear o event loop (ver `estoque.assincrono`): numa thread."""
+        return await asyncio.to_thread(self.consultar, sql, binds)
+
+    def carregar(self) -> InsumosDataset:
+        """Tabela completa, já normalizada pelo SELECT, em formato compacto."""
+        sql, binds = SqlBuilder(self.schema, self.dialeto).linhas(Filtros())
+        partes = list(self.lotes(sql, binds))
+        if not partes:
+            partes = [normalizar(pd.DataFrame(columns=["INSUMO", "QUANTIDADE", "EXAME"]))]
+        return InsumosDataset.from_frame(pd.concat(partes, ignore_index=True))
+
+    def stats(self):
+        return None
+
+
+class OracleBackend(Backend):
+    """Pool `oracledb` compartilhado (ver `estoque.oracle.get_pool`)."""
+
+    def __init__(self, pool, schema: str):
+        self.pool = pool
+        self.schema = schema
+
+    @property
+    def chave(self) -> tuple:
+        return ("oracle", self.pool.dsn, self.pool.user, self.schema)
+
+    def consultar(self, sql: str, binds=None) -> pd.DataFrame:
+        return self.pool.query_df(sql, binds)
+
+    async def consultar_async(self, sql: str, binds=None) -> pd.DataFrame:
+        if self.pool.assincrono:
+            return await self.pool.query_df_async(sql, binds)
+        return await super().consultar_async(sql, binds)   # modo thick: sem API asyncio
+
+    def lotes(self, sql: str, binds=None, batch: int = FETCH_BATCH):
+        with self.pool.acquire() as conn:
+            yield from iter_lotes(conn, sql, binds, batch)
+
+    def stats(self):
+        return self.pool.stats()
+
+
+class _Mediana:
+    """Agregação MEDIAN para o SQLite (média dos dois centrais, como no Oracle)."""
+
+    def __init__(self):
+        self.valores = []
+
+    def step(self, v):
+        if v is not None:
+            self.valores.append(v)
+
+    def finalize(self):
+        return statistics.median(self.valores) if self.valores else None
+
+
+class _Local(Backend):
+    def __init__(self, caminho):
+        self.caminho = str(Path(caminho).resolve())
+
+    @property
+    def chave(self) -> tuple:
+        return (self.dialeto.nome, self.caminho, os.stat(self.caminho).st_mtime_ns)
+
+
+class SqliteBackend(_Local):
+    """Arquivo SQLite com a tabela INSUMOS (somente leitura; uma conexão por chamada)."""
+    dialeto = SQLITE
+
+    def _conectar(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"file:{self.caminho}?mode=ro", uri=True, check_same_thread=False)
+        conn.create_aggregate("MEDIAN", 1, _Mediana)
+        return conn
+
+    def consultar(self, sql: str, binds=None) -> pd.DataFrame:
+        conn = self._conectar()
+        try:
+            with etapa("execução + fetch") as e:
+                cur = conn.execute(sql, binds or {})
+                df = pd.DataFrame(cur.fetchall(), columns=[d[0] for d in cur.description])
+                e["linhas"] = len(df)
+            return df
+        finally:
+            conn.close()
+
+    def lotes(self, sql: str, binds=None, batch: int = FETCH_BATCH):
+        conn = self._conectar()
+        try:
+            cur = conn.execute(sql, binds or {})
+            cols = [d[0] for d in cur.description]
+            while rows := cur.fetchmany(batch):
+                yield normalizar(pd.DataFrame(rows, columns=cols))
+        finally:
+            conn.close()
+
+
+class DuckDbBackend(_Local):
+    """DuckDB sobre um arquivo Parquet (view INSUMOS) ou um banco `.duckdb` com a tabela."""
+    dialeto = DUCKDB
+
+    def __init__(self, caminho):
+        super().__init__(caminho)
+        import duckdb
+
+        if self.caminho.endswith(".parquet"):
+            self.con = duckdb.connect()
+            origem = self.caminho.replace("'", "''")
+            self.con.execute(f"CREATE VIEW INSUMOS AS SELECT * FROM read_parquet('{origem}')")
+        else:
+            self.con = duckdb.connect(self.caminho, read_only=True)
+        self._lock = threading.Lock()
+
+    def _cursor(self):
+        # Um cursor (conexão filha) por chamada: a conexão base não é usada entre threads
+        with self._lock:
+            return self.con.cursor()
+
+    def consultar(self, sql: str, binds=None) -> pd.DataFrame:
+        cur = self._cursor()
+        try:
+            with etapa("execução + fetch") as e:
+                df = cur.execute(sql, binds or {}).df()
+                e["linhas"] = len(df)
+            return df
+        finally:
+            cur.close()
+
+    def lotes(self, sql: str, binds=None, batch: int = FETCH_BATCH):
+        import pyarrow as pa
+
+        cur = self._cursor()
+        try:
+            res = cur.execute(sql, binds or {})
+            leitor = res.to_arrow_reader(batch) if hasattr(res, "to_arrow_reader") else res.fetch_record_batch(batch)
+            for lote in leitor:
+                yield arrow_to_pandas(pa.Table.from_batches([lote]))
+        finally:
+            cur.close()
+
+
+LOCAIS = {"sqlite": SqliteBackend, "duckdb": DuckDbBackend}
+
+
+def abrir_local(tipo: str, caminho) -> Backend:
+    """Backend local pelo nome do dialeto ("sqlite" ou "duckdb")."""
+    if tipo not in LOCAIS:
+        raise ValueError(f"Banco local desconhecido: {tipo!r}")
+    if not Path(caminho).exists():
+        raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+    return LOCAIS[tipo](caminho)
@@ -0,0 +1,269 @@
+# estoque/bench.py
+# -*- coding: utf-8 -*-
+"""Benchmark da análise de INSUMOS em escala (dados sintéticos com semente fixa).
+
+Uso: python -m estoque.bench --linhas 100000 1000000 [--fontes memoria duckdb sqlite]
+     [--baseline bench/baseline.json] [--salvar-baseline] [--tolerancia 0.25]
+
+Cada etapa (carga, normalização, KPIs, cada filtro, cada agregação, figuras Plotly e
+exportação CSV) é cronometrada em separado: mediana de `--repeticoes` execuções, mais
+uma execução sob `tracemalloc` para o pico de memória (alocações Python/NumPy; buffers
+Arrow não aparecem ali). Comparado com o baseline, o que ficar mais lento/maior que a
+tolerância é marcado como regressão e o processo sai com código 1. Os tempos do
+baseline só valem para a máquina em que foram gravados.
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+from estoque import graficos, synthetic
+from estoque.dataset import InsumosDataset
+from estoque.export import exportar
+from estoque.query import EIXOS, METRICAS_SQL, Filtros, FrameSource, SqlSource
+
+BASELINE = Path(__file__).resolve().parent.parent / "bench" / "baseline.json"
+FONTES = ("memoria", "duckdb", "sqlite")
+TOLERANCIA = 0.25   # +25% de tempo ou memória em relação ao baseline
+PISO_MS = 5.0       # diferenças menores que isso são ruído, nunca regressão
+PISO_MB = 1.0
+
+# Filtros típicos da página (termos existentes no vocabulário de `estoque.synthetic`)
+EXAME = synthetic.EXAMES[0]
+FILTROS = {
+    "contém 'tubo'": Filtros(termo="tubo"),
+    "prefixo 'ser'": Filtros(termo="ser", busca="prefixo"),
+    "aproximada 'serinja'": Filtros(termo="serinja", busca="aproximada"),
+    f"exame {EXAME}": Filtros(exame=EXAME),
+    "faixa 10–50": Filtros(faixa=(10, 50)),
+    "combinado": Filtros(termo="tubo", exame=EXAME, faixa=(5, 100)),
+}
+COMPARAR = tuple(synthetic.EXAMES[:3])
+
+
+@dataclass
+class Medida:
+    linhas: int
+    fonte: str
+    etapa: str
+    ms: float
+    pico_mb: float
+    proporcional: bool   # custo cresce com o nº de linhas: vale reportar linhas/s
+
+    @property
+    def chave(self) -> str:
+        return f"{self.linhas}|{self.fonte}|{self.etapa}"
+
+    @property
+    def linhas_s(self):
+        return self.linhas / (self.ms / 1000) if self.proporcional and self.ms > 0 else None
+
+
+class Rodada:
+    """Cronometra etapas de uma fonte; `preparar` desfaz caches entre repetições."""
+
+    def __init__(self, linhas: int, fonte: str, repeticoes: int, preparar=None):
+        self.linhas, self.fonte, self.repeticoes = linhas, fonte, repeticoes
+        self.preparar = preparar or (lambda: None)
+        self.medidas = []
+
+    def etapa(self, nome: str, fn, proporcional: bool = False):
+        tempos, r = [], None
+        for _ in range(self.repeticoes):
+            self.preparar()
+            t0 = time.perf_counter()
+            r = fn()
+            tempos.append((time.perf_counter() - t0) * 1000)
+        self.preparar()
+        tracemalloc.start()
+        try:
+            fn()
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        m = Medida(self.linhas, self.fonte, nome, round(statistics.median(tempos), 2),
+                   round(pico / 2**20, 2), proporcional)
+        self.medidas.append(m)
+        print(f"  {self.fonte:<8} {nome:<32} {m.ms:>10.1f} ms {m.pico_mb:>9.1f} MB", file=sys.stderr)
+        return r
+
+
+def _consultas(r: Rodada, src) -> None:
+    """Etapas comuns a todas as fontes: o que a página faz a cada interação."""
+    r.etapa("KPIs", src.kpis, proporcional=True)
+    for nome, f in FILTROS.items():
+        r.etapa(f"filtro: {nome}", lambda f=f: src.contar(f), proporcional=True)
+    top = r.etapa("top 10", lambda: src.top(Filtros(), 10))
+    aggs = {}
+    for eixo in EIXOS:
+        for metrica in METRICAS_SQL:
+            aggs[eixo, metrica] = r.etapa(f"agregação: {metrica} por {eixo}",
+                                          lambda e=eixo, m=metrica: src.agregacao(Filtros(), e, m))
+    comp = r.etapa("comparação de exames", lambda: src.comparacao(Filtros(), COMPARAR))
+    r.etapa("figura: top", lambda: graficos.top(top))
+    for tipo in graficos.TIPOS:
+        r.etapa(f"figura: {tipo} por EXAME",
+                lambda t=tipo: graficos.agregacao(aggs["EXAME", "Soma"], "EXAME", "Soma", t))
+    r.etapa("figura: Barra por INSUMO", lambda: graficos.agregacao(aggs["INSUMO", "Soma"], "INSUMO", "Soma"))
+    r.etapa("figura: comparação", lambda: graficos.comparacao(comp))
+    r.etapa("exportação CSV", lambda: exportar(src.lotes(Filtros()), "CSV"), proporcional=True)
+
+
+def _refazer(ds, chave, fn):
+    """Descarta a estrutura derivada do snapshot e a constrói de novo."""
+    ds.derivados().pop(chave, None)
+    return fn()
+
+
+def _memoria(n: int, parquet: Path, repeticoes: int) -> list:
+    import pyarrow.parquet as pq
+    from estoque.loader import arrow_to_pandas
+
+    r = Rodada(n, "memoria", repeticoes)
+    tbl = r.etapa("carga (Parquet -> Arrow)", lambda: pq.read_table(parquet), proporcional=True)
+    df = r.etapa("normalização (Arrow -> pandas)", lambda: arrow_to_pandas(tbl), proporcional=True)
+    ds = r.etapa("dataset compacto", lambda: InsumosDataset.from_frame(df), proporcional=True)
+    r.etapa("índice de busca", lambda: _refazer(ds, ("indice", "INSUMO"), ds.indice))
+    r.etapa("cubo INSUMO × EXAME", lambda: _refazer(ds, "cubo", ds.cubo), proporcional=True)
+
+    src = FrameSource(ds)
+
+    def preparar():
+        # Sem o último filtro memorizado nem os KPIs guardados no snapshot
+        src.__dict__.pop("_ultimo", None)
+        ds.derivados().pop("kpis", None)
+
+    r.preparar = preparar
+    _consultas(r, src)
+    return r.medidas
+
+
+def _banco(n: int, tipo: str, arquivo: Path, repeticoes: int) -> list:
+    from estoque.backends import abrir_local
+
+    b = abrir_local(tipo, arquivo)
+    r = Rodada(n, tipo, repeticoes)
+    r.etapa("carga completa (SELECT)", b.carregar, proporcional=True)
+    _consultas(r, SqlSource(b.consultar, b.schema, b.lotes, b.dialeto))
+    return r.medidas
+
+
+def executar(linhas, fontes=FONTES, repeticoes: int = 3, seed: int = 42, pasta=None) -> list:
+    # Carrega o Plotly antes das rodadas: o custo do import não cai na primeira figura cronometrada
+    importlib.import_module("plotly.express")
+
+    medidas = []
+    with tempfile.TemporaryDirectory(prefix="estoque-bench-") as tmp:
+        pasta = Path(pasta or tmp)
+        for n in linhas:
+            print(f"{n:,} linhas".replace(",", "."), file=sys.stderr)
+            r = Rodada(n, "dados", 1)
+            df = r.etapa("geração sintética", lambda: synthetic.gerar(n, seed=seed), proporcional=True)
+            medidas += r.medidas
+            parquet = synthetic.salvar_parquet(df, pasta / f"insumos_{n}.parquet")
+            for fonte in fontes:
+                if fonte == "memoria":
+                    medidas += _memoria(n, parquet, repeticoes)
+                elif fonte == "duckdb":
+                    medidas += _banco(n, "duckdb", parquet, repeticoes)
+                elif fonte == "sqlite":
+                    arquivo = synthetic.salvar_sqlite(df, pasta / f"insumos_{n}.db")
+                    medidas += _banco(n, "sqlite", arquivo, repeticoes)
+                else:
+                    raise ValueError(f"Fonte desconhecida: {fonte!r}")
+            del df
+    return medidas
+
+
+def comparar(medidas, base: dict, tolerancia: float = TOLERANCIA) -> list:
+    """Linhas do relatório com a variação contra o baseline e o motivo da regressão (se houver)."""
+    linhas = []
+    for m in medidas:
+        b = base.get(m.chave)
+        delta, regressao = None, []
+        if b:
+            delta = (m.ms / b["ms"] - 1) if b["ms"] else None
+            if m.ms > b["ms"] * (1 + tolerancia) and m.ms - b["ms"] > PISO_MS:
+                regressao.append("tempo")
+            if m.pico_mb > b["pico_mb"] * (1 + tolerancia) and m.pico_mb - b["pico_mb"] > PISO_MB:
+                regressao.append("memória")
+        linhas.append((m, b, delta, regressao))
+    return linhas
+
+
+def _ambiente() -> dict:
+    import numpy
+    import pandas
+    import pyarrow
+
+    return {"python": platform.python_version(), "plataforma": platform.platform(),
+            "processador": platform.machine(), "numpy": numpy.__version__,
+            "pandas": pandas.__version__, "pyarrow": pyarrow.__version__}
+
+
+def _pico_processo_mb() -> float:
+    try:
+        import resource
+    except ModuleNotFoundError:   # Windows
+        return float("nan")
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--linhas", type=int, nargs="+", default=[100_000, 1_000_000])
+    ap.add_argument("--fontes", nargs="+", choices=FONTES, default=list(FONTES))
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--pasta", help="onde gravar os arquivos sintéticos (padrão: pasta temporária)")
+    ap.add_argument("--baseline", type=Path, default=BASELINE)
+    ap.add_argument("--salvar-baseline", action="store_true", help="grava esta execução como o novo baseline")
+    ap.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    ap.add_argument("--json", type=Path, help="grava os resultados desta execução neste arquivo")
+    args = ap.parse_args(argv)
+
+    medidas = executar(args.linhas, args.fontes, args.repeticoes, args.seed, args.pasta)
+    resultado = {
+        "ambiente": _ambiente(),
+        "seed": args.seed,
+        "pico_processo_mb": round(_pico_processo_mb(), 1),
+        "etapas": {m.chave: {"ms": m.ms, "pico_mb": m.pico_mb} for m in medidas},
+    }
+    base = json.loads(args.baseline.read_text(encoding="utf-8"))["etapas"] if args.baseline.exists() else {}
+
+    print(f"{'linhas':>10}  {'fonte':<8} {'etapa':<34} {'ms':>10} {'linhas/s':>12} {'pico MB':>8} "
+          f"{'base ms':>10} {'Δ':>7}")
+    regressoes = 0
+    for m, b, delta, regressao in comparar(medidas, base, args.tolerancia):
+        vazao = f"{m.linhas_s:,.0f}".replace(",", ".") if m.linhas_s else ""
+        print(f"{m.linhas:>10}  {m.fonte:<8} {m.etapa:<34} {m.ms:>10.1f} {vazao:>12} {m.pico_mb:>8.1f} "
+              f"{(b['ms'] if b else float('nan')):>10.1f} {(f'{delta:+.0%}' if delta is not None else ''):>7}"
+              + (f"  ⚠ REGRESSÃO ({', '.join(regressao)})" if regressao else ""))
+        regressoes += bool(regressao)
+    print(f"Pico de memória do processo: {resultado['pico_processo_mb']:.0f} MB")
+
+    if args.json:
+        args.json.write_text(json.dumps(resultado, ensure_ascii=False, indent=1), encoding="utf-8")
+    if args.salvar_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(resultado, ensure_ascii=False, indent=1), encoding="utf-8")
+        print(f"Baseline gravado em {args.baseline}")
+    elif not base:
+        print(f"Sem baseline em {args.baseline}: rode com --salvar-baseline para criar um.")
+    elif regressoes:
+        print(f"{regressoes} etapa(s) com regressão acima de {args.tolerancia:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# estoque/bootstrap.py
+# -*- coding: utf-8 -*-
+"""Início comum das páginas: `set_page_config` + fundo com blur servido como arquivo estático."""
+
+import base64
+import hashlib
+import io
+import os
+import time
+from pathlib import Path
+
+import streamlit as st
+
+from estoque import perf, startup
+
+RAIZ = Path(__file__).resolve().parent.parent
+STATIC = RAIZ / "static"          # servido em app/static/ (server.enableStaticServing)
+FUNDO = "BackGround/Dasa.png"
+LARGURA_MAX = 1920                # o fundo leva blur(8px): resolução acima disso não aparece
+
+_CSS = """
+<style>
+[data-testid="stAppViewContainer"] {{
+    position: relative;
+    z-index: 0;
+}}
+[data-testid="stAppViewContainer"]::before {{
+    content: "";
+    background-image: url("{url}");
+    background-size: cover;
+    background-repeat: no-repeat;
+    background-attachment: fixed;
+    background-position: center;
+    filter: blur(8px) brightness(0.5);
+    position: absolute;
+    inset: 0;
+    z-index: -1;
+}}
+</style>
+"""
+
+
+def _variantes(bruto: bytes, largura_max: int) -> dict:
+    """Original + WebP (com e sem perda) reduzidos a `largura_max`; sem Pillow, só o original."""
+    out = {Path(FUNDO).suffix.lstrip(".").lower(): bruto}
+    try:
+        from PIL import Image
+    except ModuleNotFoundError:
+        return out
+    img = Image.open(io.BytesIO(bruto))
+    if img.width > largura_max:
+        img = img.resize((largura_max, round(img.height * largura_max / img.width)), Image.LANCZOS)
+    for nome, kw in (("webp", dict(quality=70, method=6)), ("lossless.webp", dict(lossless=True, method=6))):
+        buf = io.BytesIO()
+        img.convert("RGBA" if "A" in img.getbands() else "RGB").save(buf, "WEBP", **kw)
+        out[nome] = buf.getvalue()
+    return out
+
+
+@st.cache_resource(show_spinner=False)
+def preparar_fundo(origem: str = FUNDO, largura_max: int = LARGURA_MAX) -> dict:
+    """Uma vez por processo: gera a menor variante da imagem em `static/` e monta o CSS.
+
+    O nome do arquivo leva o hash do conteúdo, então trocar a imagem de origem
+    invalida o cache do navegador sem configuração extra.
+    """
+    t0 = time.perf_counter()
+    try:
+        bruto = (RAIZ / origem).read_bytes()
+    except OSError:
+        return {"css": "", "url": None, "bytes_origem": 0, "bytes": 0, "css_inline": 0, "ms": 0.0}
+
+    ext, dados = min(_variantes(bruto, largura_max).items(), key=lambda kv: len(kv[1]))
+    nome = f"fundo-{hashlib.sha1(bruto).hexdigest()[:10]}.{ext}"
+    destino = STATIC / nome
+    if not destino.exists():
+        STATIC.mkdir(exist_ok=True)
+        tmp = destino.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(dados)
+        os.replace(tmp, destino)   # outros processos nunca veem o arquivo pela metade
+
+    url = f"app/static/{nome}"
+    # Referência: o que o CSS antigo (imagem em data URI) mandava a cada rerun
+    inline = len(_CSS.format(url="data:image/png;base64," + base64.b64encode(bruto).decode()))
+    return {
+        "css": _CSS.format(url=url),
+        "url": url,
+        "bytes_origem": len(bruto),
+        "bytes": len(dados),
+        "css_inline": inline,
+        "ms": (time.perf_counter() - t0) * 1000,
+    }
+
+
+def aplicar_fundo(origem: str = FUNDO) -> dict:
+    """Injeta o CSS do fundo (poucas centenas de bytes; a imagem vem do `static/`).
+
+    O Streamlit descarta a cada rerun os elementos que não foram emitidos de novo,
+    então o `<style>` precisa sair em todo rerun; o que fica de uma vez por processo
+    é ler, converter e gravar a imagem.
+    """
+    with perf.etapa("fundo (CSS)") as e:
+        fundo = preparar_fundo(origem)
+        if fundo["css"]:
+            st.markdown(fundo["css"], unsafe_allow_html=True)
+        e["bytes"] = len(fundo["css"])
+    return fundo
+
+
+def iniciar_pagina(page_title: str, page_icon: str, layout: str = "wide") -> dict:
+    """Configuração comum a todas as páginas; devolve as medidas do fundo."""
+    pagina = page_title.split(" | ")[0]
+    startup.comecar(pagina)
+    st.set_page_config(page_title=page_title, page_icon=page_icon, layout=layout)
+    perf.iniciar(pagina)  # depois do set_page_config, que precisa ser o primeiro comando st
+    startup.aquecer()   # no 1º acesso ao processo: imports pesados em segundo plano
+    return aplicar_fundo()
+
+
+def finalizar_pagina() -> None:
+    """Fecha o perfil e o rastro desta execução; com `?perf=1` na URL mostra os relatórios
+    na barra lateral."""
+    ms = startup.terminar()
+    perf.fechar()
+    if not perf.diagnostico():
+        return
+    p = startup.perfil()
+    with st.sidebar.expander("⏱️ Inicialização", expanded=True):
+        st.caption(f"Esta execução: {ms:.0f} ms")
+        st.dataframe([{"página": k, **v} for k, v in p["paginas"].items()], hide_index=True)
+        st.caption("Imports pesados (onde foram pagos):")
+        st.dataframe([{"módulo": k, **v} for k, v in p["imports"].items()], hide_index=True)
+    _painel_diagnostico()
+
+
+def _painel_diagnostico() -> None:
+    """Últimos reruns da sessão por etapa, caches e percentis do processo, rastro em JSONL."""
+    execs = perf.rastro_sessao()
+    with st.sidebar.expander("🔬 Diagnóstico por etapa", expanded=True):
+        if not execs:
+            st.caption("Nenhuma execução registrada ainda.")
+            return
+        st.dataframe([{
+            "hora": time.strftime("%H:%M:%S", time.localtime(ex["inicio"])),
+            "tipo": ex["tipo"],
+            "ms": ex["ms"],
+            "mais lenta": max(ex["etapas"], key=lambda e: e["ms"])["etapa"] if ex["etapas"] else "",
+        } for ex in execs], hide_index=True)
+
+        i = st.selectbox("Execução", range(len(execs)), key="diag_execucao",
+                         format_func=lambda i: f"{execs[i]['tipo']} · {execs[i]['ms']:.0f} ms · "
+                                               f"{time.strftime('%H:%M:%S', time.localtime(execs[i]['inicio']))}")
+        st.dataframe([{"etapa": "  " * e.get("nivel", 0) + e["etapa"], "início (ms)": e.get("inicio_ms"),
+                       "ms": e["ms"], "cache": e.get("cache"), "linhas": e.get("linhas"),
+                       "bytes": e.get("bytes")} for e in execs[i]["etapas"]], hide_index=True)
+
+        caches = perf.caches()
+        if caches:
+            st.caption("Caches (processo):")
+            st.dataframe([{"cache": k, **v, "sem banco": f"{1 - v['miss'] / max(1, sum(v.values())):.0%}"}
+                          for k, v in caches.items()], hide_index=True)
+        st.caption("Percentis do processo (todas as sessões):")
+        st.dataframe(perf.percentis(), hide_index=True)
+        st.download_button("⬇️ Rastro (JSON lines)", data=perf.rastro_jsonl, file_name="rastro.jsonl",
+                           mime="application/jsonl", on_click="ignore")
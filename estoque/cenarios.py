@@ -0,0 +1,109 @@
+# estoque/cenarios.py
+# -*- coding: utf-8 -*-
+"""Cenários Monte Carlo para os KPIs da Introdução (erros/mês hoje, com QR, com QR + ML).
+
+Em vez de uma conta com premissas fixas, cada parâmetro incerto vira uma distribuição
+centrada no valor escolhido na página, e milhares de simulações são sorteadas de uma
+vez (um array NumPy por parâmetro, sem laço por simulação):
+
+- eventos/mês: Gama com coeficiente de variação de 10% (volume oscila mês a mês);
+- taxa de erro manual, adoção de QR/ML e eficácia de QR/ML: Beta com a média escolhida
+  e uma concentração que define a incerteza (mais concentração, menos dispersão);
+- erros de hoje: Binomial(eventos, taxa de erro).
+
+O resultado são faixas de percentis por cenário e a sensibilidade de cada parâmetro
+(correlação de postos com os erros projetados e o efeito de ir do decil de baixo ao
+de cima). A semente é fixa: o mesmo sorteio base serve todos os conjuntos de
+parâmetros, então mexer num slider muda o resultado só pelo efeito do parâmetro,
+sem ruído de amostragem. `cenarios` memoriza o resultado por conjunto de parâmetros.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from estoque.perf import anotar
+
+SIMULACOES = 20_000
+SEMENTE = 42
+PERCENTIS = (5, 25, 50, 75, 95)
+CENARIOS = ("Hoje (manual)", "Com QR", "Com QR + ML")
+CV_EVENTOS = 0.10
+# Concentração das Betas (média m -> Beta(m·k, (1-m)·k)); a incerteza multiplica k
+CONCENTRACAO = {"erro_manual": 300, "adocao_qr": 60, "adocao_ml": 60, "eficacia_qr": 40, "eficacia_ml": 40}
+INCERTEZA = {"baixa": 4.0, "média": 1.0, "alta": 0.25}
+ROTULOS = {
+    "eventos": "Eventos/mês",
+    "erro_manual": "Erro manual",
+    "adocao_qr": "Adoção QR",
+    "adocao_ml": "Adoção ML",
+    "eficacia_qr": "Eficácia QR",
+    "eficacia_ml": "Eficácia ML",
+}
+
+
+def _beta(rng, media: float, k: float, n: int) -> np.ndarray:
+    m = min(max(media, 0.0), 1.0)
+    amostra = rng.beta(max(m, 1e-4) * k, max(1 - m, 1e-4) * k, n)   # sorteia sempre: mesmo fluxo de números
+    return amostra if 0 < m < 1 else np.full(n, m)                  # 0% e 100% são certezas
+
+
+def _postos(x: np.ndarray) -> np.ndarray:
+    r = np.empty(x.shape[-1])
+    r[np.argsort(x, kind="stable")] = np.arange(x.shape[-1])
+    return r
+
+
+def simular(eventos_mes: int, erro_manual: float, adocao_qr: float, adocao_ml: float,
+            eficacia_qr: float = 0.75, eficacia_ml: float = 0.90, incerteza: str = "média",
+            n: int = SIMULACOES, semente: int = SEMENTE) -> dict:
+    """Sorteia `n` cenários (frações em 0–1) e devolve faixas, sensibilidade e as amostras."""
+    rng = np.random.default_rng(semente)
+    k = INCERTEZA[incerteza]
+    forma = 1 / CV_EVENTOS**2
+    medias = {"erro_manual": erro_manual, "adocao_qr": adocao_qr, "adocao_ml": adocao_ml,
+              "eficacia_qr": eficacia_qr, "eficacia_ml": eficacia_ml}
+    amostras = {"eventos": rng.gamma(forma, max(eventos_mes, 0) / forma, n)}
+    for nome, media in medias.items():
+        amostras[nome] = _beta(rng, media, CONCENTRACAO[nome] * k, n)
+
+    hoje = rng.binomial(np.round(amostras["eventos"]).astype("int64"), amostras["erro_manual"]).astype("float64")
+    redu_qr = amostras["adocao_qr"] * amostras["eficacia_qr"]
+    redu_ml = amostras["adocao_ml"] * amostras["eficacia_ml"]
+    resultados = np.stack([hoje, np.maximum(hoje * (1 - redu_qr), 0), np.maximum(hoje * (1 - redu_qr - redu_ml), 0)])
+
+    bandas = pd.DataFrame(np.percentile(resultados, PERCENTIS, axis=1).T,
+                          index=pd.Index(CENARIOS, name="Cenário"), columns=[f"p{p}" for p in PERCENTIS])
+    bandas["média"] = resultados.mean(axis=1)
+
+    # Sensibilidade dos erros projetados (QR + ML): Spearman e efeito decil de baixo -> de cima
+    proj = resultados[-1]
+    params = np.stack([amostras[p] for p in ROTULOS])
+    postos = np.stack([_postos(x) for x in params])
+    rp = _postos(proj)
+    pz = (postos - postos.mean(axis=1, keepdims=True)) / postos.std(axis=1, keepdims=True)
+    spearman = pz @ ((rp - rp.mean()) / (rp.std() or 1)) / n
+    spearman[(params.std(axis=1) == 0) | (proj.std() == 0)] = 0   # constante: postos só de desempate
+    d10, d90 = np.percentile(params, (10, 90), axis=1)
+    efeito = np.array([proj[x >= hi].mean() - proj[x <= lo].mean() for x, lo, hi in zip(params, d10, d90)])
+    # Tecnologia com adoção 0%: adoção e eficácia dela não mexem no resultado (só ruído)
+    fora = [f"{x}_{t}" for t in ("qr", "ml") if medias[f"adocao_{t}"] == 0 for x in ("adocao", "eficacia")]
+    sens = pd.DataFrame({"parâmetro": list(ROTULOS.values()), "spearman": np.nan_to_num(spearman),
+                         "efeito": np.nan_to_num(efeito)}, index=list(ROTULOS)).drop(index=fora)
+    sens = sens.sort_values("efeito", key=np.abs, ascending=False).reset_index(drop=True)
+    return {"bandas": bandas, "sensibilidade": sens, "resultados": resultados, "n": n}
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def cenarios(eventos_mes: int, erro_manual: float, adocao_qr: float, adocao_ml: float,
+             eficacia_qr: float = 0.75, eficacia_ml: float = 0.90, incerteza: str = "média",
+             n: int = SIMULACOES) -> dict:
+    """`simular` memorizado por conjunto de parâmetros (sem as amostras: só o que a página mostra)."""
+    anotar(cache="miss")
+    t0 = time.perf_counter()
+    r = simular(eventos_mes, erro_manual, adocao_qr, adocao_ml, eficacia_qr, eficacia_ml, incerteza, n)
+    r.pop("resultados")
+    r["ms"] = (time.perf_counter() - t0) * 1000
+    return r
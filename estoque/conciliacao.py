@@ -0,0 +1,373 @@
+# estoque/conciliacao.py
+# -*- coding: utf-8 -*-
+"""Conciliação SAP × contagem física em escala de catálogo (todas as unidades).
+
+A mesma auditoria da página "Problema & Solução" (delta Real − SAP, abaixo do mínimo),
+agora sobre o export completo do SAP e as contagens completas, com centenas de
+milhares de SKUs em várias unidades:
+
+1. Os dois lados são lidos em lotes (CSV, Parquet ou DataFrame) e cada lote é
+   repartido por hash de (SKU, UNIDADE) em `particoes` arquivos Arrow temporários.
+   Em memória fica só um lote por vez.
+2. Cada partição (as chaves de uma partição nunca aparecem em outra) é conciliada
+   num processo do pool: soma as linhas repetidas, junta os lados por hash (outer
+   join) e aplica as regras vetorizadas (delta, tolerância, mínimo). Em memória fica
+   uma partição por processo.
+3. As linhas divergentes ou abaixo do mínimo vão para `divergencias-NNNN.parquet`
+   na pasta de saída; os totais de cada partição são somados no resumo.
+
+Entradas pequenas (um lote de cada lado) são conciliadas direto, sem arquivos nem
+processos. Colunas esperadas (maiúsculas ou não): SKU, UNIDADE (opcional),
+QUANTIDADE e, do lado SAP, MINIMO (opcional).
+
+    python -m estoque.conciliacao --gerar 500000 --unidades 8 --pasta dados/conciliacao
+    python -m estoque.conciliacao --sap dados/conciliacao/sap.parquet \\
+        --fisico dados/conciliacao/fisico.parquet --saida dados/conciliacao/saida
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from estoque.perf import etapa
+
+CHAVES = ("SKU", "UNIDADE")
+LOTE = 250_000            # linhas lidas por vez de cada lado
+MAIORES = 20              # maiores divergências (em unidades) guardadas no resumo
+PASTA = Path(__file__).resolve().parent.parent / "dados" / "conciliacao"
+
+
+@dataclass(frozen=True)
+class Regras:
+    """Quando uma diferença conta como divergência.
+
+    Um par (SKU, UNIDADE) diverge quando |Real − SAP| passa de
+    max(`tolerancia_abs`, `tolerancia_rel` × |SAP|). Abaixo do mínimo: Real < MINIMO.
+    """
+    tolerancia_abs: float = 0
+    tolerancia_rel: float = 0.0
+
+
+@dataclass
+class Resultado:
+    resumo: dict
+    maiores: pd.DataFrame
+    saida: Path = None                          # pasta com os Parquet das linhas críticas
+    etapas: dict = field(default_factory=dict)  # ms por fase
+    divergentes: pd.DataFrame = None            # só no caminho em memória
+
+    def divergencias(self, limite: int = None) -> pd.DataFrame:
+        """Linhas divergentes ou abaixo do mínimo (da memória ou lidas da pasta de saída)."""
+        if self.divergentes is not None:
+            df = self.divergentes
+        else:
+            arquivos = sorted(Path(self.saida).glob("divergencias-*.parquet"))
+            df = pd.concat([pd.read_parquet(a) for a in arquivos], ignore_index=True) if arquivos else _vazio()
+        return df if limite is None else df.head(limite)
+
+
+# ---- leitura em lotes ----
+def lotes(origem, lote: int = LOTE):
+    """DataFrames de até `lote` linhas: de um DataFrame, arquivo .csv/.parquet ou callable `lote -> lotes`."""
+    if isinstance(origem, pd.DataFrame):
+        for ini in range(0, max(len(origem), 1), lote):
+            yield origem.iloc[ini:ini + lote]
+    elif callable(origem):
+        yield from origem(lote)
+    elif str(origem).lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for b in pq.ParquetFile(origem).iter_batches(batch_size=lote):
+            yield b.to_pandas()
+    elif str(origem).lower().endswith(".csv"):
+        try:
+            yield from pd.read_csv(origem, chunksize=lote, dtype={"SKU": str, "UNIDADE": str, "sku": str, "unidade": str})
+        except pd.errors.EmptyDataError:   # arquivo vazio (nem cabeçalho): nenhum lote
+            return
+    else:
+        raise ValueError(f"Origem não suportada: {origem!r} (DataFrame, .csv, .parquet ou callable)")
+
+
+def _normalizar(df: pd.DataFrame, valor: str, minimo: bool) -> pd.DataFrame:
+    """Chaves em texto sem espaços, QUANTIDADE -> `valor` (int64), MINIMO opcional."""
+    df = df.rename(columns=lambda c: str(c).upper().strip())
+    if "SKU" not in df or "QUANTIDADE" not in df:
+        raise ValueError(f"Colunas SKU e QUANTIDADE são obrigatórias (recebidas: {list(df.columns)})")
+    out = {}
+    for c in CHAVES:
+        col = df[c] if c in df else pd.Series("", index=df.index)
+        out[c] = col.astype("string[pyarrow]").str.strip().fillna("")
+    out[valor] = pd.to_numeric(df["QUANTIDADE"], errors="coerce").fillna(0).astype("int64")
+    if minimo:
+        m = df["MINIMO"] if "MINIMO" in df else pd.Series(np.nan, index=df.index)
+        out["MINIMO"] = pd.to_numeric(m, errors="coerce").astype("float64")
+    return pd.DataFrame(out)
+
+
+def _primeiro(it, valor: str, minimo: bool) -> pd.DataFrame:
+    """Primeiro lote normalizado; origem sem lotes (ou sem linhas nem colunas) vira um lado vazio."""
+    df = next(it, None)
+    if df is None or (df.empty and not len(df.columns)):
+        df = pd.DataFrame(columns=["SKU", "QUANTIDADE"])
+    return _normalizar(df, valor, minimo)
+
+
+def _somar(df: pd.DataFrame) -> pd.DataFrame:
+    """Uma linha por (SKU, UNIDADE): quantidades somadas, mínimo = o maior informado."""
+    agg = {c: ("max" if c == "MINIMO" else "sum") for c in df.columns if c not in CHAVES}
+    return df.groupby(list(CHAVES), sort=False, observed=True).agg(agg).reset_index()
+
+
+# ---- regras ----
+def avaliar(sap: pd.DataFrame, fisico: pd.DataFrame, regras: Regras = Regras()) -> pd.DataFrame:
+    """Junta os lados por (SKU, UNIDADE) e calcula as colunas da auditoria, vetorizado.
+
+    `sap` tem SAP (e MINIMO), `fisico` tem REAL, já com uma linha por chave. Um lado
+    ausente conta como zero; ORIGEM diz se a chave está nos dois, só no SAP ou só
+    na contagem.
+    """
+    df = sap.merge(fisico, on=list(CHAVES), how="outer", indicator=True, sort=False)
+    s = df["SAP"].fillna(0).to_numpy("float64")
+    r = df["REAL"].fillna(0).to_numpy("float64")
+    m = df["MINIMO"].to_numpy("float64", na_value=np.nan) if "MINIMO" in df else np.full(len(df), np.nan)
+    delta = r - s
+    limite = np.maximum(regras.tolerancia_abs, regras.tolerancia_rel * np.abs(s))
+    ind = df.pop("_merge").to_numpy()
+    df["SAP"], df["REAL"], df["MINIMO"] = s.astype("int64"), r.astype("int64"), m
+    df["DELTA"] = delta.astype("int64")
+    df["DIVERGENTE"] = np.abs(delta) > limite
+    df["ABAIXO_MINIMO"] = r < np.nan_to_num(m, nan=-np.inf)
+    df["ORIGEM"] = pd.Categorical(np.select([ind == "left_only", ind == "right_only"], ["só SAP", "só físico"], "ambos"),
+                                  categories=["ambos", "só SAP", "só físico"])
+    return df
+
+
+def _vazio() -> pd.DataFrame:
+    vazio = pd.DataFrame({c: pd.Series(dtype="string[pyarrow]") for c in CHAVES})
+    return avaliar(vazio.assign(SAP=pd.Series(dtype="int64"), MINIMO=pd.Series(dtype="float64")),
+                   vazio.assign(REAL=pd.Series(dtype="int64")))
+
+
+def _resumo(df: pd.DataFrame) -> dict:
+    """Totais somáveis entre partições."""
+    origem = df["ORIGEM"].value_counts()
+    return {
+        "chaves": len(df),
+        "divergentes": int(df["DIVERGENTE"].sum()),
+        "abaixo_minimo": int(df["ABAIXO_MINIMO"].sum()),
+        "so_sap": int(origem.get("só SAP", 0)),
+        "so_fisico": int(origem.get("só físico", 0)),
+        "total_sap": int(df["SAP"].sum()),
+        "total_real": int(df["REAL"].sum()),
+        "soma_delta": int(df["DELTA"].sum()),
+        "soma_abs_delta": int(df["DELTA"].abs().sum()),
+    }
+
+
+def _maiores(df: pd.DataFrame, n: int = MAIORES) -> pd.DataFrame:
+    d = df[df["DIVERGENTE"]]
+    return d.iloc[np.argsort(-d["DELTA"].abs().to_numpy(), kind="stable")[:n]]
+
+
+def _conciliar(sap: pd.DataFrame, fisico: pd.DataFrame, regras: Regras) -> tuple:
+    df = avaliar(_somar(sap), _somar(fisico), regras)
+    return df[df["DIVERGENTE"] | df["ABAIXO_MINIMO"]].reset_index(drop=True), _resumo(df), _maiores(df)
+
+
+# ---- partições ----
+class _Particionador:
+    """Reparte lotes por hash de (SKU, UNIDADE) em arquivos Arrow (stream) de uma pasta."""
+
+    def __init__(self, pasta: Path, lado: str, particoes: int):
+        self.pasta, self.lado, self.particoes = pasta, lado, particoes
+        self._escritores = {}
+        self.linhas = 0
+
+    def arquivo(self, p: int) -> Path:
+        return self.pasta / f"{self.lado}-{p:04d}.arrows"
+
+    def escrever(self, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+
+        h = (pd.util.hash_pandas_object(df[list(CHAVES)], index=False).to_numpy() % self.particoes).astype(np.intp)
+        ordem = np.argsort(h, kind="stable")
+        cortes = np.cumsum(np.bincount(h, minlength=self.particoes))
+        tbl = pa.Table.from_pandas(df, preserve_index=False).take(ordem)
+        ini = 0
+        for p, fim in enumerate(cortes):
+            if fim > ini:
+                w = self._escritores.get(p)
+                if w is None:
+                    w = self._escritores[p] = pa.ipc.new_stream(str(self.arquivo(p)), tbl.schema)
+                w.write_table(tbl.slice(ini, fim - ini))
+            ini = fim
+        self.linhas += len(df)
+
+    def fechar(self) -> None:
+        for w in self._escritores.values():
+            w.close()
+        self._escritores.clear()
+
+
+def _ler_particao(arquivo: Path, vazio: pd.DataFrame) -> pd.DataFrame:
+    import pyarrow as pa
+
+    if not arquivo.exists():
+        return vazio
+    with pa.memory_map(str(arquivo), "r") as f:
+        return pa.ipc.open_stream(f).read_all().to_pandas()
+
+
+def _processar_particao(p: int, pasta: Path, saida: Path, regras: Regras) -> tuple:
+    """Roda num processo do pool: concilia uma partição e grava as divergências dela."""
+    sap = _ler_particao(pasta / f"sap-{p:04d}.arrows", _primeiro(iter(()), "SAP", True))
+    fisico = _ler_particao(pasta / f"fisico-{p:04d}.arrows", _primeiro(iter(()), "REAL", False))
+    div, resumo, maiores = _conciliar(sap, fisico, regras)
+    if len(div):
+        div.to_parquet(saida / f"divergencias-{p:04d}.parquet", index=False)
+    return resumo, maiores
+
+
+def _somar_resumos(resumos) -> dict:
+    total = {}
+    for r in resumos:
+        for k, v in r.items():
+            total[k] = total.get(k, 0) + v
+    return total
+
+
+def conciliar(sap, fisico, regras: Regras = Regras(), saida=None, particoes: int = None,
+              processos: int = None, lote: int = LOTE) -> Resultado:
+    """Concilia o export do SAP com a contagem física (ver o docstring do módulo).
+
+    `saida`: pasta dos Parquet de divergências; os `divergencias-*.parquet` de uma
+    execução anterior saem, o resto da pasta fica (padrão: pasta temporária).
+    `particoes`: padrão 4 × `processos`; mais partições = menos memória por processo.
+    `processos`: padrão todos os núcleos; 1 concilia as partições neste processo.
+    """
+    processos = processos or os.cpu_count() or 1
+    particoes = particoes or 4 * processos
+    etapas = {}
+    t0 = time.perf_counter()
+    it_sap, it_fis = lotes(sap, lote), lotes(fisico, lote)
+    primeiro_sap = _primeiro(it_sap, "SAP", True)
+    primeiro_fis = _primeiro(it_fis, "REAL", False)
+    resto_sap, resto_fis = next(it_sap, None), next(it_fis, None)
+
+    if resto_sap is None and resto_fis is None:
+        # Cabe num lote de cada lado: sem arquivos nem processos
+        with etapa("conciliação (memória)", linhas=len(primeiro_sap) + len(primeiro_fis)):
+            div, resumo, maiores = _conciliar(primeiro_sap, primeiro_fis, regras)
+        resumo.update(linhas_sap=len(primeiro_sap), linhas_fisico=len(primeiro_fis))
+        etapas["total"] = (time.perf_counter() - t0) * 1000
+        return Resultado(resumo, maiores.reset_index(drop=True), None, etapas, div)
+
+    saida = Path(saida) if saida else Path(tempfile.mkdtemp(prefix="estoque-conciliacao-"))
+    saida.mkdir(parents=True, exist_ok=True)
+    for antigo in saida.glob("divergencias-*.parquet"):   # só o que esta função grava
+        antigo.unlink()
+    with tempfile.TemporaryDirectory(prefix="estoque-particoes-") as tmp:
+        tmp = Path(tmp)
+        with etapa("conciliação: particionamento") as e:
+            lados = []
+            for lado, valor, minimo, primeiro, resto, it in (
+                    ("sap", "SAP", True, primeiro_sap, resto_sap, it_sap),
+                    ("fisico", "REAL", False, primeiro_fis, resto_fis, it_fis)):
+                part = _Particionador(tmp, lado, particoes)
+                part.escrever(primeiro)
+                if resto is not None:
+                    part.escrever(_normalizar(resto, valor, minimo))
+                    for df in it:
+                        part.escrever(_normalizar(df, valor, minimo))
+                part.fechar()
+                lados.append(part.linhas)
+            e["linhas"] = sum(lados)
+        etapas["particionamento"] = (time.perf_counter() - t0) * 1000
+
+        t1 = time.perf_counter()
+        with etapa("conciliação: partições", particoes=particoes, processos=processos):
+            args = [(p, tmp, saida, regras) for p in range(particoes)]
+            if processos == 1:
+                partes = [_processar_particao(*a) for a in args]
+            else:
+                with ProcessPoolExecutor(max_workers=min(processos, particoes)) as ex:
+                    partes = list(ex.map(_processar_particao, *zip(*args)))
+        etapas["partições"] = (time.perf_counter() - t1) * 1000
+
+    resumo = _somar_resumos(r for r, _ in partes)
+    resumo.update(linhas_sap=lados[0], linhas_fisico=lados[1])
+    maiores = _maiores(pd.concat([m for _, m in partes], ignore_index=True))
+    etapas["total"] = (time.perf_counter() - t0) * 1000
+    return Resultado(resumo, maiores.reset_index(drop=True), saida, etapas)
+
+
+# ---- dados sintéticos ----
+def gerar(skus: int = 100_000, unidades: int = 8, seed: int = 42, divergencia: float = 0.1) -> tuple:
+    """(sap, fisico) sintéticos: cada SKU em cada unidade, `divergencia` das contagens erradas.
+
+    Também há pares só no SAP (não contados) e só na contagem (não cadastrados).
+    """
+    rng = np.random.default_rng(seed)
+    n = skus * unidades
+    sku = np.char.add("SKU-", np.char.zfill(np.tile(np.arange(skus), unidades).astype(str), 7))
+    unidade = np.repeat([f"UN{u:02d}" for u in range(unidades)], skus)
+    sap_q = rng.poisson(rng.lognormal(3, 1, skus)[np.tile(np.arange(skus), unidades)]).astype("int64")
+    erro = rng.random(n) < divergencia
+    real_q = np.where(erro, np.maximum(sap_q + rng.integers(-20, 21, n), 0), sap_q)
+    minimo = np.round(sap_q * rng.uniform(0.3, 0.9, n))
+    so_sap, so_fis = rng.random(n) < 0.002, rng.random(n) < 0.002
+    sap = pd.DataFrame({"SKU": sku, "UNIDADE": unidade, "QUANTIDADE": sap_q, "MINIMO": minimo})[~so_fis]
+    fisico = pd.DataFrame({"SKU": sku, "UNIDADE": unidade, "QUANTIDADE": real_q})[~so_sap]
+    return sap.reset_index(drop=True), fisico.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sap", help="export do SAP (.csv ou .parquet)")
+    ap.add_argument("--fisico", help="contagem física (.csv ou .parquet)")
+    ap.add_argument("--saida", type=Path, help="pasta dos Parquet de divergências (só os divergencias-*.parquet "
+                    "anteriores são apagados)")
+    ap.add_argument("--tolerancia-abs", type=float, default=0)
+    ap.add_argument("--tolerancia-rel", type=float, default=0.0)
+    ap.add_argument("--particoes", type=int)
+    ap.add_argument("--processos", type=int)
+    ap.add_argument("--lote", type=int, default=LOTE)
+    ap.add_argument("--gerar", type=int, metavar="SKUS", help="grava sap.parquet e fisico.parquet sintéticos")
+    ap.add_argument("--unidades", type=int, default=8)
+    ap.add_argument("--pasta", type=Path, default=PASTA, help="onde --gerar grava os arquivos")
+    args = ap.parse_args(argv)
+
+    if args.gerar:
+        sap, fisico = gerar(args.gerar, args.unidades)
+        args.pasta.mkdir(parents=True, exist_ok=True)
+        for nome, df in (("sap", sap), ("fisico", fisico)):
+            df.to_parquet(args.pasta / f"{nome}.parquet", index=False, row_group_size=LOTE)
+        print(f"{len(sap):,} linhas SAP e {len(fisico):,} contagens em {args.pasta}".replace(",", "."))
+        if not args.sap:
+            return 0
+    if not (args.sap and args.fisico):
+        ap.error("informe --sap e --fisico (ou --gerar)")
+
+    r = conciliar(args.sap, args.fisico, Regras(args.tolerancia_abs, args.tolerancia_rel), args.saida,
+                  args.particoes, args.processos, args.lote)
+    for k, v in r.resumo.items():
+        print(f"{k:<16} {v:>14,}".replace(",", "."))
+    print("fases (ms):", ", ".join(f"{k} {v:.0f}" for k, v in r.etapas.items()))
+    linhas = r.resumo["linhas_sap"] + r.resumo["linhas_fisico"]
+    print(f"{linhas / (r.etapas['total'] / 1000):,.0f} linhas/s".replace(",", "."))
+    if r.saida:
+        print(f"divergências em {r.saida}")
+    print(r.maiores.head(10).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
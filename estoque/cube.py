@@ -0,0 +1,127 @@
+# estoque/cube.py
+# -*- coding: utf-8 -*-
+"""Cubo INSUMO × EXAME pré-agregado por snapshot (consultas dos gráficos viram roll-ups)."""
+
+import numpy as np
+import pandas as pd
+
+DIMS = {"INSUMO": "I", "EXAME": "E"}
+
+
+def _hist(i, e, q) -> pd.DataFrame:
+    """Contagem por (código INSUMO, código EXAME, QUANTIDADE)."""
+    h = pd.DataFrame({"I": i, "E": e, "Q": q})
+    return h.groupby(["I", "E", "Q"], sort=False).size().rename("N").reset_index()
+
+
+class Cubo:
+    """Histograma esparso de QUANTIDADE por célula INSUMO × EXAME.
+
+    É o estado "mergeable" do cubo: contagem, soma, mín. e máx. saem dele direto, e
+    média/mediana exatas também (somar histogramas = juntar células). Filtro por
+    faixa de quantidade é só um corte em Q, então todos os filtros da página cabem
+    aqui sem voltar às linhas. Os códigos são os das categorias do dataset.
+
+    Cada consulta usa a menor projeção que a responde (`marginal`): sem faixa nem
+    mediana, basta N/SOMA/MIN/MAX por célula; sem filtro de INSUMO, o histograma só
+    por EXAME; e assim por diante. As projeções são criadas sob demanda e ficam em cache.
+    """
+
+    def __init__(self, hist: pd.DataFrame):
+        self.hist = hist
+        self._marginais = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "Cubo":
+        return cls(_hist(df["INSUMO"].cat.codes.to_numpy(), df["EXAME"].cat.codes.to_numpy(),
+                         df["QUANTIDADE"].to_numpy()))
+
+    def aplicar(self, removidas: pd.DataFrame, novas: pd.DataFrame) -> "Cubo":
+        """Cubo do snapshot seguinte: subtrai as linhas que saíram e soma as que entraram."""
+        partes = [self.hist]
+        if len(novas):
+            partes.append(Cubo.from_frame(novas).hist)
+        if len(removidas):
+            menos = Cubo.from_frame(removidas).hist
+            partes.append(menos.assign(N=-menos["N"]))
+        h = pd.concat(partes, ignore_index=True).groupby(["I", "E", "Q"], sort=False)["N"].sum().reset_index()
+        return Cubo(h[h["N"] > 0].reset_index(drop=True))
+
+    def marginal(self, chaves: tuple, distribuicao: bool) -> pd.DataFrame:
+        """Projeção do cubo nas `chaves` ("I"/"E"), ordenada por elas (+ Q se `distribuicao`).
+
+        Com distribuição: colunas chaves + Q + N. Sem: chaves + N, SOMA, MIN, MAX.
+        """
+        k = (tuple(chaves), distribuicao)
+        if k not in self._marginais:
+            h = self.hist
+            q = h["Q"].astype("int64")
+            if distribuicao:
+                grupo = list(chaves) + ["Q"]
+                m = h.groupby(grupo, sort=True)["N"].sum().reset_index()
+            else:
+                h = h.assign(SOMA=q * h["N"], MIN=q, MAX=q, _T=0)
+                g = h.groupby(list(chaves) or ["_T"], sort=True)
+                m = pd.DataFrame({"N": g["N"].sum(), "SOMA": g["SOMA"].sum(),
+                                  "MIN": g["MIN"].min(), "MAX": g["MAX"].max()})
+                m = m.reset_index().drop(columns="_T", errors="ignore")
+            self._marginais[k] = m
+        return self._marginais[k]
+
+    def nbytes(self) -> int:
+        partes = [self.hist] + list(self._marginais.values())
+        return int(sum(p.memory_usage(index=False).sum() for p in partes))
+
+    # ---- consultas ----
+    def consulta(self, dims: list, metricas=(), insumos=None, exames=None, faixa=None) -> pd.DataFrame:
+        """Roll-up por `dims` com os filtros já traduzidos em códigos (None = sem filtro).
+
+        Sempre devolve N e SOMA; MIN, MAX, MEDIA e MEDIANA só se pedidas.
+        """
+        distribuicao = faixa is not None or "MEDIANA" in metricas
+        usadas = set(dims) | ({"I"} if insumos is not None else set()) | ({"E"} if exames is not None else set())
+        chaves = tuple(c for c in ("I", "E") if c in usadas)
+        h = self.marginal(chaves, distribuicao)
+
+        mask = np.ones(len(h), dtype=bool)
+        if insumos is not None:
+            mask &= np.isin(h["I"].to_numpy(), insumos)
+        if exames is not None:
+            mask &= np.isin(h["E"].to_numpy(), exames)
+        if faixa is not None:
+            q = h["Q"].to_numpy()
+            mask &= (q >= faixa[0]) & (q <= faixa[1])
+        h = h[mask]
+        return Cubo.rollup(h, dims, metricas, ordenado=(tuple(dims) == chaves))
+
+    @staticmethod
+    def rollup(h: pd.DataFrame, dims: list, metricas=(), ordenado=False) -> pd.DataFrame:
+        """Agrega uma fatia (distribuição ou células) pelas dimensões pedidas."""
+        if "Q" in h:
+            q = h["Q"].astype("int64")
+            h = h.assign(SOMA=q * h["N"], MIN=q, MAX=q)
+        if not dims:
+            h = h.assign(_T=0)
+        g = h.groupby(list(dims) or ["_T"], sort=False)
+        out = pd.DataFrame({"N": g["N"].sum(), "SOMA": g["SOMA"].sum()})
+        if "MIN" in metricas:
+            out["MIN"] = g["MIN"].min()
+        if "MAX" in metricas:
+            out["MAX"] = g["MAX"].max()
+        if "MEDIA" in metricas:
+            out["MEDIA"] = out["SOMA"] / out["N"]
+        if "MEDIANA" in metricas:
+            out["MEDIANA"] = Cubo._mediana(h, list(dims) or ["_T"], ordenado)
+        return out.reset_index(drop=not dims)
+
+    @staticmethod
+    def _mediana(h: pd.DataFrame, dims: list, ordenado=False) -> pd.Series:
+        """Mediana exata a partir da distribuição (média dos dois valores centrais)."""
+        if not ordenado:
+            h = h.sort_values(dims + ["Q"], kind="stable")
+        g = h.groupby(dims, sort=False)["N"]
+        tot = g.transform("sum").to_numpy()
+        cum = g.cumsum().to_numpy()
+        lo = h[cum > (tot - 1) // 2].groupby(dims, sort=False)["Q"].first()
+        hi = h[cum > tot // 2].groupby(dims, sort=False)["Q"].first()
+        return (lo + hi) / 2
@@ -0,0 +1,145 @@
+# estoque/dataset.py
+# -*- coding: utf-8 -*-
+"""Representação compacta (categorias + inteiros reduzidos) da tabela INSUMOS."""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from estoque.cube import Cubo
+from estoque.perf import etapa
+from estoque.search import SearchIndex
+
+CATEGORICAS = ("INSUMO", "EXAME")
+
+
+def _downcast(q: pd.Series) -> pd.Series:
+    return pd.to_numeric(q, downcast="integer") if len(q) else q.astype("int8")
+
+
+@dataclass(frozen=True, eq=False)
+class InsumosDataset:
+    """Uma instância por snapshot, compartilhada por todas as sessões.
+
+    INSUMO/EXAME ficam como categóricos (dicionário + códigos inteiros) e QUANTIDADE
+    no menor inteiro que comporta os valores. As sessões guardam só a referência e,
+    no máximo, arrays de índices das linhas filtradas — nunca cópias da tabela.
+    """
+    df: pd.DataFrame
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "InsumosDataset":
+        with etapa("dataset compacto", linhas=len(df)):
+            out = {}
+            for c in df.columns:
+                if c in CATEGORICAS:
+                    out[c] = df[c].astype("category")
+                elif c == "QUANTIDADE":
+                    out[c] = _downcast(df[c])
+                else:
+                    out[c] = df[c]
+            return cls(pd.DataFrame(out, index=pd.RangeIndex(len(df))))
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def derivados(self) -> dict:
+        # Estruturas derivadas, criadas sob demanda e presas a esta instância (= a este snapshot)
+        return self.__dict__.setdefault("_derivados", {})
+
+    def indice(self, col: str = "INSUMO") -> SearchIndex:
+        """Índice de busca sobre os valores distintos de `col` (ids = códigos da categoria)."""
+        cache = self.derivados()
+        if ("indice", col) not in cache:
+            with etapa("índice de busca (construção)"):
+                cache[("indice", col)] = SearchIndex(self.df[col].cat.categories)
+        return cache[("indice", col)]
+
+    def cubo(self) -> Cubo:
+        """Cubo INSUMO × EXAME deste snapshot (construído na primeira consulta)."""
+        cache = self.derivados()
+        if "cubo" not in cache:
+            with etapa("cubo (construção)", linhas=len(self.df)):
+                cache["cubo"] = Cubo.from_frame(self.df)
+        return cache["cubo"]
+
+    def _chave(self, col: str) -> np.ndarray:
+        """Valores de `col` como números que ordenam como o texto (ordem alfabética)."""
+        s = self.df[col]
+        if not isinstance(s.dtype, pd.CategoricalDtype):
+            return s.to_numpy()
+        # Categorias ficam na ordem de chegada (anexar): ordena pelo posto de cada uma
+        posto = np.empty(len(s.cat.categories) + 1, dtype=np.int64)
+        posto[s.cat.categories.argsort()] = np.arange(len(s.cat.categories))
+        posto[-1] = -1   # código -1 (nulo) antes de tudo
+        return posto[s.cat.codes.to_numpy()]
+
+    def ordem(self, *cols: str) -> np.ndarray:
+        """Posições de todas as linhas ordenadas por `cols` (a primeira manda, as demais desempatam)."""
+        cache = self.derivados()
+        if ("ordem", cols) not in cache:
+            # lexsort: a última chave é a principal
+            cache[("ordem", cols)] = np.lexsort([self._chave(c) for c in reversed(cols)])
+        return cache[("ordem", cols)]
+
+    def _csr(self, col: str) -> tuple:
+        """Linhas agrupadas por código: `ordem[ini[c]:ini[c + 1]]` são as linhas com código c."""
+        cache = self.derivados()
+        if ("csr", col) not in cache:
+            codes = self.df[col].cat.codes.to_numpy()
+            ordem = np.argsort(codes, kind="stable")
+            ini = np.searchsorted(codes[ordem], np.arange(len(self.df[col].cat.categories) + 1))
+            cache[("csr", col)] = (codes, ordem, ini)
+        return cache[("csr", col)]
+
+    def posicoes(self, col: str, ids) -> np.ndarray:
+        """Posições (ordenadas) das linhas cujo código de `col` está em `ids`."""
+        codes, ordem, ini = self._csr(col)
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) * 4 > len(ini):
+            # Muitos valores: mais barato varrer os códigos com uma tabela de lookup
+            hit = np.zeros(len(ini), dtype=bool)
+            hit[ids] = True
+            return np.flatnonzero(hit[codes])
+        if not len(ids):
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate([ordem[ini[c]:ini[c + 1]] for c in ids]))
+
+    def anexar(self, manter: np.ndarray, novos: pd.DataFrame) -> "InsumosDataset":
+        """Novo dataset = linhas `manter` deste + `novos`, reaproveitando os dicionários."""
+        base = self.df[manter]
+        out = {}
+        for c in self.df.columns:
+            if c in CATEGORICAS:
+                cats = base[c].cat.categories
+                extra = pd.Index(novos[c].dropna().unique()).difference(cats)
+                if len(extra):
+                    cats = cats.append(extra)
+                col_base = base[c].cat.set_categories(cats)
+                col_novo = pd.Categorical(novos[c], categories=cats)
+                out[c] = pd.concat([col_base, pd.Series(col_novo)], ignore_index=True)
+            elif c == "QUANTIDADE":
+                out[c] = _downcast(pd.concat([base[c], novos[c]], ignore_index=True))
+            else:
+                out[c] = pd.concat([base[c], novos[c]], ignore_index=True)
+        novo = InsumosDataset(pd.DataFrame(out))
+        if "cubo" in self.derivados():
+            # Cubo já existente é atualizado com o delta em vez de recalculado do zero
+            saiu, entrou = self.df[~manter], novo.df.iloc[len(base):]
+            novo.derivados()["cubo"] = self.derivados()["cubo"].aplicar(saiu, entrou)
+        return novo
+
+    def memoria(self) -> dict:
+        """Bytes por coluna (dicionário + códigos) e total do snapshot."""
+        por_coluna = {c: int(v) for c, v in self.df.memory_usage(index=False, deep=True).items()}
+        total = sum(por_coluna.values())
+        cubo = self.derivados().get("cubo")
+        return {
+            "linhas": len(self.df),
+            "cubo": cubo.nbytes() if cubo is not None else None,
+            "colunas": por_coluna,
+            "total": total,
+            "bytes_por_linha": (total / len(self.df)) if len(self.df) else 0.0,
+            "distintos": {c: int(self.df[c].nunique()) for c in CATEGORICAS if c in self.df},
+        }
@@ -0,0 +1,193 @@
+# estoque/delta.py
+# -*- coding: utf-8 -*-
+"""Snapshot da tabela INSUMOS com refresh incremental (só linhas alteradas desde a última marca)."""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from estoque.dataset import InsumosDataset
+from estoque.loader import arrow_to_pandas, fetch_arrow
+from estoque.query import SqlBuilder
+
+MARCA_PADRAO = "ORA_ROWSCN"
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Tabela carregada + o necessário para o próximo delta. Não é alterada depois de criada."""
+    dados: InsumosDataset   # INSUMO, QUANTIDADE, EXAME compactos (RangeIndex)
+    rid: pd.Index           # ROWID de cada linha de `dados` (mesma ordem)
+    hwm: object             # maior marca já incorporada (high-water mark)
+    marca: str              # ORA_ROWSCN ou coluna monotônica
+    schema: str
+    versao: int = 1
+    carregado_em: float = 0.0
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self.dados.df
+
+
+def _py(v):
+    """Escalar numpy/pandas -> tipo Python aceito como bind."""
+    if hasattr(v, "to_pydatetime"):
+        return v.to_pydatetime()
+    return v.item() if hasattr(v, "item") else v
+
+
+@contextmanager
+def _leitura_consistente(conn):
+    """Transação read-only: delta, contagem e ROWIDs enxergam o mesmo ponto no tempo."""
+    with conn.cursor() as cur:
+        cur.execute("SET TRANSACTION READ ONLY")
+    try:
+        yield
+    finally:
+        conn.rollback()
+
+
+def _ler(conn, q: SqlBuilder, marca: str, desde=None):
+    df = arrow_to_pandas(fetch_arrow(conn, *q.delta(marca, desde)))
+    rid = pd.Index(df.pop("RID").astype(str), name="RID")
+    marcas = df.pop("MARCA")
+    hwm = _py(marcas.max()) if len(marcas) else desde
+    return df, rid, hwm
+
+
+def load_snapshot(conn, schema: str, marca: str = MARCA_PADRAO) -> Snapshot:
+    """Carga completa inicial (também usada quando não há snapshot anterior)."""
+    q = SqlBuilder(schema)
+    with _leitura_consistente(conn):
+        df, rid, hwm = _ler(conn, q, marca)
+    return Snapshot(dados=InsumosDataset.from_frame(df), rid=rid, hwm=hwm, marca=marca, schema=q.schema, carregado_em=time.time())
+
+
+def refresh(conn, snap: Snapshot) -> tuple:
+    """Aplica inserts/updates/deletes desde `snap.hwm`. Devolve (novo snapshot, estatísticas).
+
+    O banco só devolve as linhas com marca nova; deletes são detectados pela contagem
+    e, só quando ela não bate, por um anti-join de ROWIDs.
+    """
+    t0 = time.perf_counter()
+    q = SqlBuilder(snap.schema)
+    with _leitura_consistente(conn):
+        novos, novos_rid, hwm = _ler(conn, q, snap.marca, snap.hwm)
+
+        pos = snap.rid.get_indexer(novos_rid)
+        manter = np.ones(len(snap.rid), dtype=bool)
+        manter[pos[pos >= 0]] = False           # versão antiga das linhas alteradas
+        alteradas = int((pos >= 0).sum())
+        inseridas = len(novos_rid) - alteradas
+
+        with conn.cursor() as cur:
+            cur.execute(*q.contagem())
+            total_banco = cur.fetchone()[0]
+        removidas = 0
+        if int(manter.sum()) + len(novos_rid) != total_banco:
+            vivos = arrow_to_pandas(fetch_arrow(conn, *q.rowids()))["RID"].astype(str)
+            morto = manter & ~snap.rid.isin(vivos)
+            removidas = int(morto.sum())
+            manter &= ~morto
+
+    if not len(novos_rid) and not removidas:
+        return snap, {"inseridas": 0, "alteradas": 0, "removidas": 0,
+                      "ms": (time.perf_counter() - t0) * 1000}
+
+    dados = snap.dados.anexar(manter, novos)
+    rid = snap.rid[manter].append(novos_rid)
+    novo = replace(snap, dados=dados, rid=rid, hwm=hwm, versao=snap.versao + 1, carregado_em=time.time())
+    stats = {"inseridas": inseridas, "alteradas": alteradas, "removidas": removidas,
+             "ms": (time.perf_counter() - t0) * 1000}
+    return novo, stats
+
+
+def _para_disco(snap: Snapshot) -> tuple:
+    meta = {"hwm": snap.hwm, "marca": snap.marca, "schema": snap.schema, "versao": snap.versao,
+            "carregado_em": snap.carregado_em}
+    return {"_RID": snap.rid.to_numpy()}, meta
+
+
+def _de_disco(dados: InsumosDataset, extras: dict, meta: dict) -> Snapshot:
+    rid = pd.Index(extras["_RID"].to_pandas().astype(str), name="RID")
+    campos = ("hwm", "marca", "schema", "versao", "carregado_em")
+    return Snapshot(dados=dados, rid=rid, **{k: meta[k] for k in campos})
+
+
+class SnapshotStore:
+    """Snapshots por chave (DSN, usuário, schema, marca), compartilhados entre sessões do processo.
+
+    Com um `CacheDisco`, cada snapshot também fica em disco: outros processos e o
+    próprio processo depois de reiniciar partem do arquivo (e depois só aplicam
+    deltas) em vez de reler a tabela inteira do banco. O TTL do disco vale também
+    para a cópia em memória.
+    """
+
+    def __init__(self, disco=None):
+        self.disco = disco
+        self._snaps = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _lock_for(self, key) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _vencido(self, snap: Snapshot) -> bool:
+        return self.disco is not None and time.time() - snap.carregado_em > self.disco.ttl
+
+    def _do_disco(self, key):
+        achado = self.disco.ler(key) if self.disco is not None else None
+        return _de_disco(*achado) if achado is not None else None
+
+    def get(self, key):
+        snap = self._snaps.get(key)
+        if snap is None or self._vencido(snap):
+            with self._lock_for(key):
+                snap = self._snaps.get(key)
+                if snap is None or self._vencido(snap):
+                    snap = self._do_disco(key)
+                    if snap is None:
+                        self._snaps.pop(key, None)
+                    else:
+                        self._snaps[key] = snap
+        return snap
+
+    def load(self, key, conn, schema: str, marca: str = MARCA_PADRAO) -> Snapshot:
+        """Carga completa, uma por chave mesmo com várias sessões (e processos) pedindo ao mesmo tempo."""
+        with self._lock_for(key):
+            snap = self._snaps.get(key)
+            if snap is not None and not self._vencido(snap):
+                return snap
+            if self.disco is None:
+                snap = self._snaps[key] = load_snapshot(conn, schema, marca)
+                return snap
+            with self.disco.trava(key):
+                snap = self._do_disco(key)
+                if snap is None:
+                    snap = load_snapshot(conn, schema, marca)
+                    self.disco.gravar(key, snap.dados, *_para_disco(snap))
+            self._snaps[key] = snap
+            return snap
+
+    def refresh(self, key, conn) -> tuple:
+        with self._lock_for(key):
+            anterior = self._snaps[key]
+            novo, stats = refresh(conn, anterior)
+            self._snaps[key] = novo
+            if self.disco is not None and novo is not anterior:
+                self.disco.gravar(key, novo.dados, *_para_disco(novo))   # troca atômica do arquivo
+            return novo, stats
+
+    def drop(self, key=None):
+        with self._lock:
+            if key is None:
+                self._snaps.clear()
+            else:
+                self._snaps.pop(key, None)
+        if self.disco is not None:
+            self.disco.remover(key)
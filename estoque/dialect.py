@@ -0,0 +1,70 @@
+# estoque/dialect.py
+# -*- coding: utf-8 -*-
+"""Diferenças de SQL entre os bancos suportados (Oracle, SQLite, DuckDB)."""
+
+
+class Dialeto:
+    """Oracle: referência da qual os outros dialetos só trocam os trechos que diferem."""
+
+    nome = "oracle"
+    marcador = ":"           # prefixo dos binds nomeados
+    usa_schema = True        # tabela qualificada pelo OWNER
+
+    def bind(self, nome: str) -> str:
+        return f"{self.marcador}{nome}"
+
+    def tabela(self, schema) -> str:
+        return f"{schema}.INSUMOS" if self.usa_schema else "INSUMOS"
+
+    def numero(self, expr: str) -> str:
+        """Texto/número -> inteiro, com inválido ou nulo virando 0."""
+        return (f"CAST(TRUNC(NVL(TO_NUMBER({expr} DEFAULT NULL ON CONVERSION ERROR), 0)) "
+                "AS NUMBER(18))")
+
+    def texto(self, expr: str) -> str:
+        return f"TO_CHAR({expr})"
+
+    def limite(self, n: str) -> str:
+        return f" FETCH FIRST {self.bind(n)} ROWS ONLY"
+
+    def pagina(self, o: str, n: str) -> str:
+        return f" OFFSET {self.bind(o)} ROWS FETCH NEXT {self.bind(n)} ROWS ONLY"
+
+
+class SqliteDialeto(Dialeto):
+    """SQLite: sem MEDIAN nativo (o backend registra uma agregação) e LIMIT/OFFSET."""
+
+    nome = "sqlite"
+    usa_schema = False
+
+    def numero(self, expr: str) -> str:
+        # CAST para INTEGER já trunca e devolve 0 para texto não numérico
+        return f"CAST(IFNULL({expr}, 0) AS INTEGER)"
+
+    def texto(self, expr: str) -> str:
+        return f"CAST({expr} AS TEXT)"
+
+    def limite(self, n: str) -> str:
+        return f" LIMIT {self.bind(n)}"
+
+    def pagina(self, o: str, n: str) -> str:
+        return f" LIMIT {self.bind(n)} OFFSET {self.bind(o)}"
+
+
+class DuckDbDialeto(SqliteDialeto):
+    """DuckDB (ex.: sobre Parquet): binds `$nome`, TRY_CAST e MEDIAN nativo."""
+
+    nome = "duckdb"
+    marcador = "$"
+
+    def numero(self, expr: str) -> str:
+        return f"CAST(TRUNC(COALESCE(TRY_CAST({expr} AS DOUBLE), 0)) AS BIGINT)"
+
+    def texto(self, expr: str) -> str:
+        return f"CAST({expr} AS VARCHAR)"
+
+
+ORACLE = Dialeto()
+SQLITE = SqliteDialeto()
+DUCKDB = DuckDbDialeto()
+DIALETOS = {d.nome: d for d in (ORACLE, SQLITE, DUCKDB)}
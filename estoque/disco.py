@@ -0,0 +1,168 @@
+# estoque/disco.py
+# -*- coding: utf-8 -*-
+"""Cache de snapshots em disco (Arrow IPC), compartilhado entre processos e reinícios.
+
+Cada snapshot é um arquivo `.arrow` sem compressão: outro worker, ou o mesmo
+processo depois de reiniciar, abre o arquivo por `mmap`, sem desserializar nada.
+INSUMO/EXAME são gravados como dicionário, então o dataset volta já compacto
+(categórico), sem refazer a conversão de texto. A leitura não é zero-cópia: o
+`to_pandas` copia para a memória do processo os códigos das categorias (da ordem
+de 20 MB a cada 5 milhões de linhas) e QUANTIDADE; o que se evita é a consulta ao banco.
+
+Gravação: arquivo temporário na mesma pasta + `os.replace` (troca atômica; quem
+já mapeou a versão anterior continua lendo a versão antiga até soltar). Uma trava
+por chave (`flock`) evita que dois processos carreguem a mesma tabela ao mesmo tempo.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+
+from estoque.dataset import InsumosDataset
+from estoque.perf import anotar, etapa
+
+PASTA = Path(__file__).resolve().parent.parent / ".cache" / "snapshots"
+FORMATO = 1    # muda quando o layout do arquivo muda: invalida os arquivos antigos
+
+# Padrões (sobrescritos por cache_ttl_s / cache_max_mb na seção [oracle] do secrets.toml)
+DISCO_DEFAULTS = {
+    "cache_ttl_s": 6 * 3600,   # idade máxima de um snapshot em disco
+    "cache_max_mb": 2048,      # acima disso, os arquivos mais antigos saem primeiro
+}
+
+
+def disco_config(sec) -> dict:
+    """Extrai a configuração do cache em disco de um dict de secrets, com fallback nos padrões."""
+    sec = sec or {}
+    return {k: int(sec.get(k, v)) for k, v in DISCO_DEFAULTS.items()}
+
+
+def _json(v):
+    if isinstance(v, (datetime, date)):
+        return {"__data__": v.isoformat()}
+    return v.item() if hasattr(v, "item") else v
+
+
+def _de_json(d):
+    return datetime.fromisoformat(d["__data__"]) if isinstance(d, dict) and "__data__" in d else d
+
+
+class CacheDisco:
+    """Snapshots por chave em `pasta`, com TTL e limite total de bytes."""
+
+    def __init__(self, pasta=PASTA, cache_ttl_s: int = DISCO_DEFAULTS["cache_ttl_s"],
+                 cache_max_mb: int = DISCO_DEFAULTS["cache_max_mb"]):
+        self.pasta = Path(pasta)
+        self.ttl = cache_ttl_s
+        self.limite = cache_max_mb * 2**20
+        self._lock = threading.Lock()
+
+    def _arquivo(self, chave) -> Path:
+        h = hashlib.sha1(repr((FORMATO, chave)).encode("utf-8")).hexdigest()[:20]
+        return self.pasta / f"{h}.arrow"
+
+    @contextmanager
+    def trava(self, chave):
+        """Exclusão entre processos para a carga de uma chave (sem `fcntl`, só no processo)."""
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        try:
+            import fcntl
+        except ModuleNotFoundError:   # Windows
+            with self._lock:
+                yield
+            return
+        with open(self._arquivo(chave).with_suffix(".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def ler(self, chave):
+        """(dataset, colunas extras, metadados) do arquivo da chave, ou None se não existe/expirou."""
+        import pyarrow as pa
+
+        p = self._arquivo(chave)
+        try:
+            idade = time.time() - p.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if idade > self.ttl:
+            return None
+        with etapa("cache em disco (mmap)", bytes=p.stat().st_size) as e:
+            try:
+                tbl = pa.ipc.open_file(pa.memory_map(str(p), "r")).read_all()
+            except (OSError, pa.ArrowInvalid):
+                return None   # removido/trocado entre o stat e a abertura, ou truncado
+            meta = {k: _de_json(v) for k, v in json.loads(tbl.schema.metadata[b"estoque"]).items()}
+            extras = {c: tbl.column(c) for c in tbl.column_names if c.startswith("_")}
+            df = tbl.drop_columns(list(extras)).to_pandas()
+            e["linhas"] = len(df)
+        anotar(cache="disco")   # na etapa que pediu o dado: veio do disco, não do banco
+        return InsumosDataset(df), extras, meta
+
+    def gravar(self, chave, ds: InsumosDataset, extras: dict = None, meta: dict = None) -> Path:
+        """Grava (ou substitui atomicamente) o snapshot da chave e aplica TTL/limite."""
+        import pyarrow as pa
+
+        p = self._arquivo(chave)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        with etapa("cache em disco (gravação)", linhas=len(ds)):
+            tbl = pa.Table.from_pandas(ds.df, preserve_index=False)
+            for nome, col in (extras or {}).items():
+                tbl = tbl.append_column(nome, pa.array(col))
+            info = {"chave": repr(chave), **{k: _json(v) for k, v in (meta or {}).items()}}
+            tbl = tbl.replace_schema_metadata({"estoque": json.dumps(info, default=str)})
+            tmp = p.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with pa.OSFile(str(tmp), "wb") as f, pa.ipc.new_file(f, tbl.schema) as w:
+                    w.write_table(tbl)
+                os.replace(tmp, p)
+            finally:
+                tmp.unlink(missing_ok=True)
+        self.limpar()
+        return p
+
+    def obter(self, chave, carregar) -> InsumosDataset:
+        """Dataset da chave: do disco se houver, senão `carregar()` (um processo por vez) e grava."""
+        achado = self.ler(chave)
+        if achado is None:
+            with self.trava(chave):
+                achado = self.ler(chave)   # outro processo pode ter gravado enquanto esperávamos
+                if achado is None:
+                    ds = carregar()
+                    self.gravar(chave, ds)
+                    return ds
+        return achado[0]
+
+    def remover(self, chave=None) -> None:
+        """Remove o arquivo da chave (ou todos). Quem já mapeou o arquivo continua lendo."""
+        alvos = [self._arquivo(chave)] if chave is not None else self.pasta.glob("*.arrow")
+        for p in alvos:
+            p.unlink(missing_ok=True)
+
+    def entradas(self) -> list:
+        """Arquivos do cache, do mais novo para o mais antigo."""
+        out = []
+        for p in self.pasta.glob("*.arrow"):
+            try:
+                st_ = p.stat()
+            except FileNotFoundError:
+                continue
+            out.append({"arquivo": p, "bytes": st_.st_size, "idade_s": time.time() - st_.st_mtime})
+        return sorted(out, key=lambda e: e["idade_s"])
+
+    def limpar(self) -> None:
+        """TTL primeiro; depois, enquanto passar do limite, sai o arquivo mais antigo."""
+        total = 0
+        for e in self.entradas():
+            # O mais novo sempre fica, mesmo sozinho acima do limite (acabou de ser gravado)
+            if e["idade_s"] > self.ttl or (total and total + e["bytes"] > self.limite):
+                e["arquivo"].unlink(missing_ok=True)
+            else:
+                total += e["bytes"]
@@ -0,0 +1,642 @@
+# estoque/eventos.py
+# -*- coding: utf-8 -*-
+"""Ingestão das leituras das câmeras (QR/ML): log local + gravação em lotes no banco.
+
+Cada leitura vira um `Evento` (instante, SKU, local, ação, câmera e, quando a etiqueta
+traz, lote e validade). `Ingestor.registrar`
+acrescenta o evento a um log append-only em `.cache/eventos/` e devolve na hora
+(um log por processo: a aplicação e o `servir` nunca escrevem no mesmo arquivo);
+uma thread junta os eventos em lotes (até `lote_max` eventos ou `intervalo_ms` de
+espera) e grava cada lote com um `executemany` na tabela EVENTOS (Oracle ou SQLite
+local). O ponto do log já gravado no banco fica num checkpoint: depois de uma queda,
+o que ficou só no log é reenviado (a chave ID torna o reenvio idempotente).
+
+Vazão (eventos/s) e lag fim a fim (leitura na câmera -> commit no banco) ficam em
+`Ingestor.metricas()`. Endpoint HTTP para as câmeras e gerador de carga:
+
+    python -m estoque.eventos servir --porta 8765 --sqlite dados/eventos.db
+    python -m estoque.eventos carga --cameras 40 --eventos 20000 [--url http://127.0.0.1:8765]
+
+A carga sintética local vai para um banco e um log próprios (`ingestor_rajada`,
+`dados/rajada.db`): medir vazão não mexe no razão de saldos, alertas e previsão.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import streamlit as st
+
+from estoque.perf import _percentil
+
+PASTA = Path(__file__).resolve().parent.parent / ".cache" / "eventos"
+ACOES = ("BAIXA", "ENTRADA")
+LOCAL_PADRAO = "ALMOXARIFADO"
+LOG_MAX_MB = 64        # log todo gravado e acima disso: vira `.1` e recomeça
+VAGAS = 16             # processos com log próprio na mesma pasta (ver `LogEventos`)
+JANELA_S = 60          # janela da vazão (eventos/s)
+LAGS_MAX = 20_000      # lags guardados para os percentis
+
+# Padrões (sobrescritos pela seção [eventos] do secrets.toml)
+EVENTOS_DEFAULTS = {
+    "destino": "sqlite",               # sqlite | oracle (credenciais da seção [oracle])
+    "arquivo": "dados/eventos.db",
+    "lote_max": 500,                   # eventos por executemany
+    "intervalo_ms": 200,               # espera máxima de um evento antes do lote sair
+}
+RAJADA_ARQUIVO = "dados/rajada.db"     # destino das rajadas sintéticas (fora do razão)
+
+# Insumos com etiqueta QR (código -> descrição)
+CATALOGO = {
+    "INS-001": "Seringa 5ml",
+    "INS-002": "Swab estéril",
+    "INS-003": "Tubo EDTA 4ml",
+    "INS-004": "Agulha 25G",
+    "INS-005": "Luva nitrílica M",
+    "INS-006": "Gaze estéril",
+    "INS-007": "Álcool 70% 1L",
+    "INS-008": "Tubo soro gel 5ml",
+}
+
+_SKU = re.compile(r"^[A-Z0-9][A-Z0-9_.\-]{0,39}$")
+
+
+def eventos_config(sec) -> dict:
+    """Extrai a configuração da ingestão de um dict de secrets, com fallback nos padrões."""
+    sec = sec or {}
+    return {k: type(v)(sec.get(k, v)) for k, v in EVENTOS_DEFAULTS.items()}
+
+
+@dataclass(slots=True)
+class Evento:
+    """Uma leitura: `ts` é o instante na câmera (epoch s); `id` torna o reenvio idempotente."""
+    sku: str
+    acao: str
+    camera: str
+    quantidade: int = 1
+    local: str = LOCAL_PADRAO
+    lote: str = ""
+    validade: str = None        # ISO (AAAA-MM-DD), do lote
+    ts: float = field(default_factory=time.time)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    @classmethod
+    def de_dict(cls, d: dict) -> "Evento":
+        """Valida o que chega das câmeras (JSON); campo inválido -> ValueError."""
+        sku = str(d.get("sku", "")).strip().upper()
+        if not _SKU.match(sku):
+            raise ValueError(f"SKU inválido: {d.get('sku')!r}")
+        acao = str(d.get("acao", "BAIXA")).strip().upper()
+        if acao not in ACOES:
+            raise ValueError(f"Ação inválida: {d.get('acao')!r} (use {', '.join(ACOES)})")
+        qtd = int(d.get("quantidade", 1))
+        if qtd <= 0:
+            raise ValueError(f"Quantidade inválida: {qtd}")
+        camera = str(d.get("camera", "")).strip()[:40] or "?"
+        local = str(d.get("local", "")).strip().upper()[:40] or LOCAL_PADRAO
+        lote = str(d.get("lote") or "").strip().upper()[:40]
+        validade = _data(d.get("validade"))
+        ts = d.get("ts")
+        if isinstance(ts, str):
+            ts = datetime.fromisoformat(ts).timestamp()
+        extra = {"ts": float(ts)} if ts is not None else {}
+        if d.get("id"):
+            extra["id"] = str(d["id"])[:32]
+        return cls(sku, acao, camera, qtd, local, lote, validade, **extra)
+
+
+def _data(v) -> str:
+    """Validade (texto ISO, date/datetime ou vazio) -> "AAAA-MM-DD" ou None; inválida -> ValueError."""
+    if v in (None, ""):
+        return None
+    if isinstance(v, datetime):
+        v = v.date()
+    return (v if isinstance(v, date) else date.fromisoformat(str(v).strip()[:10])).isoformat()
+
+
+def ler_etiqueta(payload: str) -> dict:
+    """Conteúdo da etiqueta ("INS-002" ou "SKU=INS-002;LOTE=L07;VAL=2026-03-31") -> sku, lote, validade."""
+    campos = {k.strip().upper(): v for k, v in (p.split("=", 1) for p in payload.split(";") if "=" in p)}
+    sku = (campos.get("SKU") or payload).strip().upper()
+    if not _SKU.match(sku):
+        raise ValueError(f"Etiqueta não reconhecida: {payload!r}")
+    return {"sku": sku, "lote": campos.get("LOTE", "").strip().upper()[:40], "validade": _data(campos.get("VAL"))}
+
+
+def ler_qr(payload: str) -> str:
+    """Conteúdo da etiqueta -> SKU (ver `ler_etiqueta`)."""
+    return ler_etiqueta(payload)["sku"]
+
+
+# =========================
+# Log local (append-only) + checkpoint
+# =========================
+def _travar(f) -> bool:
+    """Trava exclusiva sem espera no arquivo aberto `f`; o sistema solta com o processo."""
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+class LogEventos:
+    """JSON lines em `eventos.jsonl`; `checkpoint` guarda até que byte já está no banco.
+
+    Cada log tem um só dono: o processo trava `pasta/trava` enquanto usa o log. Se
+    outro processo já tem a pasta (ex.: a aplicação e o `servir`), fica com a próxima
+    vaga livre (`pasta/2`, `pasta/3`...). A trava sai com o processo, então quem
+    partir depois de uma queda assume a vaga e reenvia o que ficou nela.
+    """
+
+    def __init__(self, pasta=PASTA, vagas: int = VAGAS):
+        base = Path(pasta)
+        for i in range(1, vagas + 1):
+            self.pasta = base if i == 1 else base / str(i)
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            self._trava = open(self.pasta / "trava", "a+b")
+            if _travar(self._trava):
+                break
+            self._trava.close()
+        else:
+            raise RuntimeError(f"As {vagas} vagas de log em {base} estão em uso por outros processos")
+        self.arquivo = self.pasta / "eventos.jsonl"
+        self._ckpt = self.pasta / "checkpoint"
+        self._lock = threading.Lock()
+        self._f = open(self.arquivo, "ab")
+        self.pos = self._f.seek(0, os.SEEK_END)
+        self._reparar()
+
+    def _reparar(self) -> None:
+        # Queda no meio de uma escrita deixa uma linha pela metade: descarta
+        if not self.pos:
+            return
+        with open(self.arquivo, "rb") as f:
+            f.seek(max(0, self.pos - 1))
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            fim = f.read().rfind(b"\n") + 1
+        self._f.truncate(fim)
+        self.pos = fim
+
+    def checkpoint(self) -> int:
+        try:
+            return int(self._ckpt.read_text() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def pendentes(self) -> list:
+        """(evento, byte final) de tudo o que está no log depois do checkpoint.
+
+        Linha que não é um evento (corrompida, ou cortada por um checkpoint de antes da
+        trava) é pulada. Checkpoint além do fim (log trocado) relê o log todo: o
+        reenvio é idempotente.
+        """
+        out, pos = [], self.checkpoint()
+        if pos > self.pos:
+            pos = 0
+        with open(self.arquivo, "rb") as f:
+            f.seek(pos)
+            for linha in f:
+                pos += len(linha)
+                try:
+                    out.append((Evento(**json.loads(linha)), pos))
+                except (ValueError, TypeError):
+                    continue
+        return out
+
+    def anexar(self, ev: Evento) -> int:
+        linha = (json.dumps(asdict(ev), ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            self._f.write(linha)
+            self.pos += len(linha)
+            return self.pos
+
+    def sincronizar(self) -> None:
+        """Leva ao disco o que foi anexado (um fsync por lote, não por evento)."""
+        with self._lock:
+            self._f.flush()
+            os.fsync(self._f.fileno())
+
+    def confirmar(self, pos: int) -> None:
+        """Tudo até `pos` está no banco; com o log todo gravado e grande, começa outro."""
+        tmp = self._ckpt.with_suffix(".tmp")
+        with self._lock:
+            if pos == self.pos and pos > LOG_MAX_MB * 2**20:
+                self._f.close()
+                os.replace(self.arquivo, self.arquivo.with_suffix(".jsonl.1"))
+                self._f = open(self.arquivo, "ab")
+                self.pos = pos = self._f.seek(0, os.SEEK_END)
+            tmp.write_text(str(pos))
+            os.replace(tmp, self._ckpt)
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._f.close()
+            self._trava.close()   # solta a vaga
+
+
+# =========================
+# Destinos (tabela EVENTOS)
+# =========================
+class DestinoSqlite:
+    """Tabela EVENTOS num SQLite local (WAL: as páginas leem enquanto a ingestão grava)."""
+
+    # Colunas que vieram depois da tabela original (ALTER numa tabela já existente)
+    COLUNAS = (f"LOCAL TEXT NOT NULL DEFAULT '{LOCAL_PADRAO}'", "LOTE TEXT NOT NULL DEFAULT ''", "VALIDADE TEXT")
+
+    def __init__(self, caminho):
+        self.caminho = str(caminho)
+        self.descricao = f"SQLite `{self.caminho}`"
+        Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # O rowid (ordem de inserção) é a posição do evento no razão (ver `estoque.saldos`)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS EVENTOS (ID TEXT PRIMARY KEY, TS REAL NOT NULL, SKU TEXT NOT NULL, "
+            "ACAO TEXT NOT NULL, QUANTIDADE INTEGER NOT NULL, CAMERA TEXT, GRAVADO_EM REAL NOT NULL, "
+            f"{', '.join(self.COLUNAS)})"
+        )
+        colunas = {r[1] for r in self._conn.execute("PRAGMA table_info(EVENTOS)")}
+        for c in self.COLUNAS:
+            if c.split()[0] not in colunas:   # tabela criada antes da coluna existir
+                self._conn.execute(f"ALTER TABLE EVENTOS ADD COLUMN {c}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS EVENTOS_SKU ON EVENTOS (SKU, TS)")
+
+    def gravar(self, eventos: list) -> None:
+        agora = time.time()
+        with self._conn:   # uma transação por lote
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO EVENTOS (ID, TS, SKU, ACAO, QUANTIDADE, CAMERA, GRAVADO_EM, LOCAL, LOTE, "
+                "VALIDADE) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(e.id, e.ts, e.sku, e.acao, e.quantidade, e.camera, agora, e.local, e.lote, e.validade)
+                 for e in eventos],
+            )
+
+    def ler_desde(self, posicao: int, limite: int) -> list:
+        """Até `limite` eventos do razão depois de `posicao`:
+        (posição, SKU, LOCAL, ACAO, QUANTIDADE, LOTE, VALIDADE)."""
+        conn = sqlite3.connect(f"file:{self.caminho}?mode=ro", uri=True)
+        try:
+            return conn.execute("SELECT rowid, SKU, LOCAL, ACAO, QUANTIDADE, LOTE, VALIDADE FROM EVENTOS "
+                                "WHERE rowid > ? ORDER BY rowid LIMIT ?", (posicao, limite)).fetchall()
+        finally:
+            conn.close()
+
+    def consumo_diario(self, desde: date) -> list:
+        """Baixas somadas por SKU e dia (data local) a partir de `desde`: (SKU, "AAAA-MM-DD", quantidade)."""
+        conn = sqlite3.connect(f"file:{self.caminho}?mode=ro", uri=True)
+        try:
+            return conn.execute("SELECT SKU, date(TS, 'unixepoch', 'localtime') AS DIA, SUM(QUANTIDADE) FROM EVENTOS "
+                                "WHERE ACAO = 'BAIXA' AND TS >= ? GROUP BY SKU, DIA",
+                                (datetime(desde.year, desde.month, desde.day).timestamp(),)).fetchall()
+        finally:
+            conn.close()
+
+
+class DestinoOracle:
+    """Tabela `{schema}.EVENTOS` no Oracle; criada na primeira vez se não existir.
+
+    SEQ (identity) é a posição no razão. Com um único `Ingestor` gravando, a ordem de
+    SEQ é a ordem de commit, e ler "depois de SEQ x" não pula eventos.
+    """
+
+    DDL = ("CREATE TABLE {tabela} (ID VARCHAR2(32) PRIMARY KEY, TS TIMESTAMP NOT NULL, SKU VARCHAR2(40) NOT NULL, "
+           "ACAO VARCHAR2(10) NOT NULL, QUANTIDADE NUMBER(9) NOT NULL, CAMERA VARCHAR2(40), "
+           "GRAVADO_EM TIMESTAMP DEFAULT SYSTIMESTAMP NOT NULL)")
+    # Colunas que vieram depois (ALTER numa tabela já existente; ORA-01430 = já tem)
+    COLUNAS = (f"LOCAL VARCHAR2(40) DEFAULT '{LOCAL_PADRAO}' NOT NULL", "SEQ NUMBER GENERATED ALWAYS AS IDENTITY",
+               "LOTE VARCHAR2(40)", "VALIDADE DATE")
+
+    def __init__(self, pool, schema: str):
+        import oracledb
+
+        from estoque.query import _ident   # pandas: só quando o destino é o Oracle
+
+        self.pool = pool
+        self.tabela = f"{_ident(schema)}.EVENTOS"
+        self.descricao = f"Oracle `{self.tabela}`"
+        ddl = [self.DDL.format(tabela=self.tabela)] + [f"ALTER TABLE {self.tabela} ADD ({c})" for c in self.COLUNAS]
+        with pool.acquire() as conn, conn.cursor() as cur:
+            for sql in ddl:
+                try:
+                    cur.execute(sql)
+                except oracledb.DatabaseError as e:
+                    if getattr(e.args[0], "code", None) not in (955, 1430):   # tabela/coluna já existe
+                        raise
+
+    def gravar(self, eventos: list) -> None:
+        sql = (f"INSERT INTO {self.tabela} (ID, TS, SKU, ACAO, QUANTIDADE, CAMERA, LOCAL, LOTE, VALIDADE) "
+               "VALUES (:1, :2, :3, :4, :5, :6, :7, :8, :9)")
+        rows = [(e.id, datetime.fromtimestamp(e.ts), e.sku, e.acao, e.quantidade, e.camera, e.local, e.lote or None,
+                 date.fromisoformat(e.validade) if e.validade else None) for e in eventos]
+        with self.pool.acquire() as conn, conn.cursor() as cur:
+            cur.executemany(sql, rows, batcherrors=True)
+            # ORA-00001 (ID repetido) é um evento reenviado do log depois de uma queda
+            erros = [e for e in cur.getbatcherrors() if e.code != 1]
+            if erros:
+                conn.rollback()
+                raise RuntimeError(f"{len(erros)} evento(s) recusado(s) pelo Oracle: {erros[0].message}")
+            conn.commit()
+
+    def ler_desde(self, posicao: int, limite: int) -> list:
+        with self.pool.acquire() as conn, conn.cursor() as cur:
+            # No Oracle '' é NULL: sem lote, LOTE volta None (`Saldos.aplicar` trata como "")
+            cur.execute(f"SELECT SEQ, SKU, LOCAL, ACAO, QUANTIDADE, LOTE, TO_CHAR(VALIDADE, 'YYYY-MM-DD') "
+                        f"FROM {self.tabela} WHERE SEQ > :p ORDER BY SEQ FETCH FIRST :n ROWS ONLY",
+                        {"p": posicao, "n": limite})
+            return cur.fetchall()
+
+    def consumo_diario(self, desde: date) -> list:
+        with self.pool.acquire() as conn, conn.cursor() as cur:
+            cur.execute(f"SELECT SKU, TO_CHAR(TRUNC(TS), 'YYYY-MM-DD'), SUM(QUANTIDADE) FROM {self.tabela} "
+                        "WHERE ACAO = 'BAIXA' AND TS >= :d GROUP BY SKU, TRUNC(TS)",
+                        {"d": datetime(desde.year, desde.month, desde.day)})
+            return cur.fetchall()
+
+
+# =========================
+# Ingestor
+# =========================
+class Ingestor:
+    """Recebe eventos de qualquer thread e os grava em micro-lotes numa thread própria."""
+
+    def __init__(self, destino, pasta=PASTA, lote_max: int = 500, intervalo_ms: int = 200):
+        self.destino = destino
+        self.lote_max = lote_max
+        self.intervalo = intervalo_ms / 1000
+        self.log = LogEventos(pasta)
+        self._cond = threading.Condition()
+        self._fila = deque()            # (evento, byte final no log, sequência)
+        self._seq = self._seq_gravado = 0
+        self._lotes = deque()           # (instante do commit, eventos) na janela da vazão
+        self._lags = deque(maxlen=LAGS_MAX)
+        self._parar = False
+        self.recebidos = self.gravados = self.reenviados = 0
+        self.ultimo_erro = None
+        self.ao_gravar = []             # fn(lote) depois de cada commit (ex.: `estoque.saldos`)
+        for ev, fim in self.log.pendentes():   # ficaram só no log da última execução
+            self._seq += 1
+            self._fila.append((ev, fim, self._seq))
+        self.reenviados = len(self._fila)
+        self._thread = threading.Thread(target=self._loop, name="estoque-ingestao", daemon=True)
+        self._thread.start()
+
+    def registrar(self, *eventos: Evento) -> int:
+        """Anexa os eventos ao log e os enfileira; devolve a sequência do último (ver `aguardar`)."""
+        with self._cond:
+            for ev in eventos:
+                self._seq += 1
+                self._fila.append((ev, self.log.anexar(ev), self._seq))
+            self.recebidos += len(eventos)
+            if len(self._fila) >= self.lote_max:
+                self._cond.notify_all()
+            return self._seq
+
+    def aguardar(self, seq: int, timeout: float = 10.0) -> bool:
+        """Espera o evento de sequência `seq` (e os anteriores) estar no banco."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._seq_gravado >= seq, timeout)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._parar or len(self._fila) >= self.lote_max, self.intervalo)
+                if self._parar and not self._fila:
+                    return
+                lote = [self._fila.popleft() for _ in range(min(len(self._fila), self.lote_max))]
+            if lote:
+                self._gravar(lote)
+
+    def _gravar(self, lote: list) -> None:
+        self.log.sincronizar()   # o log chega ao disco antes do banco: nada se perde entre os dois
+        try:
+            self.destino.gravar([ev for ev, _, _ in lote])
+        except Exception as e:
+            self.ultimo_erro = f"{type(e).__name__}: {e}"
+            with self._cond:
+                self._fila.extendleft(reversed(lote))   # volta para a frente da fila, na ordem
+            time.sleep(min(5.0, self.intervalo * 10))   # banco fora: tenta de novo sem martelar
+            return
+        agora = time.time()
+        self.log.confirmar(lote[-1][1])
+        erro = None
+        for fn in self.ao_gravar:   # antes de liberar `aguardar`: quem esperou já vê o efeito
+            try:
+                fn(lote)
+            except Exception as e:
+                erro = f"{type(e).__name__} em {getattr(fn, '__qualname__', fn)}: {e}"
+        with self._cond:
+            self.ultimo_erro = erro
+            self.gravados += len(lote)
+            self._seq_gravado = lote[-1][2]
+            self._lotes.append((agora, len(lote)))
+            while self._lotes and self._lotes[0][0] < agora - JANELA_S:
+                self._lotes.popleft()
+            self._lags.extend(agora - ev.ts for ev, _, _ in lote)
+            self._cond.notify_all()
+
+    def metricas(self) -> dict:
+        """Vazão na janela recente, lag fim a fim (ms) e tamanho da fila."""
+        with self._cond:
+            lotes, lags = list(self._lotes), list(self._lags)
+            out = {"recebidos": self.recebidos, "gravados": self.gravados, "pendentes": len(self._fila),
+                   "reenviados": self.reenviados, "erro": self.ultimo_erro, "destino": self.destino.descricao}
+        n = sum(q for _, q in lotes)
+        dur = (lotes[-1][0] - lotes[0][0]) if len(lotes) > 1 else 0.0
+        out["lotes"] = len(lotes)
+        out["lote_medio"] = n / len(lotes) if lotes else 0.0
+        out["eventos_s"] = (n - lotes[0][1]) / dur if dur > 0 else float(n)
+        for p in (0.5, 0.95, 0.99):
+            out[f"lag_p{int(p * 100)}_ms"] = _percentil(lags, p) * 1000 if lags else None
+        return out
+
+    def fechar(self, timeout: float = 10.0) -> None:
+        """Grava o que estiver na fila e para a thread."""
+        with self._cond:
+            self._parar = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self.log.fechar()
+
+
+def _config() -> dict:
+    try:
+        return eventos_config(st.secrets.get("eventos"))
+    except Exception:   # sem secrets.toml
+        return eventos_config(None)
+
+
+@st.cache_resource(show_spinner=False)
+def ingestor_padrao() -> Ingestor:
+    """Ingestor do processo, com destino/lotes da seção [eventos] do secrets.toml."""
+    cfg = _config()
+    if cfg["destino"] == "oracle":
+        from estoque.oracle import get_pool, make_dsn, pool_config
+
+        sec = st.secrets["oracle"]
+        sid = sec.get("service") if sec.get("use_sid") else None
+        dsn = make_dsn(sec.get("host"), sec.get("port", 1521), None if sid else sec.get("service"), sid)
+        pool = get_pool(dsn, sec.get("user"), sec.get("password", ""), **pool_config(sec))
+        destino = DestinoOracle(pool, sec.get("schema", sec.get("user")))
+    else:
+        destino = DestinoSqlite(cfg["arquivo"])
+    return Ingestor(destino, lote_max=cfg["lote_max"], intervalo_ms=cfg["intervalo_ms"])
+
+
+@st.cache_resource(show_spinner=False)
+def ingestor_rajada() -> Ingestor:
+    """Ingestor das rajadas sintéticas de `carga`: mesmos lotes, mas SQLite e log próprios,
+    para os eventos de teste não entrarem no razão (saldos, alertas e previsão)."""
+    cfg = _config()
+    return Ingestor(DestinoSqlite(RAJADA_ARQUIVO), PASTA / "rajada", cfg["lote_max"], cfg["intervalo_ms"])
+
+
+# =========================
+# Endpoint HTTP e carga
+# =========================
+def servir(ingestor: Ingestor, host: str = "127.0.0.1", porta: int = 8765):
+    """POST /eventos (um objeto JSON ou uma lista) -> 202; GET /metricas -> JSON."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def _json(self, status: int, corpo) -> None:
+            dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_POST(self):
+            if self.path != "/eventos":
+                return self._json(404, {"erro": "use POST /eventos"})
+            try:
+                corpo = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+                eventos = [Evento.de_dict(d) for d in (corpo if isinstance(corpo, list) else [corpo])]
+            except (ValueError, TypeError, AttributeError) as e:
+                return self._json(400, {"erro": str(e)})
+            self._json(202, {"aceitos": len(eventos), "seq": ingestor.registrar(*eventos)})
+
+        def do_GET(self):
+            if self.path != "/metricas":
+                return self._json(404, {"erro": "use GET /metricas"})
+            self._json(200, ingestor.metricas())
+
+        def log_message(self, *args):   # uma linha por requisição atrapalha a medição
+            pass
+
+    class Servidor(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 256   # muitas câmeras conectando ao mesmo tempo (padrão: 5)
+
+    return Servidor((host, porta), Handler)
+
+
+def carga(registrar, cameras: int = 40, eventos: int = 10_000, skus=tuple(CATALOGO)) -> float:
+    """Dispara `eventos` leituras divididas entre `cameras` threads; devolve os segundos gastos."""
+    import random
+
+    hoje = date.today()
+
+    def camera(i: int, n: int):
+        rnd = random.Random(i)
+        local = f"SALA-{i % 5 + 1}"   # cinco salas de coleta, várias câmeras em cada
+        for _ in range(n):
+            sku = rnd.choice(skus)
+            if rnd.random() < 0.8:
+                ev = Evento(sku, "BAIXA", f"CAM-{i:03d}", local=local)
+            else:
+                # Recebimento de uma caixa: lote com validade fixa (alguns já vencidos, outros para meses)
+                k = rnd.randrange(20)
+                ev = Evento(sku, "ENTRADA", f"CAM-{i:03d}", 5, local, f"L{k:02d}",
+                            (hoje + timedelta(days=15 * k - 30)).isoformat())
+            registrar(ev)
+
+    por_camera = [eventos // cameras + (i < eventos % cameras) for i in range(cameras)]
+    threads = [threading.Thread(target=camera, args=(i, n)) for i, n in enumerate(por_camera)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0
+
+
+def _postar(url: str):
+    import urllib.request
+
+    def registrar(ev: Evento):
+        req = urllib.request.Request(f"{url.rstrip('/')}/eventos", json.dumps(asdict(ev)).encode("utf-8"),
+                                     {"Content-Type": "application/json"})
+        urllib.request.urlopen(req, timeout=10).read()
+    return registrar
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for nome, arquivo, pasta in (("servir", EVENTOS_DEFAULTS["arquivo"], PASTA),
+                                 ("carga", RAJADA_ARQUIVO, PASTA / "rajada")):
+        p = sub.add_parser(nome)
+        p.add_argument("--sqlite", default=arquivo)
+        p.add_argument("--pasta", default=str(pasta), help="log local e checkpoint")
+        p.add_argument("--lote-max", type=int, default=EVENTOS_DEFAULTS["lote_max"])
+        p.add_argument("--intervalo-ms", type=int, default=EVENTOS_DEFAULTS["intervalo_ms"])
+    sub.choices["servir"].add_argument("--host", default="127.0.0.1")
+    sub.choices["servir"].add_argument("--porta", type=int, default=8765)
+    sub.choices["carga"].add_argument("--cameras", type=int, default=40)
+    sub.choices["carga"].add_argument("--eventos", type=int, default=20_000)
+    sub.choices["carga"].add_argument("--url", help="endpoint de `servir` (sem isso, ingestão no próprio processo)")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "carga" and args.url:
+        s = carga(_postar(args.url), args.cameras, args.eventos)
+        print(f"{args.eventos} eventos de {args.cameras} câmeras em {s:.2f} s ({args.eventos / s:,.0f} eventos/s)")
+        return
+    ing = Ingestor(DestinoSqlite(args.sqlite), args.pasta, args.lote_max, args.intervalo_ms)
+    if args.cmd == "servir":
+        servidor = servir(ing, args.host, args.porta)
+        print(f"Recebendo eventos em http://{args.host}:{args.porta}/eventos (Ctrl+C para sair)")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+            ing.fechar()
+        return
+    s = carga(lambda ev: ing.registrar(ev), args.cameras, args.eventos)
+    t0 = time.perf_counter()
+    ing.aguardar(ing.registrar(), timeout=60)
+    total = s + time.perf_counter() - t0
+    m = ing.metricas()
+    ing.fechar()
+    print(f"{args.eventos} eventos de {args.cameras} câmeras: recebidos em {s:.2f} s, no banco em {total:.2f} s "
+          f"({args.eventos / total:,.0f} eventos/s; {args.eventos / total * 60:,.0f}/min)")
+    print(f"lotes: {m['lotes']} (média {m['lote_medio']:.0f} eventos); lag p50 {m['lag_p50_ms']:.0f} ms, "
+          f"p95 {m['lag_p95_ms']:.0f} ms, p99 {m['lag_p99_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# estoque/export.py
+# -*- coding: utf-8 -*-
+"""Exportação dos dados filtrados sob demanda, lote a lote (CSV, CSV gzip, Parquet)."""
+
+import gzip
+import io
+
+# Rótulo da UI -> (extensão, MIME)
+FORMATOS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV compactado (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+LOTE_EXPORT = 100_000   # linhas convertidas por vez (limita o pico de memória)
+GZIP_NIVEL = 3          # compressão rápida: o CSV de INSUMOS é muito repetitivo
+
+
+def _csv(lotes, out) -> None:
+    # Cada lote vira texto e já vai para o buffer de saída: nunca existe a string da tabela inteira
+    for i, lote in enumerate(lotes):
+        out.write(lote.to_csv(index=False, header=(i == 0)).encode("utf-8"))
+
+
+def _parquet(lotes, out) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for lote in lotes:
+            tbl = pa.Table.from_pandas(lote, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out, tbl.schema, compression="zstd")
+            writer.write_table(tbl.cast(writer.schema))  # um row group por lote
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def exportar(lotes, formato: str = "CSV") -> bytes:
+    """Serializa os lotes (iterável de DataFrames) no formato pedido.
+
+    Pensado para o `data=` callable do `st.download_button`: só roda no clique, em
+    outra thread, e consome os lotes um a um (do snapshot ou de um cursor do banco).
+    """
+    buf = io.BytesIO()
+    if formato == "Parquet":
+        _parquet(lotes, buf)
+    elif formato == "CSV compactado (gzip)":
+        with gzip.GzipFile(fileobj=buf, mode="wb", compresslevel=GZIP_NIVEL, mtime=0) as gz:
+            _csv(lotes, gz)
+    else:
+        _csv(lotes, buf)
+    return buf.getvalue()
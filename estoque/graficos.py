@@ -0,0 +1,89 @@
+# estoque/graficos.py
+# -*- coding: utf-8 -*-
+"""Figuras Plotly das páginas, cronometradas por etapa (também usadas pelo benchmark em `estoque.bench`)."""
+
+import functools
+
+import streamlit as st
+
+from estoque import perf
+from estoque.startup import lazy
+
+px = lazy("plotly.express")
+pio = lazy("plotly.io")
+
+TIPOS = ("Barra", "Pizza", "Treemap")
+_MARGEM = dict(l=10, r=10, t=40, b=10)
+
+
+def _figura(fn):
+    """Cronometra a construção da figura (etapa separada da serialização em `mostrar`)."""
+    @functools.wraps(fn)
+    def medida(*args, **kwargs):
+        with perf.etapa(f"Plotly (figura {fn.__name__})"):
+            return fn(*args, **kwargs)
+    return medida
+
+
+@_figura
+def top(df):
+    fig = px.bar(df, x="INSUMO", y="QUANTIDADE", text="QUANTIDADE", title="Top insumos")
+    fig.update_traces(textposition="outside")
+    fig.update_layout(margin=_MARGEM, height=380)
+    return fig
+
+
+@_figura
+def agregacao(df, eixo: str, metrica: str, tipo: str = "Barra"):
+    if tipo == "Barra":
+        fig = px.bar(df, x=eixo, y=metrica, title=f"{metrica} de QUANTIDADE por {eixo}")
+    elif tipo == "Pizza":
+        fig = px.pie(df, names=eixo, values=metrica, title=f"{metrica} por {eixo}")
+    else:
+        fig = px.treemap(df, path=[eixo], values=metrica, title=f"{metrica} por {eixo}")
+    fig.update_layout(margin=_MARGEM, height=420)
+    return fig
+
+
+@_figura
+def comparacao(pivot):
+    fig = px.bar(pivot, x="INSUMO", y="QUANTIDADE", color="EXAME", barmode="stack",
+                 title="Quantidade por Insumo (exames selecionados)")
+    fig.update_layout(margin=_MARGEM, height=420)
+    return fig
+
+
+@_figura
+def cenarios(bandas):
+    """Mediana por cenário com a faixa p5–p95 (barra de erro) das simulações."""
+    df = bandas.reset_index()
+    fig = px.bar(df, x="Cenário", y="p50", text="p50", title="Erros/mês: mediana e faixa p5–p95",
+                 error_y=df["p95"] - df["p50"], error_y_minus=df["p50"] - df["p5"],
+                 hover_data={"p5": ":.0f", "p25": ":.0f", "p75": ":.0f", "p95": ":.0f"},
+                 labels={"p50": "Erros/mês (mediana)"})
+    fig.update_traces(texttemplate="%{y:.0f}", textposition="inside")
+    fig.update_layout(margin=_MARGEM, height=380)
+    return fig
+
+
+@_figura
+def sensibilidade(sens):
+    """Tornado: quanto os erros projetados mudam do decil de baixo ao de cima de cada parâmetro."""
+    df = sens.iloc[::-1]
+    fig = px.bar(df, x="efeito", y="parâmetro", orientation="h", hover_data={"spearman": ":.2f"},
+                 labels={"efeito": "Δ erros/mês (decil 10% → 90%)", "parâmetro": ""},
+                 title="Sensibilidade dos erros projetados (QR + ML)")
+    fig.update_layout(margin=_MARGEM, height=320)
+    return fig
+
+
+def mostrar(fig) -> None:
+    """`st.plotly_chart` cronometrado (a serialização da figura acontece aqui).
+
+    O tamanho do JSON enviado ao navegador só é calculado com o diagnóstico ligado:
+    serializar de novo custa quase o mesmo que desenhar.
+    """
+    with perf.etapa("Plotly (serialização)") as e:
+        st.plotly_chart(fig, use_container_width=True)
+    if perf.diagnostico():
+        e["bytes"] = len(pio.to_json(fig, validate=False))
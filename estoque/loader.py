@@ -0,0 +1,81 @@
+# estoque/loader.py
+# -*- coding: utf-8 -*-
+"""Carga em lote da tabela INSUMOS direto para buffers Arrow (sem `pd.read_sql`)."""
+
+import pandas as pd
+
+from estoque.perf import etapa
+
+FETCH_BATCH = 50_000     # linhas por round-trip / lote Arrow
+TEXTO = ("INSUMO", "EXAME")
+
+
+def arrow_to_pandas(tbl) -> pd.DataFrame:
+    """Arrow -> pandas mantendo texto em `string[pyarrow]` (sem objetos Python por célula)."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    with etapa("normalização", linhas=tbl.num_rows, bytes=tbl.nbytes):
+        cols, nomes = [], []
+        for nome, col in zip(tbl.column_names, tbl.columns):
+            nome = str(nome).upper().strip()
+            if nome in TEXTO:
+                col = pc.fill_null(col.cast(pa.large_string()), "")
+            elif nome == "QUANTIDADE":
+                col = pc.fill_null(col.cast(pa.int64()), 0)
+            cols.append(col)
+            nomes.append(nome)
+        tbl = pa.table(cols, names=nomes)
+        mapper = {pa.large_string(): pd.StringDtype("pyarrow"), pa.string(): pd.StringDtype("pyarrow")}
+        return tbl.to_pandas(types_mapper=mapper.get, self_destruct=True)
+
+
+def fetch_arrow(conn, sql: str, binds=None, batch: int = FETCH_BATCH):
+    """Executa o SELECT em lotes grandes e concatena os lotes Arrow (um só buffer por coluna)."""
+    import pyarrow as pa
+
+    with etapa("fetch Arrow") as e:
+        lotes = [pa.table(odf) for odf in conn.fetch_df_batches(sql, parameters=binds or {}, size=batch)]
+        e["linhas"] = sum(t.num_rows for t in lotes)
+    if not lotes:
+        # Sem linhas: a estrutura vem do próprio cursor
+        with conn.cursor() as cur:
+            cur.execute(sql, binds or {})
+            return pa.table({d[0]: pa.array([], pa.string()) for d in cur.description})
+    return pa.concat_tables(lotes).combine_chunks()
+
+
+def iter_lotes(conn, sql: str, binds=None, batch: int = FETCH_BATCH):
+    """Mesmo SELECT entregue lote a lote (exportação): só um lote em memória por vez."""
+    if hasattr(conn, "fetch_df_batches"):
+        import pyarrow as pa
+
+        for odf in conn.fetch_df_batches(sql, parameters=binds or {}, size=batch):
+            yield arrow_to_pandas(pa.table(odf))
+    else:
+        yield from _fetch_cursor(conn, sql, binds, batch)
+
+
+def _fetch_cursor(conn, sql: str, binds=None, batch: int = FETCH_BATCH):
+    """Fallback para oracledb sem DataFrame fetch: um DataFrame por `fetchmany` (arraysize/prefetch ajustados)."""
+    with conn.cursor() as cur:
+        cur.arraysize = batch
+        cur.prefetchrows = batch + 1
+        with etapa("fetch cursor"):
+            cur.execute(sql, binds or {})
+        cols = [d[0] for d in cur.description]
+        while rows := cur.fetchmany():
+            yield normalizar(pd.DataFrame(rows, columns=cols))
+
+
+def normalizar(df: pd.DataFrame) -> pd.DataFrame:
+    """Mesmos tipos de `arrow_to_pandas` para linhas vindas de um cursor DB-API."""
+    with etapa("normalização", linhas=len(df)):
+        df.columns = [str(c).upper().strip() for c in df.columns]
+        for c in TEXTO:
+            if c in df:
+                df[c] = df[c].astype("string[pyarrow]").fillna("")
+        if "QUANTIDADE" in df:
+            df["QUANTIDADE"] = df["QUANTIDADE"].fillna(0).astype("int64")
+        return df
+
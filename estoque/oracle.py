@@ -0,0 +1,160 @@
+# estoque/oracle.py
+# -*- coding: utf-8 -*-
+"""Conexão ao Oracle via pool de sessões compartilhado pelo processo."""
+
+import asyncio
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+from estoque.perf import etapa
+
+# Valores padrão do pool (sobrescritos pela seção [oracle] do secrets.toml)
+POOL_DEFAULTS = {
+    "pool_min": 1,          # sessões abertas na criação
+    "pool_max": 8,          # teto de sessões simultâneas
+    "pool_increment": 1,    # quantas sessões abrir quando faltar
+    "ping_interval": 60,    # s ociosos antes de testar a sessão no acquire (-1 desliga)
+    "stmtcachesize": 40,    # statements preparados mantidos por sessão
+    "wait_timeout": 10000,  # ms esperando sessão livre antes de falhar
+}
+
+
+def make_dsn(host, port, service=None, sid=None) -> str:
+    """Monta o DSN no formato Service Name (padrão) ou SID."""
+    import oracledb
+    if sid:
+        return oracledb.makedsn(host, int(port), sid=sid)
+    return f"{host}:{int(port)}/{service}"
+
+
+def pool_config(sec) -> dict:
+    """Extrai a configuração do pool de um dict de secrets, com fallback nos padrões."""
+    sec = sec or {}
+    return {k: int(sec.get(k, v)) for k, v in POOL_DEFAULTS.items()}
+
+
+class OraclePool:
+    """Pool `oracledb` + métricas de espera/uso de cada acquire.
+
+    `criar_async`, se dado, abre o pool assíncrono equivalente (API asyncio, só no
+    modo thin) usado por `query_df_async`; ele nasce no event loop de quem consulta.
+    """
+
+    def __init__(self, pool, dsn: str, user: str, criar_async=None):
+        self.pool = pool
+        self.dsn = dsn
+        self.user = user
+        self._criar_async = criar_async
+        self._async = None     # (event loop, pool assíncrono)
+        self._lock = threading.Lock()
+        self._acquires = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._hold_total = 0.0
+
+    @contextmanager
+    def acquire(self):
+        """Empresta uma sessão do pool e a devolve ao final (mesmo com erro)."""
+        t0 = time.perf_counter()
+        with etapa("conexão (acquire)"):
+            conn = self.pool.acquire()
+        t1 = time.perf_counter()
+        try:
+            yield conn
+        finally:
+            self.pool.release(conn)
+            self._contabilizar(t0, t1, time.perf_counter())
+
+    def _contabilizar(self, t0: float, t1: float, t2: float) -> None:
+        with self._lock:
+            self._acquires += 1
+            self._wait_total += t1 - t0
+            self._wait_max = max(self._wait_max, t1 - t0)
+            self._hold_total += t2 - t1
+
+    def query_df(self, sql: str, binds=None):
+        """Executa um SELECT parametrizado e devolve um DataFrame (para resultados pequenos)."""
+        import pandas as pd
+        with self.acquire() as conn, conn.cursor() as cur, etapa("execução + fetch") as e:
+            cur.execute(sql, binds or {})
+            cols = [d[0] for d in cur.description]
+            df = pd.DataFrame(cur.fetchall(), columns=cols)
+            e["linhas"] = len(df)
+            return df
+
+    @property
+    def assincrono(self) -> bool:
+        import oracledb
+        return self._criar_async is not None and oracledb.is_thin_mode()
+
+    async def query_df_async(self, sql: str, binds=None):
+        """`query_df` pela API asyncio: a espera pelo banco não prende uma thread."""
+        import pandas as pd
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._async is None or self._async[0] is not loop:
+                self._async = (loop, self._criar_async())
+            pool = self._async[1]
+        t0 = time.perf_counter()
+        async with pool.acquire() as conn:
+            t1 = time.perf_counter()
+            cur = conn.cursor()
+            try:
+                await cur.execute(sql, binds or {})
+                cols = [d[0] for d in cur.description]
+                rows = await cur.fetchall()
+            except asyncio.CancelledError:
+                conn.cancel()   # interrompe a chamada no servidor antes de a sessão voltar ao pool
+                raise
+        self._contabilizar(t0, t1, time.perf_counter())
+        return pd.DataFrame(rows, columns=cols)
+
+    def stats(self) -> dict:
+        """Ocupação atual do pool e tempos médios/máximos de espera e uso (ms)."""
+        with self._lock:
+            n = self._acquires
+            return {
+                "abertas": self.pool.opened,
+                "ocupadas": self.pool.busy,
+                "max": self.pool.max,
+                "acquires": n,
+                "espera_media_ms": (self._wait_total / n * 1000) if n else 0.0,
+                "espera_max_ms": self._wait_max * 1000,
+                "uso_medio_ms": (self._hold_total / n * 1000) if n else 0.0,
+            }
+
+
+def get_pool(dsn: str, user: str, password: str, **cfg) -> OraclePool:
+    """Um pool por (DSN, usuário, senha, config) no processo (`cfg`: ver `POOL_DEFAULTS`).
+
+    A chave do cache leva só um hash da senha: corrigir uma senha errada abre um pool
+    novo, em vez de reaproveitar o que falha com ORA-01017 até o processo reiniciar.
+    """
+    digest = hashlib.sha256((password or "").encode("utf-8")).hexdigest()
+    return _abrir_pool(dsn, user, digest, password, **cfg)
+
+
+@st.cache_resource(show_spinner="Abrindo pool de conexões…")
+def _abrir_pool(dsn: str, user: str, senha_hash: str, _password: str, pool_min: int = 1, pool_max: int = 8,
+                pool_increment: int = 1, ping_interval: int = 60, stmtcachesize: int = 40,
+                wait_timeout: int = 10000) -> OraclePool:
+    import oracledb
+    params = dict(
+        user=user,
+        password=_password,
+        dsn=dsn,
+        min=pool_min,
+        max=pool_max,
+        increment=pool_increment,
+        ping_interval=ping_interval,
+        stmtcachesize=stmtcachesize,
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        wait_timeout=wait_timeout,
+    )
+    pool = oracledb.create_pool(**params)
+    # Pool assíncrono (consultas em paralelo da página) só é aberto no primeiro uso
+    return OraclePool(pool, dsn, user, criar_async=lambda: oracledb.create_pool_async(**params))
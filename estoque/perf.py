@@ -0,0 +1,206 @@
+# estoque/perf.py
+# -*- coding: utf-8 -*-
+"""Latência por interação e rastro por etapa de cada rerun (completo ou de um fragmento).
+
+Cada rerun vira uma *execução*: página, tipo (página/fragmento), duração total e a
+lista de etapas cronometradas dentro dela (conexão, fetch, normalização, filtro,
+agregação, serialização dos gráficos…), com atributos como `cache` (hit/miss),
+`linhas` e `bytes`. As execuções ficam no histórico da sessão (painel de
+diagnóstico com `?perf=1`) e num buffer do processo que pode ser baixado em JSON
+lines; com a variável de ambiente `ESTOQUE_TRACE=<arquivo>` cada execução também é
+acrescentada a esse arquivo. Percentis de vários arquivos:
+
+    python -m estoque.perf rastro1.jsonl rastro2.jsonl
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+HISTORICO = 30     # medições/execuções guardadas por sessão
+RASTRO_MAX = 2000  # execuções guardadas no processo (todas as sessões)
+ARQUIVO = os.environ.get("ESTOQUE_TRACE")
+
+_local = threading.local()
+_lock = threading.Lock()
+_rastro = deque(maxlen=RASTRO_MAX)
+_caches = {}       # nome -> {"hit": n, "miss": n, "disco": n}
+
+
+def registrar(secao: str, ms: float) -> None:
+    """Acrescenta uma medição ao histórico da sessão (mais antigas saem primeiro)."""
+    hist = st.session_state.setdefault("latencias", deque(maxlen=HISTORICO))
+    hist.append({"hora": time.strftime("%H:%M:%S"), "secao": secao, "ms": round(ms, 1)})
+
+
+def latencias() -> list:
+    """Histórico da sessão, da medição mais recente para a mais antiga."""
+    return list(reversed(st.session_state.get("latencias", ())))
+
+
+# ---- execuções e etapas ----
+def iniciar(pagina: str, tipo: str = "pagina") -> None:
+    """Abre a execução desta thread (o script de um rerun roda numa thread só)."""
+    st.session_state["_pagina"] = pagina
+    _local.execucao = {
+        "id": uuid.uuid4().hex[:12],
+        "sessao": st.session_state.setdefault("_sessao", uuid.uuid4().hex[:8]),
+        "pagina": pagina,
+        "tipo": tipo,
+        "inicio": time.time(),
+        "etapas": [],
+        "_t0": time.perf_counter(),
+        "_pilha": [],
+    }
+
+
+def fechar() -> dict | None:
+    """Fecha a execução aberta e a publica (sessão, buffer do processo e arquivo)."""
+    ex = getattr(_local, "execucao", None)
+    if ex is None:
+        return None
+    _local.execucao = None
+    ex["ms"] = round((time.perf_counter() - ex.pop("_t0")) * 1000, 1)
+    ex.pop("_pilha")
+    st.session_state.setdefault("rastro", deque(maxlen=HISTORICO)).append(ex)
+    with _lock:
+        _rastro.append(ex)
+        for e in ex["etapas"]:
+            if "cache" in e:
+                c = _caches.setdefault(e["etapa"], {"hit": 0, "miss": 0})
+                c[e["cache"]] = c.get(e["cache"], 0) + 1
+        if ARQUIVO:
+            with open(ARQUIVO, "a", encoding="utf-8") as f:
+                f.write(json.dumps(ex, ensure_ascii=False, default=str) + "\n")
+    return ex
+
+
+@contextmanager
+def etapa(nome: str, **attrs):
+    """Cronometra um trecho dentro da execução atual; fora de uma (threads de download,
+    benchmark) só mede. Atributos extras podem ser postos no dict devolvido."""
+    ex = getattr(_local, "execucao", None)
+    e = {"etapa": nome, **attrs}
+    t0 = time.perf_counter()
+    if ex is not None:
+        e["nivel"] = len(ex["_pilha"])
+        e["inicio_ms"] = round((t0 - ex["_t0"]) * 1000, 1)
+        ex["_pilha"].append(e)
+        ex["etapas"].append(e)
+    try:
+        yield e
+    finally:
+        e["ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        if ex is not None:
+            ex["_pilha"].pop()
+
+
+def anotar(**attrs) -> None:
+    """Acrescenta atributos à etapa mais interna aberta (ex.: `cache="miss"` de dentro
+    da função cacheada, que só roda quando o resultado não estava no cache)."""
+    ex = getattr(_local, "execucao", None)
+    if ex is not None and ex["_pilha"]:
+        ex["_pilha"][-1].update(attrs)
+
+
+def tamanho(obj) -> int:
+    """Bytes aproximados de um resultado (DataFrame, bytes/str ou `len`)."""
+    if hasattr(obj, "memory_usage"):
+        return int(obj.memory_usage(index=False, deep=True).sum())
+    if isinstance(obj, (bytes, str)):
+        return len(obj)
+    return 0
+
+
+def diagnostico() -> bool:
+    """Painel de diagnóstico ligado (`?perf=1` na URL): habilita medidas que custam algo."""
+    return st.query_params.get("perf") == "1"
+
+
+@contextmanager
+def medir(secao: str):
+    """Cronometra uma seção; ao sair, `t["ms"]` tem a duração e a medição vai para o histórico.
+
+    Num rerun de fragmento não há execução de página aberta: a seção vira uma execução
+    própria do tipo "fragmento".
+    """
+    avulsa = getattr(_local, "execucao", None) is None
+    if avulsa:
+        iniciar(st.session_state.get("_pagina", "?"), tipo="fragmento")
+    t = {"secao": secao, "ms": None}
+    try:
+        with etapa(secao) as e:
+            yield t
+    finally:
+        t["ms"] = e["ms"]
+        registrar(secao, t["ms"])
+        if avulsa:
+            fechar()
+
+
+# ---- leitura do rastro ----
+def rastro_sessao() -> list:
+    """Execuções desta sessão, da mais recente para a mais antiga."""
+    return list(reversed(st.session_state.get("rastro", ())))
+
+
+def caches() -> dict:
+    with _lock:
+        return {k: dict(v) for k, v in _caches.items()}
+
+
+def rastro_jsonl() -> bytes:
+    """Buffer do processo (todas as sessões) em JSON lines, para download."""
+    with _lock:
+        execs = list(_rastro)
+    return "".join(json.dumps(ex, ensure_ascii=False, default=str) + "\n" for ex in execs).encode("utf-8")
+
+
+def _percentil(valores: list, p: float) -> float:
+    v = sorted(valores)
+    k = (len(v) - 1) * p
+    i = int(k)
+    return v[i] + (v[min(i + 1, len(v) - 1)] - v[i]) * (k - i)
+
+
+def percentis(execucoes=None) -> list:
+    """p50/p95/p99 por (página, etapa); a etapa "(total)" é a execução inteira."""
+    if execucoes is None:
+        with _lock:
+            execucoes = list(_rastro)
+    grupos = {}
+    for ex in execucoes:
+        grupos.setdefault((ex["pagina"], f"(total {ex['tipo']})"), []).append(ex["ms"])
+        for e in ex["etapas"]:
+            grupos.setdefault((ex["pagina"], e["etapa"]), []).append(e["ms"])
+    return [
+        {"pagina": pg, "etapa": et, "n": len(v), "p50_ms": round(_percentil(v, 0.5), 1),
+         "p95_ms": round(_percentil(v, 0.95), 1), "p99_ms": round(_percentil(v, 0.99), 1)}
+        for (pg, et), v in sorted(grupos.items())
+    ]
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Percentis de latência por etapa a partir de rastros JSONL.")
+    ap.add_argument("arquivos", nargs="+")
+    args = ap.parse_args(argv)
+    execucoes = []
+    for caminho in args.arquivos:
+        with open(caminho, encoding="utf-8") as f:
+            execucoes += [json.loads(linha) for linha in f if linha.strip()]
+    print(f"{'página':<24} {'etapa':<36} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for r in percentis(execucoes):
+        print(f"{r['pagina']:<24} {r['etapa']:<36} {r['n']:>6} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+              f"{r['p99_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# estoque/previsao.py
+# -*- coding: utf-8 -*-
+"""Previsão de ruptura para todos os SKUs de uma vez (fase 4 do roadmap).
+
+O histórico é uma matriz de consumo diário (SKU × dia). Os modelos andam no tempo e
+são vetorizados nos SKUs: cada passo é uma operação NumPy sobre todos os SKUs, sem
+laço Python por SKU.
+
+- Demanda regular: suavização exponencial simples (SES), com o alfa de cada SKU
+  escolhido numa grade pelo menor erro de um passo (todos os alfas de uma vez).
+- Demanda intermitente (intervalo médio entre consumos > 1,32 dia): Croston com a
+  correção de Syntetos-Boylan (SBA), que estima tamanho e intervalo separadamente.
+
+Com a taxa diária e a dispersão de cada SKU saem os dias até a ruptura (saldo ÷
+taxa), o ponto de pedido (consumo no lead time + estoque de segurança) e a sugestão
+de compra. O ajuste anda em blocos de SKUs do tamanho do cache (com 200 mil SKUs
+de uma vez, cada passo varre megabytes e fica duas vezes mais lento), e catálogos
+grandes dividem os blocos num pool de processos.
+
+    python -m estoque.previsao --skus 200000 --dias 180    # SKUs/s: vetorizado, pool e laço por SKU
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+ALFAS = (0.05, 0.1, 0.2, 0.3, 0.5)   # grade do SES
+ALFA_CROSTON = 0.1
+ADI_CORTE = 1.32                      # intervalo médio entre consumos acima disso: intermitente
+BLOCO = 25_000                        # SKUs por tarefa do pool
+BLOCO_CACHE = 8192                    # SKUs por passo vetorizado: o estado de um passo cabe no cache
+MODELOS = np.array(["sem consumo", "SES", "Croston (SBA)"], dtype=object)
+
+# Padrões da política de reposição
+PREVISAO_DEFAULTS = {
+    "lead_time_dias": 7,      # do pedido à chegada
+    "cobertura_dias": 14,     # quanto cada pedido deve cobrir além do lead time
+    "nivel_servico": 0.95,    # probabilidade de não romper durante o lead time
+}
+
+
+def ajustar(y: np.ndarray, alfas=ALFAS, alfa_croston: float = ALFA_CROSTON) -> dict:
+    """Ajusta os modelos para todas as linhas de `y` (SKU × dia, consumo >= 0).
+
+    Devolve arrays por SKU: `taxa` (consumo/dia previsto), `sigma` (desvio do erro
+    diário), `modelo` (índice em MODELOS), `alfa` e `adi`.
+    """
+    y = np.asarray(y, dtype="float64")
+    n, t = y.shape
+    yt = np.ascontiguousarray(y.T)   # um dia = uma linha contígua com todos os SKUs
+    nz = yt > 0
+    n_dem = nz.sum(axis=0)
+    adi = t / np.maximum(n_dem, 1)
+
+    # SES com todos os alfas ao mesmo tempo: nível (A × N) e soma dos erros de um passo
+    a = np.asarray(alfas, dtype="float64")[:, None]
+    nivel = np.repeat(yt[:1], len(alfas), axis=0)
+    sse = np.zeros((len(alfas), n))
+    for j in range(1, t):
+        erro = yt[j] - nivel
+        sse += erro * erro
+        nivel += a * erro
+    melhor = sse.argmin(axis=0)
+    idx = np.arange(n)
+    taxa_ses = nivel[melhor, idx]
+    sigma_ses = np.sqrt(sse[melhor, idx] / max(t - 1, 1))
+
+    # Croston (SBA): tamanho z e intervalo p suavizados só nos dias com consumo
+    z = np.where(n_dem > 0, y.sum(axis=1) / np.maximum(n_dem, 1), 0.0)
+    p = adi.copy()
+    q = np.zeros(n)
+    for j in range(t):
+        m = nz[j]
+        q += 1
+        z = np.where(m, z + alfa_croston * (yt[j] - z), z)
+        p = np.where(m, p + alfa_croston * (q - p), p)
+        q = np.where(m, 0, q)
+    taxa_croston = (1 - alfa_croston / 2) * z / p
+
+    intermitente = adi > ADI_CORTE
+    modelo = np.where(n_dem == 0, 0, np.where(intermitente, 2, 1))
+    return {
+        "taxa": np.where(modelo == 0, 0.0, np.where(intermitente, taxa_croston, taxa_ses)),
+        "sigma": np.where(intermitente, y.std(axis=1), sigma_ses),
+        "modelo": modelo,
+        "alfa": np.where(intermitente, alfa_croston, a[melhor, 0]),
+        "adi": adi,
+    }
+
+
+def _ajustar_um(y, alfas=ALFAS, alfa_croston: float = ALFA_CROSTON) -> tuple:
+    """O mesmo ajuste de `ajustar` para um SKU, em Python puro (referência do benchmark)."""
+    t = len(y)
+    n_dem = sum(1 for v in y if v > 0)
+    adi = t / max(n_dem, 1)
+    melhor = None
+    for a in alfas:
+        nivel, sse = y[0], 0.0
+        for v in y[1:]:
+            e = v - nivel
+            sse += e * e
+            nivel += a * e
+        if melhor is None or sse < melhor[0]:
+            melhor = (sse, nivel)
+    if n_dem == 0:
+        return 0.0, 0
+    if adi <= ADI_CORTE:
+        return melhor[1], 1
+    z, p, q = sum(y) / n_dem, adi, 0
+    for v in y:
+        q += 1
+        if v > 0:
+            z += alfa_croston * (v - z)
+            p += alfa_croston * (q - p)
+            q = 0
+    return (1 - alfa_croston / 2) * z / p, 2
+
+
+def _ajustar_bloco(y: np.ndarray) -> dict:
+    partes = [ajustar(y[i:i + BLOCO_CACHE]) for i in range(0, max(len(y), 1), BLOCO_CACHE)]
+    return {k: np.concatenate([p[k] for p in partes]) for k in partes[0]}
+
+
+def ajustar_paralelo(y: np.ndarray, processos: int = None, bloco: int = BLOCO) -> dict:
+    """`ajustar` em blocos de `bloco` SKUs num pool de processos (catálogos grandes)."""
+    processos = processos or os.cpu_count() or 1
+    if processos == 1 or len(y) <= bloco:
+        return _ajustar_bloco(y)
+    blocos = [y[i:i + bloco] for i in range(0, len(y), bloco)]
+    with ProcessPoolExecutor(max_workers=min(processos, len(blocos))) as ex:
+        partes = list(ex.map(_ajustar_bloco, blocos))
+    return {k: np.concatenate([p[k] for p in partes]) for k in partes[0]}
+
+
+def prever(skus, y: np.ndarray, saldos, lead_time_dias: int = PREVISAO_DEFAULTS["lead_time_dias"],
+           cobertura_dias: int = PREVISAO_DEFAULTS["cobertura_dias"],
+           nivel_servico: float = PREVISAO_DEFAULTS["nivel_servico"], hoje: date = None,
+           processos: int = None) -> pd.DataFrame:
+    """Uma linha por SKU: modelo, consumo/dia, saldo, dias e data da ruptura, ponto de
+    pedido e quantidade sugerida. Ordenado pela ruptura mais próxima."""
+    hoje = hoje or date.today()
+    saldos = np.asarray(saldos, dtype="float64")
+    m = ajustar_paralelo(y, processos)
+    taxa, sigma = m["taxa"], m["sigma"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dias = np.where(saldos <= 0, 0.0, np.where(taxa > 0, saldos / taxa, np.inf))
+    seguranca = NormalDist().inv_cdf(nivel_servico) * sigma * math.sqrt(lead_time_dias)
+    ponto = taxa * lead_time_dias + seguranca
+    sugestao = np.where(saldos <= ponto,
+                        np.ceil(np.maximum(taxa * (lead_time_dias + cobertura_dias) + seguranca - saldos, 0)), 0)
+    ruptura = pd.Series(pd.NaT, index=range(len(dias)), dtype="datetime64[s]")
+    finitos = np.isfinite(dias)
+    ruptura[finitos] = pd.Timestamp(hoje) + pd.to_timedelta(np.floor(dias[finitos]), unit="D")
+    df = pd.DataFrame({
+        "SKU": np.asarray(skus), "MODELO": MODELOS[m["modelo"]], "CONSUMO_DIA": taxa, "SIGMA": sigma,
+        "SALDO": saldos, "DIAS_ATE_RUPTURA": dias, "DATA_RUPTURA": ruptura.to_numpy(),
+        "PONTO_PEDIDO": ponto, "SUGESTAO": sugestao.astype("int64"), "PEDIR": saldos <= ponto,
+    })
+    return df.sort_values("DIAS_ATE_RUPTURA", kind="stable").reset_index(drop=True)
+
+
+def historico(linhas, dias: int = 90, hoje: date = None) -> tuple:
+    """[(sku, "AAAA-MM-DD", quantidade)] (ver `DestinoSqlite.consumo_diario`) -> (skus, matriz
+    SKU × dia até hoje, zeros onde não houve consumo).
+
+    A matriz cobre os últimos `dias` dias, mas começa no primeiro dia com alguma baixa:
+    antes disso o razão não existia e zeros ali seriam consumo inventado.
+    """
+    hoje = hoje or date.today()
+    if not linhas:
+        return np.array([], dtype=object), np.zeros((0, dias))
+    sku, dia, qtd = zip(*linhas)
+    dia = pd.to_datetime(pd.Series(dia)).dt.date
+    inicio = min(max(hoje - timedelta(days=dias - 1), min(dia)), hoje)
+    dias = (hoje - inicio).days + 1
+    skus, linha = np.unique(np.asarray(sku, dtype=object), return_inverse=True)
+    col = (dia - inicio).map(lambda d: d.days).to_numpy()
+    ok = (col >= 0) & (col < dias)
+    y = np.zeros((len(skus), dias))
+    np.add.at(y, (linha[ok], col[ok]), np.asarray(qtd, dtype="float64")[ok])
+    return skus, y
+
+
+def gerar(skus: int = 10_000, dias: int = 180, seed: int = 42, intermitentes: float = 0.4) -> tuple:
+    """(skus, consumo SKU × dia, saldos) sintéticos: parte regular (Poisson), parte intermitente."""
+    rng = np.random.default_rng(seed)
+    taxa = rng.lognormal(1.5, 1.0, skus)
+    inter = rng.random(skus) < intermitentes
+    prob = np.where(inter, rng.uniform(0.05, 0.5, skus), 1.0)
+    y = rng.poisson(np.where(inter, taxa / prob * 0.5, taxa)[:, None], (skus, dias)) * (rng.random((skus, dias)) < prob[:, None])
+    saldos = np.round(taxa * rng.uniform(0, 40, skus))
+    nomes = np.char.add("SKU-", np.char.zfill(np.arange(skus).astype(str), 7))
+    return nomes.astype(object), y.astype("float64"), saldos
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--skus", type=int, default=200_000)
+    ap.add_argument("--dias", type=int, default=180)
+    ap.add_argument("--processos", type=int, help="padrão: todos os núcleos")
+    ap.add_argument("--amostra", type=int, default=2000, help="SKUs ajustados também um a um (laço Python)")
+    args = ap.parse_args(argv)
+
+    skus, y, saldos = gerar(args.skus, args.dias)
+    print(f"{args.skus} SKUs × {args.dias} dias ({y.nbytes / 2**20:.0f} MB de histórico)")
+
+    t0 = time.perf_counter()
+    ref = [_ajustar_um(list(y[i])) for i in range(min(args.amostra, len(y)))]
+    s_laco = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    vet = ajustar_paralelo(y, 1)
+    s_vet = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    par = ajustar_paralelo(y, args.processos)
+    s_par = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    df = prever(skus, y, saldos, processos=args.processos)
+    s_prev = time.perf_counter() - t0
+
+    taxa_ref = np.array([r[0] for r in ref])
+    assert np.allclose(taxa_ref, vet["taxa"][:len(ref)]) and np.array_equal(par["taxa"], vet["taxa"])
+    print(f"laço por SKU (amostra de {len(ref)}): {len(ref) / s_laco:>12,.0f} SKUs/s")
+    print(f"vetorizado (1 processo):        {args.skus / s_vet:>12,.0f} SKUs/s ({s_vet:.2f} s)")
+    print(f"vetorizado em blocos (pool):    {args.skus / s_par:>12,.0f} SKUs/s ({s_par:.2f} s, "
+          f"{args.processos or os.cpu_count()} processo(s))")
+    print(f"previsão completa (+ reposição): {args.skus / s_prev:>11,.0f} SKUs/s")
+    modelos = df["MODELO"].value_counts().to_dict()
+    print(f"modelos: {modelos}; {int(df['PEDIR'].sum())} SKUs no ponto de pedido, "
+          f"{int((df['DIAS_ATE_RUPTURA'] < PREVISAO_DEFAULTS['lead_time_dias']).sum())} rompem antes do lead time")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,488 @@
+# estoque/query.py
+# -*- coding: utf-8 -*-
+"""Filtros/agregações da página de análise, executados no banco (SQL + binds) ou em pandas."""
+
+import re
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from estoque.cube import DIMS
+from estoque.dataset import InsumosDataset
+from estoque.dialect import ORACLE, Dialeto
+from estoque.export import LOTE_EXPORT
+from estoque.loader import normalizar
+from estoque.perf import etapa
+from estoque.search import indice_para
+
+# Métrica (rótulo da UI) -> função de agregação SQL / pandas
+METRICAS_SQL = {"Soma": "SUM", "Média": "AVG", "Mediana": "MEDIAN", "Máximo": "MAX", "Mínimo": "MIN"}
+METRICAS_CUBO = {"Soma": "SOMA", "Média": "MEDIA", "Mediana": "MEDIANA", "Máximo": "MAX", "Mínimo": "MIN"}
+EIXOS = ("EXAME", "INSUMO")
+COLUNAS = ("INSUMO", "QUANTIDADE", "EXAME")
+
+_IDENT = re.compile(r"^[A-Z][A-Z0-9_$#]{0,127}$")
+_IN_MAX = 1000  # limite do Oracle para itens numa lista IN
+
+
+@dataclass(frozen=True)
+class Filtros:
+    """Estado dos filtros da página (imutável/hashable para servir de chave de cache)."""
+    termo: str = ""
+    exame: str | None = None              # None = (todos)
+    insumos: tuple = ()
+    faixa: tuple | None = None            # (min, max) de QUANTIDADE, inclusivo
+    busca: str = "contem"                 # contem | prefixo | aproximada (ver estoque.search)
+    nomes: tuple | None = None            # INSUMOs já resolvidos pelo índice de busca
+
+
+def _ident(nome: str) -> str:
+    """Schema/owner não aceita bind: só deixa passar identificadores Oracle simples."""
+    nome = (nome or "").strip().upper()
+    if not _IDENT.match(nome):
+        raise ValueError(f"Identificador inválido: {nome!r}")
+    return nome
+
+
+def _like(termo: str) -> str:
+    """Padrão LIKE literal (escapa curingas) para busca 'contém' sem distinção de caixa.
+
+    Só para quem usa o `SqlBuilder` direto: a `SqlSource` resolve o termo pelo índice."""
+    esc = termo.upper().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{esc}%"
+
+
+class SqlBuilder:
+    """Monta SQL parametrizado sobre `{schema}.INSUMOS` a partir de `Filtros`.
+
+    Com vários schemas (uma unidade por schema), as consultas rodam sobre o UNION ALL
+    das tabelas; refresh incremental/contagem/ROWIDs continuam sendo por schema.
+
+    Cada método devolve `(sql, binds)`; os valores dos filtros sempre vão como bind
+    variables, de modo que o texto do SQL se repete e reaproveita o cursor/cache de statements.
+    O `dialeto` cuida do que muda entre Oracle, SQLite e DuckDB (binds, LIMIT, coerção).
+    """
+
+    def __init__(self, schema, dialeto: Dialeto = ORACLE):
+        self.d = dialeto
+        nomes = (schema,) if isinstance(schema, str) or schema is None else tuple(schema)
+        self.schemas = tuple(_ident(s) for s in nomes) if dialeto.usa_schema else (None,)
+        self.schema = self.schemas[0]
+
+    # ---- blocos ----
+    def _base(self, extra: str = "") -> str:
+        # Normalização feita no banco: strip do texto e QUANTIDADE inteira (inválido/nulo = 0).
+        # Normalizada em cada schema antes do UNION ALL: os tipos das colunas podem diferir
+        return " UNION ALL ".join(
+            f"SELECT {extra}TRIM(INSUMO) AS INSUMO, "
+            f"{self.d.numero('QUANTIDADE')} AS QUANTIDADE, "
+            "TRIM(EXAME) AS EXAME "
+            f"FROM {self.d.tabela(s)}"
+            for s in self.schemas
+        )
+
+    def _where(self, f: Filtros, extra_exames=()) -> tuple:
+        conds, binds = [], {}
+        if f.termo:
+            conds.append(f"UPPER(INSUMO) LIKE {self.d.bind('termo')} ESCAPE '\\'")
+            binds["termo"] = _like(f.termo)
+        if f.nomes is not None and not f.nomes:
+            conds.append("1 = 0")
+        if f.exame is not None:
+            conds.append(f"EXAME = {self.d.bind('exame')}")
+            binds["exame"] = f.exame
+        listas = (("i", f.insumos, "INSUMO"), ("n", f.nomes or (), "INSUMO"), ("e", tuple(extra_exames), "EXAME"))
+        for prefixo, valores, col in listas:
+            if not valores:
+                continue
+            blocos = []
+            for ini in range(0, len(valores), _IN_MAX):
+                nomes = []
+                for j, v in enumerate(valores[ini:ini + _IN_MAX], start=ini):
+                    binds[f"{prefixo}{j}"] = v
+                    nomes.append(self.d.bind(f"{prefixo}{j}"))
+                blocos.append(f"{col} IN ({', '.join(nomes)})")
+            conds.append("(" + " OR ".join(blocos) + ")")
+        if f.faixa is not None:
+            conds.append(f"QUANTIDADE BETWEEN {self.d.bind('qmin')} AND {self.d.bind('qmax')}")
+            binds["qmin"], binds["qmax"] = int(f.faixa[0]), int(f.faixa[1])
+        where = (" WHERE " + " AND ".join(conds)) if conds else ""
+        return where, binds
+
+    def _limite(self, binds: dict, n) -> str:
+        if n is None:
+            return ""
+        binds["n"] = int(n)
+        return self.d.limite("n")
+
+    # ---- consultas ----
+    def linhas(self, f: Filtros, limite=None) -> tuple:
+        """Linhas filtradas (preview/exportação). `limite=None` traz tudo o que passou no filtro."""
+        where, binds = self._where(f)
+        sql = f"SELECT INSUMO, QUANTIDADE, EXAME FROM ({self._base()}){where}"
+        return sql + self._limite(binds, limite), binds
+
+    def pagina(self, f: Filtros, ordem: str, desc: bool, inicio: int, n: int) -> tuple:
+        """Uma página do preview: ORDER BY estável (demais colunas desempatam) + OFFSET/FETCH."""
+        if ordem not in COLUNAS:
+            raise ValueError(f"Coluna de ordenação inválida: {ordem!r}")
+        where, binds = self._where(f)
+        sentido = " DESC" if desc else ""
+        chaves = ", ".join(f"{c}{sentido}" for c in (ordem, *(c for c in COLUNAS if c != ordem)))
+        binds["o"], binds["n"] = int(inicio), int(n)
+        sql = (
+            f"SELECT INSUMO, QUANTIDADE, EXAME FROM ({self._base()}){where} "
+            f"ORDER BY {chaves}{self.d.pagina('o', 'n')}"
+        )
+        return sql, binds
+
+    def registros(self, f: Filtros) -> tuple:
+        where, binds = self._where(f)
+        return f"SELECT COUNT(*) AS N FROM ({self._base()}){where}", binds
+
+    def kpis(self, f: Filtros) -> tuple:
+        where, binds = self._where(f)
+        sql = (
+            "SELECT COUNT(*) AS REGISTROS, COUNT(DISTINCT INSUMO) AS ITENS, "
+            "COALESCE(SUM(QUANTIDADE), 0) AS TOTAL, MEDIAN(QUANTIDADE) AS MEDIANA "
+            f"FROM ({self._base()}){where}"
+        )
+        return sql, binds
+
+    def dominios(self) -> tuple:
+        """Valores distintos para popular os widgets (pequeno perto da tabela)."""
+        sql = (
+            "SELECT 'EXAME' AS CAMPO, EXAME AS VALOR FROM "
+            f"({self._base()}) WHERE EXAME IS NOT NULL GROUP BY EXAME "
+            "UNION ALL "
+            "SELECT 'INSUMO', INSUMO FROM "
+            f"({self._base()}) WHERE INSUMO IS NOT NULL GROUP BY INSUMO "
+            "UNION ALL "
+            f"SELECT 'QMIN', {self.d.texto('MIN(QUANTIDADE)')} FROM "
+            f"({self._base()}) "
+            "UNION ALL "
+            f"SELECT 'QMAX', {self.d.texto('MAX(QUANTIDADE)')} FROM "
+            f"({self._base()})"
+        )
+        return sql, {}
+
+    def top(self, f: Filtros, n: int) -> tuple:
+        where, binds = self._where(f)
+        sql = (
+            f"SELECT INSUMO, SUM(QUANTIDADE) AS QUANTIDADE FROM ({self._base()}){where} "
+            "GROUP BY INSUMO ORDER BY SUM(QUANTIDADE) DESC"
+        )
+        return sql + self._limite(binds, n), binds
+
+    def agregacao(self, f: Filtros, eixo: str, metrica: str) -> tuple:
+        if eixo not in EIXOS:
+            raise ValueError(f"Eixo inválido: {eixo!r}")
+        where, binds = self._where(f)
+        ordem = "ASC" if metrica == "Mínimo" else "DESC"
+        sql = (
+            f"SELECT {eixo}, {METRICAS_SQL[metrica]}(QUANTIDADE) AS VALOR FROM ({self._base()}){where} "
+            f"GROUP BY {eixo} ORDER BY VALOR {ordem}"
+        )
+        return sql, binds
+
+    def comparacao(self, f: Filtros, exames) -> tuple:
+        where, binds = self._where(f, extra_exames=exames)
+        sql = (
+            f"SELECT INSUMO, EXAME, SUM(QUANTIDADE) AS QUANTIDADE FROM ({self._base()}){where} "
+            "GROUP BY INSUMO, EXAME ORDER BY INSUMO, EXAME"
+        )
+        return sql, binds
+
+
+    # ---- refresh incremental ----
+    def delta(self, marca: str, desde=None) -> tuple:
+        """Linhas com `marca > desde` (todas se `desde` for None), com ROWID para o merge.
+
+        `marca` é ORA_ROWSCN ou uma coluna monotônica (timestamp de alteração, sequence).
+        """
+        marca = _ident(marca)
+        expr = "CAST(ORA_ROWSCN AS NUMBER(18))" if marca == "ORA_ROWSCN" else marca
+        sql = self._base(extra=f"ROWIDTOCHAR(ROWID) AS RID, {expr} AS MARCA, ")
+        binds = {}
+        if desde is not None:
+            sql += f" WHERE {marca} > :hwm"
+            binds["hwm"] = desde
+        return sql, binds
+
+    def contagem(self) -> tuple:
+        return f"SELECT COUNT(*) AS N FROM {self.schema}.INSUMOS", {}
+
+    def rowids(self) -> tuple:
+        return f"SELECT ROWIDTOCHAR(ROWID) AS RID FROM {self.schema}.INSUMOS", {}
+
+
+# =========================
+# Fontes: mesma interface, execução no banco ou em memória
+# =========================
+class SqlSource:
+    """Executa as consultas no banco; só volta o tamanho do resultado.
+
+    `run(sql, binds) -> DataFrame` é injetado pela página (normalmente cacheado);
+    `stream(sql, binds)`, opcional, devolve o resultado em lotes (exportação);
+    `planejar([(sql, binds), ...])`, opcional, dispara consultas em paralelo (`antecipar`).
+    """
+
+    # Método da fonte -> consulta do SqlBuilder (mesmos argumentos)
+    _CONSULTAS = {"dominios": "dominios", "kpis": "kpis", "contar": "registros", "pagina": "pagina",
+                  "top": "top", "agregacao": "agregacao", "comparacao": "comparacao"}
+
+    def __init__(self, run, schema, stream=None, dialeto: Dialeto = ORACLE, planejar=None):
+        self.run = run
+        self.stream = stream
+        self.planejar = planejar
+        self.q = SqlBuilder(schema, dialeto)
+
+    def antecipar(self, *pedidos) -> None:
+        """Dispara juntas as consultas que as seções vão pedir, ex. `("top", f, 10)`;
+        depois cada chamada (`top(f, 10)`) só espera a sua. Sem `planejar`, nada muda."""
+        if self.planejar is None:
+            return
+        consultas = []
+        for nome, *args in pedidos:
+            if nome == "comparacao" and not args[1]:
+                continue   # sem exames escolhidos não há consulta
+            if args:
+                args[0] = self.resolver(args[0])
+            consultas.append(getattr(self.q, self._CONSULTAS[nome])(*args))
+        self.planejar(consultas)
+
+    def resolver(self, f: Filtros) -> Filtros:
+        """O índice sobre o domínio de INSUMO resolve o termo em nomes, que vão para o
+        banco como lista IN: mesma busca sem caixa e sem acento da `FrameSource` em
+        todos os modos (o UPPER do SQLite só dobra ASCII e nenhum banco tira acento)."""
+        if not f.termo:
+            return f
+        idx = indice_para(tuple(self.dominios()["insumos"]))
+        return replace(f, termo="", nomes=tuple(idx.nomes(f.termo, f.busca)))
+
+    def dominios(self) -> dict:
+        d = self.run(*self.q.dominios())
+        por_campo = d.groupby("CAMPO")["VALOR"]
+        valores = {k: sorted(v.dropna().tolist()) for k, v in por_campo}
+        qmin = valores.get("QMIN") or [None]
+        qmax = valores.get("QMAX") or [None]
+        return {
+            "exames": valores.get("EXAME", []),
+            "insumos": valores.get("INSUMO", []),
+            "qmin": int(float(qmin[0])) if qmin[0] is not None else None,
+            "qmax": int(float(qmax[0])) if qmax[0] is not None else None,
+        }
+
+    def kpis(self, f: Filtros = Filtros()) -> dict:
+        r = self.run(*self.q.kpis(self.resolver(f))).iloc[0]
+        return {
+            "registros": int(r["REGISTROS"]),
+            "itens": int(r["ITENS"]),
+            "total": int(r["TOTAL"]),
+            "mediana": int(r["MEDIANA"]) if pd.notna(r["MEDIANA"]) else 0,
+        }
+
+    def linhas(self, f: Filtros, limite=None) -> pd.DataFrame:
+        return self.run(*self.q.linhas(self.resolver(f), limite))
+
+    def contar(self, f: Filtros) -> int:
+        return int(self.run(*self.q.registros(self.resolver(f))).iloc[0, 0])
+
+    def pagina(self, f: Filtros, ordem: str, desc: bool = False, inicio: int = 0, n: int = 50) -> pd.DataFrame:
+        """Só as `n` linhas da página pedida saem do banco."""
+        return self.run(*self.q.pagina(self.resolver(f), ordem, desc, inicio, n))
+
+    def lotes(self, f: Filtros):
+        """Linhas filtradas em lotes, direto do cursor (sem passar pelo cache de resultados)."""
+        if self.stream is None:
+            yield self.linhas(f)
+            return
+        vazio = True
+        for lote in self.stream(*self.q.linhas(self.resolver(f))):
+            vazio = False
+            yield lote
+        if vazio:
+            # Filtro sem linhas: um lote vazio para o arquivo exportado ainda ter cabeçalho/schema
+            yield normalizar(pd.DataFrame(columns=list(COLUNAS)))
+
+    def top(self, f: Filtros, n: int) -> pd.DataFrame:
+        return self.run(*self.q.top(self.resolver(f), n))
+
+    def agregacao(self, f: Filtros, eixo: str, metrica: str) -> pd.DataFrame:
+        return self.run(*self.q.agregacao(self.resolver(f), eixo, metrica)).rename(columns={"VALOR": metrica})
+
+    def comparacao(self, f: Filtros, exames) -> pd.DataFrame:
+        if not exames:
+            return pd.DataFrame(columns=["INSUMO", "EXAME", "QUANTIDADE"])
+        return self.run(*self.q.comparacao(self.resolver(f), exames))
+
+
+class FrameSource:
+    """Mesmas consultas sobre a tabela completa já carregada (modo opt-in).
+
+    A tabela é um `InsumosDataset` compacto e compartilhado; os filtros produzem
+    só arrays de posições, e os agrupamentos rodam sobre essas linhas.
+    """
+
+    def __init__(self, dados):
+        self.ds = dados if isinstance(dados, InsumosDataset) else InsumosDataset.from_frame(dados)
+        self.df = self.ds.df
+
+    def _codigos(self, col: str, pos):
+        codes = self.df[col].cat.codes.to_numpy()
+        return codes if pos is None else codes[pos]
+
+    def indices(self, f: Filtros) -> np.ndarray:
+        """Posições das linhas que passam nos filtros.
+
+        Com termo de busca, o índice do snapshot já entrega as linhas candidatas e os
+        demais filtros só olham para elas (custo proporcional ao resultado). O último
+        resultado fica guardado: contagem e páginas do preview usam os mesmos filtros.
+        """
+        ultimo = self.__dict__.get("_ultimo")
+        if ultimo is None or ultimo[0] != f:
+            with etapa("filtro") as e:
+                ultimo = self._ultimo = (f, self._indices(f))
+                e["linhas"] = len(ultimo[1])
+        return ultimo[1]
+
+    def _indices(self, f: Filtros) -> np.ndarray:
+        df = self.df
+        pos = None
+        if f.termo:
+            ids = self.ds.indice("INSUMO").buscar(f.termo, f.busca)
+            pos = self.ds.posicoes("INSUMO", ids)
+        mask = np.ones(len(df) if pos is None else len(pos), dtype=bool)
+        if f.exame is not None:
+            cats = df["EXAME"].cat.categories
+            alvo = cats.get_loc(f.exame) if f.exame in cats else -2
+            mask &= self._codigos("EXAME", pos) == alvo
+        for nomes in (f.insumos or None, f.nomes):
+            if nomes is None:
+                continue
+            cats = df["INSUMO"].cat.categories
+            hit = np.zeros(len(cats) + 1, dtype=bool)   # último = código -1 (nulo)
+            hit[cats.get_indexer(list(nomes))] = True
+            hit[-1] = False
+            mask &= hit[self._codigos("INSUMO", pos)]
+        if f.faixa is not None and "QUANTIDADE" in df:
+            q = df["QUANTIDADE"].to_numpy()
+            q = q if pos is None else q[pos]
+            mask &= (q >= f.faixa[0]) & (q <= f.faixa[1])
+        return np.flatnonzero(mask) if pos is None else pos[mask]
+
+    def antecipar(self, *pedidos) -> None:
+        """Em memória não há espera pelo banco: cada seção calcula a sua na hora."""
+
+    def filtrar(self, f: Filtros) -> pd.DataFrame:
+        if f == Filtros():
+            return self.df
+        return self.df.iloc[self.indices(f)]
+
+    def dominios(self) -> dict:
+        df = self.df
+        q = df["QUANTIDADE"].dropna() if "QUANTIDADE" in df else pd.Series(dtype=int)
+        return {
+            "exames": sorted(df["EXAME"].dropna().unique().tolist()) if "EXAME" in df else [],
+            "insumos": sorted(df["INSUMO"].dropna().unique().tolist()) if "INSUMO" in df else [],
+            "qmin": int(q.min()) if not q.empty else None,
+            "qmax": int(q.max()) if not q.empty else None,
+        }
+
+    # ---- agregações: roll-ups sobre o cubo do snapshot, não sobre as linhas ----
+    def _cubo(self, f: Filtros, dims: list, metricas=(), exames=None) -> pd.DataFrame:
+        """Traduz os filtros em códigos de INSUMO/EXAME e consulta o cubo."""
+        cats_i = self.df["INSUMO"].cat.categories
+        cats_e = self.df["EXAME"].cat.categories
+        ins = None
+        if f.termo:
+            ins = self.ds.indice("INSUMO").buscar(f.termo, f.busca)
+        for nomes in (f.insumos or None, f.nomes):
+            if nomes is not None:
+                c = cats_i.get_indexer(list(nomes))
+                c = c[c >= 0]
+                ins = c if ins is None else np.intersect1d(ins, c)
+        exs = None
+        for nomes in (None if f.exame is None else [f.exame], exames):
+            if nomes is not None:
+                c = cats_e.get_indexer(list(nomes))
+                c = c[c >= 0]
+                exs = c if exs is None else np.intersect1d(exs, c)
+        cubo = self.ds.cubo()
+        with etapa("agregação (cubo)") as e:
+            r = cubo.consulta(dims, metricas, ins, exs, f.faixa)
+            e["linhas"] = len(r)
+        return r
+
+    def _rotular(self, r: pd.DataFrame) -> pd.DataFrame:
+        """Códigos do cubo -> nomes (colunas I/E viram INSUMO/EXAME)."""
+        for cod, col in (("E", "EXAME"), ("I", "INSUMO")):
+            if cod in r:
+                r.insert(0, col, self.df[col].cat.categories.take(r.pop(cod).to_numpy()))
+        return r
+
+    def kpis(self, f: Filtros = Filtros()) -> dict:
+        cache = self.ds.derivados()
+        if f == Filtros() and "kpis" in cache:
+            return cache["kpis"]
+        r = self._cubo(f, [], ("MEDIANA",))
+        itens = len(self._cubo(f, ["I"]))
+        k = {
+            "registros": int(r["N"].sum()),
+            "itens": int(itens),
+            "total": int(r["SOMA"].sum()),
+            "mediana": int(r["MEDIANA"].iloc[0]) if len(r) and r["N"].iloc[0] else 0,
+        }
+        if f == Filtros():
+            cache["kpis"] = k
+        return k
+
+    def linhas(self, f: Filtros, limite=None) -> pd.DataFrame:
+        df = self.filtrar(f)
+        return df if limite is None else df.head(limite)
+
+    def contar(self, f: Filtros) -> int:
+        return len(self.df) if f == Filtros() else len(self.indices(f))
+
+    def pagina(self, f: Filtros, ordem: str, desc: bool = False, inicio: int = 0, n: int = 50) -> pd.DataFrame:
+        """Página do preview: percorre a ordem pré-calculada do snapshot e fica só com as
+        linhas do filtro, sem ordenar o resultado filtrado a cada página.
+
+        Mesma ordem do `SqlBuilder.pagina`: as demais colunas desempatam, no mesmo sentido.
+        """
+        if ordem not in COLUNAS:
+            raise ValueError(f"Coluna de ordenação inválida: {ordem!r}")
+        o = self.ds.ordem(ordem, *(c for c in COLUNAS if c != ordem))
+        if desc:
+            o = o[::-1]
+        if f != Filtros():
+            sel = np.zeros(len(self.df), dtype=bool)
+            sel[self.indices(f)] = True
+            o = o[sel[o]]
+        return self.df.iloc[o[inicio:inicio + n]]
+
+    def lotes(self, f: Filtros, tamanho: int = LOTE_EXPORT):
+        """Linhas filtradas em fatias de `tamanho` (só os índices do filtro são guardados)."""
+        pos = None if f == Filtros() else self.indices(f)
+        n = len(self.df) if pos is None else len(pos)
+        for ini in range(0, max(n, 1), tamanho):
+            fatia = slice(ini, ini + tamanho)
+            yield self.df.iloc[fatia] if pos is None else self.df.iloc[pos[fatia]]
+
+    def top(self, f: Filtros, n: int) -> pd.DataFrame:
+        r = self._cubo(f, ["I"])
+        r = r.nlargest(n, "SOMA", keep="first")[["I", "SOMA"]].rename(columns={"SOMA": "QUANTIDADE"})
+        return self._rotular(r.reset_index(drop=True))
+
+    def agregacao(self, f: Filtros, eixo: str, metrica: str) -> pd.DataFrame:
+        col = METRICAS_CUBO[metrica]
+        dim = DIMS[eixo]
+        r = self._cubo(f, [dim], (col,))[[dim, col]]
+        r = r.rename(columns={col: metrica}).sort_values(metrica, ascending=(metrica == "Mínimo"), kind="stable")
+        return self._rotular(r.reset_index(drop=True))
+
+    def comparacao(self, f: Filtros, exames) -> pd.DataFrame:
+        r = self._cubo(f, ["I", "E"], exames=exames)[["I", "E", "SOMA"]]
+        r = self._rotular(r.rename(columns={"SOMA": "QUANTIDADE"}))
+        return r.sort_values(["INSUMO", "EXAME"]).reset_index(drop=True)
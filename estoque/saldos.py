@@ -0,0 +1,232 @@
+# estoque/saldos.py
+# -*- coding: utf-8 -*-
+"""Saldos em tempo real a partir do razão de eventos (event sourcing).
+
+O razão é a tabela EVENTOS da ingestão (`estoque.eventos`): só recebe linhas novas,
+cada uma com uma posição crescente (rowid no SQLite, SEQ no Oracle). `Saldos`
+mantém em memória o saldo de cada (SKU, local) e o total de cada SKU; cada evento
+aplicado é uma soma num dict (O(1)), e consultar um saldo é uma leitura do dict,
+qualquer que seja o tamanho do histórico.
+
+Eventos com lote também movem o saldo do lote (SKU, lote), que guarda a validade.
+Uma baixa sem lote consome os lotes do SKU que vencem primeiro (FEFO), por uma fila
+de prioridade por SKU: O(log n) por lote tocado. Quem precisa reagir a cada evento
+(ex.: `estoque.alertas`) assina com `assinar`.
+
+De tempos em tempos (`snapshot_cada` eventos) os saldos e a posição vão para um
+snapshot compacto em `.cache/saldos/`. Numa partida a frio, o snapshot é lido e só
+os eventos depois da posição dele são reaplicados.
+
+    python -m estoque.saldos --sqlite dados/eventos.db   # saldos atuais + tempo da partida
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import streamlit as st
+
+PASTA = Path(__file__).resolve().parent.parent / ".cache" / "saldos"
+FORMATO = 2                # 2: saldos por lote
+SEM_VALIDADE = "9999-12-31"   # lote sem validade vai para o fim da fila FEFO
+LOTE_LEITURA = 50_000      # eventos lidos do razão por consulta
+SNAPSHOT_CADA = 50_000     # eventos aplicados entre dois snapshots
+
+
+class Saldos:
+    """Saldos por (SKU, local) e por SKU, atualizados evento a evento a partir do razão."""
+
+    def __init__(self, razao, pasta=PASTA, snapshot_cada: int = SNAPSHOT_CADA):
+        self.razao = razao
+        self.snapshot_cada = snapshot_cada
+        h = hashlib.sha1(razao.descricao.encode("utf-8")).hexdigest()[:16]
+        self._arquivo = Path(pasta) / f"saldos-{h}.json"
+        self._lock = threading.RLock()
+        self._por_local = {}        # (sku, local) -> saldo
+        self._por_sku = {}          # sku -> saldo somando os locais
+        self._lotes = {}            # (sku, lote) -> [saldo, validade]
+        self._fefo = {}             # sku -> heap de (validade, lote) dos lotes com saldo
+        self._na_fila = set()       # (sku, lote) com entrada no heap do SKU
+        self.observadores = []      # fn(sku, lotes tocados) a cada evento aplicado
+        self.posicao = 0            # último evento do razão já aplicado
+        self.posicao_snapshot = 0
+        self.partida = {}           # como foi a partida a frio (snapshot, eventos reaplicados, ms)
+        t0 = time.perf_counter()
+        self._ler_snapshot()
+        if self.posicao and not self.razao.ler_desde(self.posicao - 1, 1):
+            self._zerar()   # razão recriado: a posição do snapshot não existe mais nele
+        base = self.posicao_snapshot
+        reaplicados = self.atualizar()
+        self.partida = {"snapshot": base, "reaplicados": reaplicados,
+                        "ms": (time.perf_counter() - t0) * 1000}
+
+    # ---- atualização ----
+    def aplicar(self, posicao: int, sku: str, local: str, acao: str, quantidade: int,
+                lote: str = "", validade: str = None) -> None:
+        """Um evento do razão: O(1) nos saldos, O(log n) por lote tocado."""
+        q = quantidade if acao == "ENTRADA" else -quantidade
+        chave = (sku, local)
+        self._por_local[chave] = self._por_local.get(chave, 0) + q
+        self._por_sku[sku] = self._por_sku.get(sku, 0) + q
+        self.posicao = posicao
+        tocados = self._mover_lotes(sku, q, lote or "", validade)
+        for fn in self.observadores:
+            fn(sku, tocados)
+
+    def _enfileirar(self, sku: str, lote: str, validade) -> None:
+        if (sku, lote) not in self._na_fila:
+            heapq.heappush(self._fefo.setdefault(sku, []), (validade or SEM_VALIDADE, lote))
+            self._na_fila.add((sku, lote))
+
+    def _mover_lotes(self, sku: str, q: int, lote: str, validade) -> tuple:
+        if lote:
+            reg = self._lotes.setdefault((sku, lote), [0, validade])
+            reg[1] = reg[1] or validade
+            reg[0] += q
+            if reg[0] > 0:
+                self._enfileirar(sku, lote, reg[1])
+            return (lote,)
+        if q >= 0:
+            return ()   # entrada sem lote: só os totais
+        # Baixa sem lote: sai dos lotes que vencem primeiro (FEFO)
+        fila, falta, tocados = self._fefo.get(sku), -q, []
+        while falta and fila:
+            lote = fila[0][1]
+            reg = self._lotes[(sku, lote)]
+            if reg[0] <= 0:   # zerado por uma baixa anterior: sai da fila agora
+                heapq.heappop(fila)
+                self._na_fila.discard((sku, lote))
+                continue
+            usado = min(falta, reg[0])
+            reg[0] -= usado
+            falta -= usado
+            tocados.append(lote)
+        return tuple(tocados)
+
+    def assinar(self, fn, inicio=None) -> None:
+        """Passa a chamar `fn(sku, lotes)` a cada evento. `inicio()` roda antes, sob a mesma
+        trava: quem assina lê o estado atual sem perder nem repetir eventos."""
+        with self._lock:
+            if inicio is not None:
+                inicio()
+            self.observadores.append(fn)
+
+    def atualizar(self) -> int:
+        """Aplica o que entrou no razão depois de `posicao` (também vindo de outro processo)."""
+        n = 0
+        with self._lock:
+            while linhas := self.razao.ler_desde(self.posicao, LOTE_LEITURA):
+                for linha in linhas:
+                    self.aplicar(*linha)
+                n += len(linhas)
+                if len(linhas) < LOTE_LEITURA:
+                    break
+            if self.posicao - self.posicao_snapshot >= self.snapshot_cada:
+                self.snapshot()
+        return n
+
+    def ao_gravar(self, lote) -> None:
+        """Para `Ingestor.ao_gravar`: o lote acabou de entrar no razão."""
+        self.atualizar()
+
+    # ---- consulta ----
+    def saldo(self, sku: str, local: str = None) -> int:
+        """Saldo do SKU num local (ou somando todos): O(1)."""
+        if local is None:
+            return self._por_sku.get(sku, 0)
+        return self._por_local.get((sku, local), 0)
+
+    def saldo_lote(self, sku: str, lote: str) -> int:
+        reg = self._lotes.get((sku, lote))
+        return reg[0] if reg else 0
+
+    def validade(self, sku: str, lote: str):
+        reg = self._lotes.get((sku, lote))
+        return reg[1] if reg else None
+
+    def tabela(self) -> list:
+        """[(sku, local, saldo)] ordenado, para exibição."""
+        with self._lock:
+            return sorted((s, l, v) for (s, l), v in self._por_local.items())
+
+    def lotes(self) -> list:
+        """[(sku, lote, saldo, validade)] dos lotes com saldo."""
+        with self._lock:
+            return [(s, l, v, val) for (s, l), (v, val) in self._lotes.items() if v > 0]
+
+    # ---- snapshot ----
+    def snapshot(self) -> Path:
+        """Grava posição + saldos (troca atômica: arquivo temporário + `os.replace`)."""
+        with self._lock:
+            dados = {"formato": FORMATO, "posicao": self.posicao, "criado_em": time.time(),
+                     "saldos": [[s, l, v] for (s, l), v in self._por_local.items() if v],
+                     "lotes": [[s, l, v, val] for (s, l), (v, val) in self._lotes.items() if v]}
+            self.posicao_snapshot = self.posicao
+        self._arquivo.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._arquivo.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(dados, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self._arquivo)
+        return self._arquivo
+
+    def _zerar(self) -> None:
+        for d in (self._por_local, self._por_sku, self._lotes, self._fefo, self._na_fila):
+            d.clear()
+        self.posicao = self.posicao_snapshot = 0
+
+    def _ler_snapshot(self) -> None:
+        try:
+            dados = json.loads(self._arquivo.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return
+        if dados.get("formato") != FORMATO:
+            return
+        for s, l, v in dados["saldos"]:
+            self._por_local[(s, l)] = v
+            self._por_sku[s] = self._por_sku.get(s, 0) + v
+        for s, l, v, val in dados["lotes"]:
+            self._lotes[(s, l)] = [v, val]
+            if v > 0:
+                self._fefo.setdefault(s, []).append((val or SEM_VALIDADE, l))
+                self._na_fila.add((s, l))
+        for fila in self._fefo.values():
+            heapq.heapify(fila)
+        self.posicao = self.posicao_snapshot = dados["posicao"]
+
+
+@st.cache_resource(show_spinner=False)
+def saldos_padrao() -> Saldos:
+    """Saldos do razão da ingestão do processo, atualizados a cada lote gravado."""
+    from estoque.eventos import ingestor_padrao
+
+    ing = ingestor_padrao()
+    saldos = Saldos(ing.destino)
+    ing.ao_gravar.append(saldos.ao_gravar)
+    return saldos
+
+
+def main(argv=None):
+    import argparse
+
+    from estoque.eventos import EVENTOS_DEFAULTS, DestinoSqlite
+
+    ap = argparse.ArgumentParser(description="Saldos atuais a partir do razão de eventos.")
+    ap.add_argument("--sqlite", default=EVENTOS_DEFAULTS["arquivo"])
+    ap.add_argument("--pasta", default=str(PASTA), help="onde ficam os snapshots")
+    ap.add_argument("--snapshot", action="store_true", help="grava um snapshot ao final")
+    args = ap.parse_args(argv)
+
+    s = Saldos(DestinoSqlite(args.sqlite), args.pasta)
+    p = s.partida
+    print(f"partida: snapshot na posição {p['snapshot']}, {p['reaplicados']} eventos reaplicados em {p['ms']:.0f} ms")
+    for sku, local, v in s.tabela():
+        print(f"{sku:<12} {local:<16} {v:>8}")
+    if args.snapshot:
+        print(f"snapshot: {s.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# estoque/search.py
+# -*- coding: utf-8 -*-
+"""Índice de busca sobre os nomes distintos de INSUMO (trigramas + prefixo de palavra)."""
+
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+
+MODOS = {"Contém": "contem", "Início de palavra": "prefixo", "Aproximada": "aproximada"}
+SIMILARIDADE_MIN = 0.5   # fração dos trigramas do termo presentes no nome (busca aproximada)
+
+
+def fold(texto: str) -> str:
+    """Minúsculas sem acento ("Estéril" -> "esteril")."""
+    nfkd = unicodedata.normalize("NFKD", str(texto))
+    return "".join(c for c in nfkd if not unicodedata.combining(c)).casefold()
+
+
+def _trigramas(s: str) -> set:
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class SearchIndex:
+    """Construído uma vez por snapshot sobre os valores distintos (não sobre as linhas).
+
+    `buscar()` devolve os ids (posições em `valores`) que casam com o termo; a
+    página converte ids em linhas pelo mapa código -> posições do dataset.
+    """
+
+    def __init__(self, valores):
+        self.valores = list(valores)
+        self._fold = [fold(v) for v in self.valores]
+
+        postings = {}
+        palavras = []
+        for i, v in enumerate(self._fold):
+            for t in _trigramas(v):
+                postings.setdefault(t, []).append(i)
+            for p in set(v.split()):
+                palavras.append((p, i))
+        self._postings = {t: np.asarray(ids, dtype=np.int32) for t, ids in postings.items()}
+        self._ntri = np.array([max(len(_trigramas(v)), 1) for v in self._fold], dtype=np.int32)
+
+        palavras.sort()
+        self._palavras = np.array([p for p, _ in palavras], dtype=object)
+        self._palavra_id = np.array([i for _, i in palavras], dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.valores)
+
+    # ---- modos ----
+    def contem(self, termo: str) -> np.ndarray:
+        t = fold(termo)
+        if len(t) < 3:
+            return np.array([i for i, v in enumerate(self._fold) if t in v], dtype=np.int32)
+        listas = sorted((self._postings.get(g) for g in _trigramas(t)), key=lambda a: -1 if a is None else len(a))
+        if listas[0] is None:
+            return np.empty(0, dtype=np.int32)
+        cand = listas[0]
+        for lst in listas[1:]:
+            cand = np.intersect1d(cand, lst, assume_unique=True)
+            if not len(cand):
+                return cand
+        # Trigramas em comum não garantem a ordem: confirma a substring nos candidatos
+        return np.array([i for i in cand if t in self._fold[i]], dtype=np.int32)
+
+    def prefixo(self, termo: str) -> np.ndarray:
+        """Cada palavra do termo é início de alguma palavra do nome ("tub ed" -> "Tubo EDTA")."""
+        res = None
+        for tok in fold(termo).split():
+            lo = np.searchsorted(self._palavras, tok, side="left")
+            hi = np.searchsorted(self._palavras, tok + "\uffff", side="left")
+            ids = np.unique(self._palavra_id[lo:hi])
+            res = ids if res is None else np.intersect1d(res, ids, assume_unique=True)
+            if not len(res):
+                break
+        return res if res is not None else np.arange(len(self), dtype=np.int32)
+
+    def aproximada(self, termo: str, minimo: float = SIMILARIDADE_MIN) -> np.ndarray:
+        """Similaridade de trigramas (tolera erros de digitação), do mais parecido ao menos."""
+        t = fold(termo)
+        tris = _trigramas(t)
+        if not tris:
+            return self.contem(termo)
+        hits = [self._postings[g] for g in tris if g in self._postings]
+        if not hits:
+            return np.empty(0, dtype=np.int32)
+        comuns = np.bincount(np.concatenate(hits), minlength=len(self))
+        cand = np.flatnonzero(comuns >= minimo * len(tris))
+        # Ordena pela semelhança do nome inteiro (nomes curtos e parecidos primeiro)
+        sim = comuns[cand] / (len(tris) + self._ntri[cand] - comuns[cand])
+        return cand[np.argsort(-sim, kind="stable")].astype(np.int32)
+
+    def buscar(self, termo: str, modo: str = "contem") -> np.ndarray:
+        if not termo.strip():
+            return np.arange(len(self), dtype=np.int32)
+        return getattr(self, modo)(termo)
+
+    def nomes(self, termo: str, modo: str = "contem") -> list:
+        return [self.valores[i] for i in self.buscar(termo, modo)]
+
+
+@lru_cache(maxsize=8)
+def indice_para(valores: tuple) -> SearchIndex:
+    """Índice para uma lista de nomes (ex.: domínio vindo do banco no modo de consultas)."""
+    return SearchIndex(valores)
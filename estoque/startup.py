@@ -0,0 +1,104 @@
+# estoque/startup.py
+# -*- coding: utf-8 -*-
+"""Imports pesados sob demanda, aquecimento no servidor e perfil de inicialização por página."""
+
+import importlib
+import sys
+import threading
+import time
+import types
+
+import streamlit as st
+
+# Importados em segundo plano quando o processo sobe (ordem: dependências primeiro)
+PESADOS = ("numpy", "pandas", "pyarrow", "plotly.express", "oracledb")
+
+_lock = threading.Lock()
+_local = threading.local()
+_imports = {}    # módulo -> {"ms", "onde"}
+_paginas = {}    # página -> {"primeiro_ms", "ultimo_ms", "execucoes", "imports_ms"}
+
+
+def _importar(nome: str, onde: str = None) -> types.ModuleType:
+    atual = sys.modules.get(nome)
+    novo = atual is None or getattr(getattr(atual, "__spec__", None), "_initializing", False)
+    t0 = time.perf_counter()
+    # Sempre via import_module: se outra thread (o aquecimento) ainda está importando,
+    # espera o módulo terminar em vez de devolver um módulo pela metade
+    mod = importlib.import_module(nome)
+    if not novo:
+        return mod
+    ms = (time.perf_counter() - t0) * 1000
+    onde = onde or getattr(_local, "pagina", None) or "?"
+    with _lock:
+        # Se o aquecimento já tinha começado este módulo, fica registrada a espera da página
+        _imports.setdefault(nome, {"ms": round(ms, 1), "onde": onde})
+        if onde in _paginas:
+            _paginas[onde]["imports_ms"] += ms
+    return mod
+
+
+class _Adiado(types.ModuleType):
+    """Módulo que só é importado no primeiro acesso a um atributo (`px.bar`, `pd.DataFrame`…)."""
+
+    def __init__(self, nome: str):
+        super().__init__(nome)
+        self.__dict__["_nome"] = nome
+
+    def __getattr__(self, attr):
+        mod = self.__dict__.get("_mod")
+        if mod is None:
+            mod = self.__dict__["_mod"] = _importar(self.__dict__["_nome"])
+        return getattr(mod, attr)
+
+    def __repr__(self) -> str:
+        return f"<módulo adiado {self.__dict__['_nome']!r}>"
+
+
+def lazy(nome: str) -> types.ModuleType:
+    """Módulo pesado para uso no topo das páginas: só é importado quando usado de fato."""
+    return _Adiado(nome)
+
+
+def _aquecer_todos():
+    for nome in PESADOS:
+        try:
+            _importar(nome, onde="aquecimento")
+        except Exception:
+            pass   # dependência opcional ausente (ex.: oracledb): a página trata quando precisar
+
+
+@st.cache_resource(show_spinner=False)
+def aquecer() -> threading.Thread:
+    """Uma vez por processo: importa `PESADOS` numa thread, enquanto a 1ª página já renderiza."""
+    t = threading.Thread(target=_aquecer_todos, name="estoque-aquecimento", daemon=True)
+    t.start()
+    return t
+
+
+def comecar(pagina: str) -> None:
+    _local.pagina = pagina
+    _local.t0 = time.perf_counter()
+    with _lock:
+        _paginas.setdefault(pagina, {"primeiro_ms": None, "ultimo_ms": None, "execucoes": 0, "imports_ms": 0.0})
+
+
+def terminar() -> float:
+    """Fecha a medição da execução atual da página; devolve a duração em ms."""
+    ms = (time.perf_counter() - _local.t0) * 1000
+    with _lock:
+        p = _paginas[_local.pagina]
+        p["execucoes"] += 1
+        p["ultimo_ms"] = round(ms, 1)
+        if p["primeiro_ms"] is None:
+            p["primeiro_ms"] = p["ultimo_ms"]
+    return ms
+
+
+def perfil() -> dict:
+    """Cópia do perfil do processo: tempos por página e de cada import pesado."""
+    with _lock:
+        return {
+            "paginas": {k: dict(v, imports_ms=round(v["imports_ms"], 1)) for k, v in _paginas.items()},
+            "imports": {k: dict(v) for k, v in _imports.items()},
+        }
@@ -0,0 +1,113 @@
+# estoque/synthetic.py
+# -*- coding: utf-8 -*-
+"""Tabela INSUMOS sintética (tamanho de produção) para os bancos locais.
+
+Uso: python -m estoque.synthetic --linhas 1000000 --parquet dados/insumos.parquet --sqlite dados/insumos.db
+"""
+
+import argparse
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASES = [
+    "Seringa", "Agulha", "Tubo EDTA", "Tubo citrato", "Tubo soro gel", "Swab estéril", "Luva nitrílica",
+    "Álcool 70%", "Gaze estéril", "Lanceta", "Coletor universal", "Frasco hemocultura", "Ponteira",
+    "Lâmina", "Garrote", "Curativo", "Máscara cirúrgica", "Reagente glicose", "Reagente PCR", "Cubeta",
+]
+VARIANTES = ["1ml", "3ml", "5ml", "10ml", "4ml", "2ml", "25G", "21G", "P", "M", "G", "c/100", "c/50", "adulto", "infantil"]
+EXAMES = [
+    "Hemograma", "PCR", "Glicemia", "Urina tipo I", "Coagulograma", "TSH", "Colesterol total", "Creatinina",
+    "Hemocultura", "COVID-19 RT-PCR", "Ferritina", "Vitamina D", "Ureia", "TGO", "TGP", "Hemoglobina glicada",
+]
+
+
+def _nomes(n: int, rng) -> np.ndarray:
+    """`n` nomes distintos de insumo (base + variante + fornecedor quando precisa de mais)."""
+    nomes = [f"{b} {v}" for b in BASES for v in VARIANTES]
+    rng.shuffle(nomes)
+    k = 1
+    while len(nomes) < n:
+        nomes += [f"{b} {v} (fornecedor {k})" for b in BASES for v in VARIANTES]
+        k += 1
+    return np.array(nomes[:n], dtype=object)
+
+
+def gerar(linhas: int = 1_000_000, insumos: int = 2000, exames: int = 40, seed: int = 42,
+          sujeira: float = 0.0) -> pd.DataFrame:
+    """Linhas com popularidade de cauda longa (Zipf) por insumo e por exame.
+
+    `sujeira` é a fração de linhas com espaços extras e QUANTIDADE textual/inválida,
+    para exercitar o TRIM e a coerção numérica feitos no SELECT.
+    """
+    rng = np.random.default_rng(seed)
+    nomes = _nomes(insumos, rng)
+    nomes_ex = np.array((EXAMES + [f"Exame {i}" for i in range(len(EXAMES), exames)])[:exames], dtype=object)
+
+    def zipf(k):
+        p = 1.0 / np.arange(1, k + 1) ** 1.1
+        return p / p.sum()
+
+    i = rng.choice(insumos, size=linhas, p=zipf(insumos))
+    e = rng.choice(exames, size=linhas, p=zipf(exames))
+    # Quantidade com escala própria por insumo (caixas grandes vs. itens unitários)
+    escala = rng.lognormal(2.5, 1.0, insumos)
+    q = rng.poisson(escala[i]).astype("int64")
+
+    df = pd.DataFrame({"INSUMO": nomes[i], "QUANTIDADE": q, "EXAME": nomes_ex[e]})
+    if sujeira > 0:
+        sujo = rng.random(linhas) < sujeira
+        df["INSUMO"] = np.where(sujo, "  " + df["INSUMO"] + " ", df["INSUMO"])
+        qtxt = df["QUANTIDADE"].astype(str)
+        ruido = rng.choice(np.array(["", "n/d", "abc"], dtype=object), size=linhas)
+        df["QUANTIDADE"] = np.where(sujo & (rng.random(linhas) < 0.5), ruido, qtxt)
+    return df
+
+
+def salvar_parquet(df: pd.DataFrame, caminho) -> Path:
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    tmp = caminho.with_suffix(".tmp")
+    df.to_parquet(tmp, index=False, row_group_size=100_000)
+    tmp.replace(caminho)
+    return caminho
+
+
+def salvar_sqlite(df: pd.DataFrame, caminho, lote: int = 100_000) -> Path:
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    tmp = caminho.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+    tipo_q = "INTEGER" if pd.api.types.is_integer_dtype(df["QUANTIDADE"]) else "TEXT"
+    with sqlite3.connect(tmp) as conn:
+        conn.execute(f"CREATE TABLE INSUMOS (INSUMO TEXT, QUANTIDADE {tipo_q}, EXAME TEXT)")
+        cols = [df[c].tolist() for c in ("INSUMO", "QUANTIDADE", "EXAME")]
+        for ini in range(0, len(df), lote):
+            conn.executemany("INSERT INTO INSUMOS VALUES (?, ?, ?)",
+                             zip(*(c[ini:ini + lote] for c in cols)))
+    tmp.replace(caminho)
+    return caminho
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--linhas", type=int, default=1_000_000)
+    ap.add_argument("--insumos", type=int, default=2000)
+    ap.add_argument("--exames", type=int, default=40)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--sujeira", type=float, default=0.0)
+    ap.add_argument("--parquet")
+    ap.add_argument("--sqlite")
+    args = ap.parse_args(argv)
+
+    df = gerar(args.linhas, args.insumos, args.exames, args.seed, args.sujeira)
+    if args.parquet:
+        print("Parquet:", salvar_parquet(df, args.parquet))
+    if args.sqlite:
+        print("SQLite:", salvar_sqlite(df, args.sqlite))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# estoque/unidades.py
+# -*- coding: utf-8 -*-
+"""Várias unidades (um schema por laboratório): lista/padrão de schemas, carga paralela e união."""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from estoque.dataset import InsumosDataset, _downcast
+from estoque.query import _ident
+
+# Donos de uma tabela INSUMOS visível para o usuário conectado (padrão LIKE em :p)
+SQL_SCHEMAS = ("SELECT OWNER FROM ALL_TABLES WHERE TABLE_NAME = 'INSUMOS' AND OWNER LIKE :p ESCAPE '\\' "
+               "ORDER BY OWNER")
+_SEPARADORES = re.compile(r"[\s,;]+")
+
+
+def parse_schemas(texto: str) -> tuple:
+    """"RM1, RM2; LAB_%" -> ("RM1", "RM2", "LAB_%"): nomes e padrões (`%`/`*`) em maiúsculas."""
+    return tuple(t for t in _SEPARADORES.split((texto or "").strip().upper()) if t)
+
+
+def eh_padrao(token: str) -> bool:
+    return "%" in token or "*" in token
+
+
+def resolver(tokens, listar) -> tuple:
+    """Expande os padrões com `listar(padrao_like)` e valida cada schema (sem repetir, na ordem)."""
+    vistos = {}
+    for t in tokens:
+        if eh_padrao(t):
+            like = t.replace("_", "\\_").replace("*", "%")
+            nomes = listar(like)
+        else:
+            nomes = [t]
+        for n in nomes:
+            vistos.setdefault(_ident(n), None)
+    return tuple(vistos)
+
+
+def _medido(fn, schema):
+    t0 = time.perf_counter()
+    try:
+        r, erro = fn(schema), None
+    except Exception as e:   # uma unidade com problema não derruba as outras
+        r, erro = None, e
+    return r, erro, (time.perf_counter() - t0) * 1000
+
+
+def paralelo(schemas, fn, max_workers: int) -> tuple:
+    """Roda `fn(schema)` para todos os schemas ao mesmo tempo (até `max_workers` threads).
+
+    Devolve ({schema: resultado ou None}, relatório por schema, ms total). Com uma
+    conexão do pool por thread, o total fica perto do schema mais lento, não da soma.
+    Schemas com erro ficam com None e o erro no relatório; se todos falharem, a
+    exceção do primeiro é relançada (ex.: credencial bloqueada vale para todos).
+    """
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(schemas))),
+                            thread_name_prefix="estoque-unidade") as ex:
+        futuros = {s: ex.submit(_medido, fn, s) for s in schemas}
+        resultados, relatorio, erros = {}, [], []
+        for s, fut in futuros.items():
+            r, erro, ms = fut.result()
+            resultados[s] = r
+            relatorio.append({"schema": s, "ms": round(ms, 1), "erro": f"{type(erro).__name__}: {erro}" if erro else None})
+            if erro is not None:
+                erros.append(erro)
+    if erros and len(erros) == len(schemas):
+        raise erros[0]
+    return resultados, relatorio, (time.perf_counter() - t0) * 1000
+
+
+def unir(dados: dict) -> InsumosDataset:
+    """Um dataset com todas as unidades e a coluna categórica UNIDADE (o schema de origem).
+
+    Os dicionários de INSUMO/EXAME são unidos sem voltar ao texto; com uma unidade só,
+    o dataset dela é devolvido como está (sem a coluna UNIDADE).
+    """
+    dados = {s: ds for s, ds in dados.items() if ds is not None}
+    if len(dados) == 1:
+        return next(iter(dados.values()))
+    dfs = [ds.df for ds in dados.values()]
+    out = {}
+    for c in ("INSUMO", "EXAME"):
+        out[c] = union_categoricals([df[c] for df in dfs], ignore_order=True)
+    out["QUANTIDADE"] = _downcast(pd.concat([df["QUANTIDADE"] for df in dfs], ignore_index=True))
+    tamanhos = [len(df) for df in dfs]
+    out["UNIDADE"] = pd.Categorical.from_codes(np.repeat(np.arange(len(dfs)), tamanhos), categories=list(dados))
+    return InsumosDataset(pd.DataFrame(out, index=pd.RangeIndex(sum(tamanhos))))
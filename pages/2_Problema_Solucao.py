@@ -1,47 +1,22 @@
 # pages/2_Problema_Solucao.py
 # -*- coding: utf-8 -*-
 
+from pathlib import Path
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import base64
-
-# --- FUNÇÃO DE BACKGROUND ---
-def set_background_image_with_blur(image_file):
-    with open(image_file, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode()
-    st.markdown(
-        f"""
-        <style>
-        [data-testid="stAppViewContainer"] {{
-            position: relative;
-            z-index: 0;
-        }}
-        [data-testid="stAppViewContainer"]::before {{
-            content: "";
-            background-image: url("data:image/png;base64,{encoded}");
-            background-size: cover;
-            background-repeat: no-repeat;
-            background-attachment: fixed;
-            background-position: center;
-            filter: blur(8px) brightness(0.5);
-            position: absolute;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            z-index: -1;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
 
-set_background_image_with_blur("BackGround/Dasa.png")
+from estoque import graficos
+from estoque.bootstrap import finalizar_pagina, iniciar_pagina
+from estoque.startup import lazy
+
+# Importados no primeiro uso (normalmente já aquecidos pelo processo)
+pd = lazy("pandas")
+np = lazy("numpy")
+px = lazy("plotly.express")
+conciliacao = lazy("estoque.conciliacao")   # traz pandas/numpy: também só no primeiro uso
 
 # ----------------- Config -----------------
-st.set_page_config(
+iniciar_pagina(
     page_title="Problema & Solução Detalhados | Estoque Inteligente (QR → ML)",
     page_icon="📊",
     layout="wide",
@@ -65,10 +40,15 @@ dados_base = pd.DataFrame({
     "Mínimo Operacional": [80, 50, 150, 120, 50],
 })
 
-# Apenas a tabela de RESULTADO (sem a primeira tabela editável)
+# Apenas a tabela de RESULTADO (sem a primeira tabela editável), com as regras da conciliação completa
+aud = conciliacao.avaliar(
+    dados_base.rename(columns={"Insumo": "SKU", "Estoque SAP": "SAP", "Mínimo Operacional": "MINIMO"})
+    [["SKU", "SAP", "MINIMO"]].assign(UNIDADE=""),
+    dados_base.rename(columns={"Insumo": "SKU", "Estoque Real": "REAL"})[["SKU", "REAL"]].assign(UNIDADE=""),
+).set_index("SKU")
 df = dados_base.copy()
-df["Delta (Real - SAP)"] = df["Estoque Real"] - df["Estoque SAP"]
-df["Abaixo do Mínimo?"] = np.where(df["Estoque Real"] < df["Mínimo Operacional"], "⚠️ Sim", "OK")
+df["Delta (Real - SAP)"] = df["Insumo"].map(aud["DELTA"])
+df["Abaixo do Mínimo?"] = np.where(df["Insumo"].map(aud["ABAIXO_MINIMO"]), "⚠️ Sim", "OK")
 
 st.markdown("**Resultado da auditoria:**")
 st.dataframe(df, use_container_width=True)
@@ -80,7 +60,46 @@ fig = px.bar(
     x="Insumo", y="Quantidade", color="Origem", barmode="group",
     title="Comparativo de Estoque: SAP × Real"
 )
-st.plotly_chart(fig, use_container_width=True)
+graficos.mostrar(fig)
+
+with st.expander("🔎 Auditoria completa: export do SAP × contagem física de todas as unidades"):
+    st.caption("Os dois arquivos (CSV ou Parquet com SKU, UNIDADE, QUANTIDADE e, no SAP, MINIMO) são lidos "
+               "em lotes, repartidos por hash de SKU/unidade e conciliados em paralelo, um processo por núcleo. "
+               "Dados de exemplo: `python -m estoque.conciliacao --gerar 500000`.")
+    a1, a2 = st.columns(2)
+    arq_sap = a1.text_input("Export do SAP", str(conciliacao.PASTA / "sap.parquet"))
+    arq_fis = a2.text_input("Contagem física", str(conciliacao.PASTA / "fisico.parquet"))
+    t1, t2 = st.columns(2)
+    tol_abs = t1.number_input("Tolerância (unidades)", min_value=0, value=0)
+    tol_rel = t2.number_input("Tolerância (% do SAP)", min_value=0.0, max_value=100.0, value=0.0, step=1.0)
+    if st.button("Conciliar"):
+        from estoque.conciliacao import Regras, conciliar
+
+        faltando = [a for a in (arq_sap, arq_fis) if not Path(a).exists()]
+        if faltando:
+            st.warning(f"Arquivo não encontrado: {', '.join(faltando)}")
+        else:
+            with st.spinner("Conciliando…"):
+                st.session_state["conciliacao"] = conciliar(arq_sap, arq_fis, Regras(tol_abs, tol_rel / 100),
+                                                            saida=conciliacao.PASTA / "saida")
+    r = st.session_state.get("conciliacao")
+    if r is not None:
+        def _n(v):
+            return f"{v:,}".replace(",", ".")
+
+        res = r.resumo
+        k1, k2, k3, k4 = st.columns(4)
+        k1.metric("Pares SKU × unidade", _n(res["chaves"]))
+        k2.metric("Divergentes", _n(res["divergentes"]), help=f"{res['divergentes'] / max(res['chaves'], 1):.1%} dos pares")
+        k3.metric("Abaixo do mínimo", _n(res["abaixo_minimo"]))
+        k4.metric("Δ total (Real - SAP)", _n(res["soma_delta"]), help=f"Soma de |Δ|: {_n(res['soma_abs_delta'])}")
+        st.markdown(f"**Maiores divergências** ({_n(res['so_sap'])} pares só no SAP, "
+                    f"{_n(res['so_fisico'])} só na contagem):")
+        st.dataframe(r.maiores, use_container_width=True, hide_index=True)
+        linhas = res["linhas_sap"] + res["linhas_fisico"]
+        st.caption(f"{_n(linhas)} linhas em {r.etapas['total'] / 1000:.1f} s "
+                   f"({_n(round(linhas / (r.etapas['total'] / 1000)))} linhas/s)"
+                   + (f"; divergências gravadas em `{r.saida}`." if r.saida else "."))
 
 # ============================================================
 # 2) Como o processo funciona: Hoje vs Automatizado (QR → ML)
@@ -154,3 +173,5 @@ st.markdown(
 
 st.divider()
 st.caption("Esta página aprofunda a dor com dados, explica o porquê das divergências e mostra como o fluxo QR → ML resolve a raiz do problema — sem repetir a Introdução.")
+
+finalizar_pagina()
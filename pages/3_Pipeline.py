@@ -3,45 +3,15 @@
 
 import streamlit as st
 import time
-import base64
-
-# --- FUNÇÃO DE BACKGROUND ---
-    
-def set_background_image_with_blur(image_file):
-    with open(image_file, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode()
-    st.markdown(
-        f"""
-        <style>
-        [data-testid="stAppViewContainer"] {{
-            position: relative;
-            z-index: 0;
-        }}
-        [data-testid="stAppViewContainer"]::before {{
-            content: "";
-            background-image: url("data:image/png;base64,{encoded}");
-            background-size: cover;
-            background-repeat: no-repeat;
-            background-attachment: fixed;
-            background-position: center;
-            filter: blur(8px) brightness(0.5);
-            position: absolute;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            z-index: -1;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
-    
-    
-set_background_image_with_blur("BackGround/Dasa.png")
+
+from estoque.alertas import alertas_padrao
+from estoque.assets import imagem
+from estoque.bootstrap import finalizar_pagina, iniciar_pagina
+from estoque.eventos import CATALOGO, Evento, carga, ingestor_padrao, ingestor_rajada, ler_qr
+from estoque.saldos import saldos_padrao
 
 # ----------------- Config -----------------
-st.set_page_config(
+iniciar_pagina(
     page_title="Pipeline da Solução | Estoque Inteligente (QR → ML)",
     page_icon="🔄",
     layout="wide",
@@ -82,7 +52,7 @@ st.divider()
 # ----------------- Inserindo a imagem -----------------
 st.subheader("📸 Exemplo ilustrativo do pipeline em ação")
 st.image(
-    "images/camera_qr.png",
+    imagem("images/camera_qr.png", 700),  # variante de 800px em vez da PNG cheia
     caption="Câmera captando insumo com QR Code no almoxarifado",
     width=700  # 🔽 ajusta a largura da imagem
 )
@@ -91,28 +61,100 @@ st.image(
 # ----------------- Simulação Interativa -----------------
 st.subheader("▶️ Simulação do Pipeline")
 
-if st.button("Executar pipeline passo a passo"):
-    with st.spinner("1️⃣ Capturando imagem..."):
-        time.sleep(1.2)
-    st.success("✅ Imagem capturada pela câmera.")
-
-    with st.spinner("2️⃣ Reconhecendo insumo..."):
-        time.sleep(1.2)
-    st.success("✅ Insumo identificado: *Seringa 5ml* (via QR).")
-
-    with st.spinner("3️⃣ Aplicando regras de negócio..."):
-        time.sleep(1.2)
-    st.success("✅ Baixa registrada (1 unidade).")
+sku = st.selectbox("Insumo que passa pela câmera", list(CATALOGO), format_func=lambda s: f"{s} ({CATALOGO[s]})")
 
-    with st.spinner("4️⃣ Atualizando estoque..."):
-        time.sleep(1.2)
-    st.success("✅ Estoque atualizado: 99 unidades restantes.")
-
-    with st.spinner("5️⃣ Exibindo no painel..."):
-        time.sleep(1.2)
-    st.success("✅ Painel atualizado com alerta: Estoque próximo do mínimo.")
-
-st.info("Essa simulação demonstra como o fluxo automatizado elimina erros e atualiza o sistema em tempo real.")
+if st.button("Executar pipeline passo a passo"):
+    ing, saldos, alertas = ingestor_padrao(), saldos_padrao(), alertas_padrao()
+    etiqueta = f"SKU={sku};CAM=CAM-PIPE-01"
+    st.success(f"1️⃣ Imagem capturada pela câmera `CAM-PIPE-01`: etiqueta `{etiqueta}`.")
+
+    sku = ler_qr(etiqueta)
+    st.success(f"2️⃣ Insumo identificado: *{CATALOGO[sku]}* ({sku}, via QR).")
+
+    ev = Evento.de_dict({"sku": sku, "acao": "BAIXA", "quantidade": 1, "camera": "CAM-PIPE-01"})
+    st.success(f"3️⃣ Regras aplicadas: **{ev.acao}** de {ev.quantidade} unidade.")
+
+    with st.spinner("4️⃣ Gravando o evento…"):
+        gravado = ing.aguardar(ing.registrar(ev))
+    if gravado:
+        st.success(f"4️⃣ Evento `{ev.id[:8]}` gravado em {ing.destino.descricao} "
+                   f"{(time.time() - ev.ts) * 1000:.0f} ms após a leitura. Estoque atualizado: "
+                   f"{saldos.saldo(sku, ev.local)} unidade(s) de {sku} em {ev.local}.")
+        if alertas.abaixo(sku):
+            st.warning(f"⚠️ {sku} abaixo do mínimo operacional ({alertas.minimos[sku]}): alerta de ruptura disparado.")
+    else:
+        st.warning(f"4️⃣ Evento no log local; o banco ainda não confirmou ({ing.metricas()['erro']}).")
+
+    m = ing.metricas()
+    gravados = f"{m['gravados']:,}".replace(",", ".")
+    st.success(f"5️⃣ Painel: {gravados} eventos gravados por este servidor, {m['pendentes']} aguardando o próximo lote.")
+
+st.info("Cada leitura vira um evento (instante, SKU, ação, câmera) gravado em lotes: é o que alimenta o estoque em tempo real.")
+
+# ----------------- Vazão da ingestão -----------------
+st.subheader("⚡ Rajada de leituras (várias câmeras)")
+c1, c2 = st.columns(2)
+cameras = c1.slider("Câmeras simultâneas", 1, 100, 40)
+n_eventos = c2.slider("Leituras na rajada", 100, 20_000, 5_000, 100)
+if st.button("Disparar rajada"):
+    ing = ingestor_rajada()   # banco próprio: as leituras sintéticas não entram nos saldos
+    with st.spinner(f"{n_eventos:,} leituras de {cameras} câmeras…".replace(",", ".")):
+        t0 = time.perf_counter()
+        carga(lambda ev: ing.registrar(ev), cameras, n_eventos)
+        ing.aguardar(ing.registrar())
+        s = time.perf_counter() - t0
+    m = ing.metricas()
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Eventos/s (rajada)", f"{n_eventos / s:,.0f}".replace(",", "."),
+              help=f"{n_eventos / s * 60:,.0f} leituras por minuto".replace(",", "."))
+    k2.metric("Lag p50 (ms)", f"{m['lag_p50_ms']:.0f}", help="Da leitura na câmera ao commit no banco")
+    k3.metric("Lag p95 (ms)", f"{m['lag_p95_ms']:.0f}")
+    k4.metric("Lote médio", f"{m['lote_medio']:.0f}", help=f"{m['lotes']} lotes (executemany) no último minuto")
+    st.caption(f"Destino: {m['destino']} (separado do razão: saldos, alertas e previsão não mudam). "
+               f"Eventos reenviados do log ao iniciar: {m['reenviados']}.")
+
+# ----------------- Saldos -----------------
+st.subheader("📦 Saldos em tempo real")
+saldos = saldos_padrao()
+saldos.atualizar()   # eventos gravados por outro processo (ex.: `python -m estoque.eventos servir`)
+tabela = saldos.tabela()
+if not tabela:
+    st.info("Nenhum movimento registrado ainda: execute o pipeline passo a passo.")
+else:
+    import pandas as pd
+
+    df_saldos = pd.DataFrame(tabela, columns=["SKU", "Local", "Saldo"])
+    df_saldos.insert(1, "Insumo", df_saldos["SKU"].map(CATALOGO))
+    st.dataframe(df_saldos.pivot_table(index=["SKU", "Insumo"], columns="Local", values="Saldo", fill_value=0),
+                 use_container_width=True)
+    p = saldos.partida
+    posicao, base, reaplicados = (f"{v:,}".replace(",", ".") for v in (saldos.posicao, p["snapshot"], p["reaplicados"]))
+    st.caption(f"Saldos mantidos em memória a partir do razão de eventos (posição {posicao}); "
+               f"partida a frio a partir do snapshot da posição {base}, reaplicando "
+               f"{reaplicados} eventos em {p['ms']:.0f} ms.")
+
+# ----------------- Alertas -----------------
+st.subheader("🚨 Alertas de mínimo e validade (FEFO)")
+alertas = alertas_padrao()
+ativos = alertas.ativos()
+a1, a2, a3 = st.columns(3)
+a1.metric("Abaixo do mínimo", sum(a["tipo"] == "mínimo" for a in ativos))
+a2.metric("Lotes vencidos", sum(a["tipo"] == "vencido" for a in ativos))
+a3.metric(f"Vencendo em {alertas.antecedencia} dias", sum(a["tipo"] == "validade" for a in ativos))
+if ativos:
+    import pandas as pd
+
+    st.dataframe(pd.DataFrame(ativos).drop(columns="desde").rename(columns=str.capitalize),
+                 use_container_width=True, hide_index=True)
+proximos = alertas.proximos(10)
+if proximos:
+    st.markdown("**Próximos lotes a vencer** (a baixa sem lote consome estes primeiro):")
+    st.table([{"Validade": v or "—", "SKU": s, "Insumo": CATALOGO.get(s, ""), "Lote": l, "Saldo": q}
+              for v, s, l, q in proximos])
+st.caption("Cada evento reavalia só o SKU e os lotes que ele tocou: índice dos SKUs abaixo do mínimo e "
+           f"heap de vencimentos ({alertas.stats()['avaliacoes']} avaliações desde a partida).")
 
 # ----------------- Navegação -----------------
 st.divider()
+
+finalizar_pagina()
@@ -3,45 +3,18 @@
 
 import streamlit as st
 import json
-import base64
-
-# --- FUNÇÃO DE BACKGROUND ---
-    
-def set_background_image_with_blur(image_file):
-    with open(image_file, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode()
-    st.markdown(
-        f"""
-        <style>
-        [data-testid="stAppViewContainer"] {{
-            position: relative;
-            z-index: 0;
-        }}
-        [data-testid="stAppViewContainer"]::before {{
-            content: "";
-            background-image: url("data:image/png;base64,{encoded}");
-            background-size: cover;
-            background-repeat: no-repeat;
-            background-attachment: fixed;
-            background-position: center;
-            filter: blur(8px) brightness(0.5);
-            position: absolute;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            z-index: -1;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
-    
-    
-set_background_image_with_blur("BackGround/Dasa.png")
+from datetime import date, timedelta
+
+from estoque.assets import icone
+from estoque.bootstrap import finalizar_pagina, iniciar_pagina
+from estoque.eventos import CATALOGO, ingestor_padrao
+from estoque.saldos import saldos_padrao
+from estoque.startup import lazy
+
+previsao = lazy("estoque.previsao")   # numpy/pandas: só quando a prévia é calculada
 
 # ========= Config =========
-st.set_page_config(
+iniciar_pagina(
     page_title="Roadmap | Estoque Inteligente (QR → ML)",
     page_icon="🛣️",
     layout="wide",
@@ -74,7 +47,7 @@ try:
                     "text": "Leitura QR/Barcode via câmera<br>Registro automático entrada/saída<br>Painel local em tempo real"
                 },
                 "media": {
-                    "url": "https://cdn-icons-png.flaticon.com/512/2972/2972185.png",
+                    "url": icone("fase1_qr.svg"),
                     "caption": "Fase 1: Automação com QR/Barcode"
                 }
             },
@@ -85,7 +58,7 @@ try:
                     "text": "Machine Learning para reconhecer insumos pela embalagem<br>Menos dependência de QR<br>Mais automação, menos erro humano"
                 },
                 "media": {
-                    "url": "https://cdn-icons-png.flaticon.com/512/4712/4712109.png",
+                    "url": icone("fase2_ml.svg"),
                     "caption": "Fase 2: Machine Learning detectando insumos"
                 }
             },
@@ -96,7 +69,7 @@ try:
                     "text": "Integração com SAP/ERP DASA<br>Atualização em tempo real<br>Alertas automáticos de reposição e validade"
                 },
                 "media": {
-                    "url": "https://cdn-icons-png.flaticon.com/512/3209/3209265.png",
+                    "url": icone("fase3_erp.svg"),
                     "caption": "Fase 3: Integração SAP/ERP"
                 }
             },
@@ -107,7 +80,7 @@ try:
                     "text": "Dashboards avançados<br>IA preditiva para prever rupturas<br>Otimização de compras e custos"
                 },
                 "media": {
-                    "url": "https://cdn-icons-png.flaticon.com/512/1828/1828884.png",
+                    "url": icone("fase4_dashboard.svg"),
                     "caption": "Fase 4: Dashboards inteligentes com IA preditiva"
                 }
             }
@@ -131,5 +104,50 @@ except:
         st.markdown(desc)
         st.divider()
 
+# ========= Prévia da fase 4 =========
+st.subheader("🔮 Prévia da fase 4: previsão de ruptura")
+st.markdown("Com o histórico de baixas do razão de eventos, cada insumo ganha um modelo leve de consumo "
+            "(**suavização exponencial** para demanda regular, **Croston** para demanda intermitente) e, "
+            "a partir do saldo atual, os **dias até a ruptura** e a **sugestão de pedido**.")
+DIAS_HIST = 90
+if st.toggle("Calcular a previsão com o histórico atual",
+             help="Lê o razão de eventos e ajusta os modelos; a página do roadmap fica leve sem isso."):
+    c1, c2, c3 = st.columns(3)
+    lead = c1.slider("Lead time (dias)", 1, 30, previsao.PREVISAO_DEFAULTS["lead_time_dias"])
+    cobertura = c2.slider("Cobertura do pedido (dias)", 7, 60, previsao.PREVISAO_DEFAULTS["cobertura_dias"])
+    nivel = c3.select_slider("Nível de serviço", [0.8, 0.9, 0.95, 0.98, 0.99],
+                             previsao.PREVISAO_DEFAULTS["nivel_servico"], format_func=lambda v: f"{v:.0%}")
+
+    skus, y = previsao.historico(ingestor_padrao().destino.consumo_diario(date.today() - timedelta(days=DIAS_HIST - 1)),
+                                 DIAS_HIST)
+    if len(skus) and (y.sum(axis=0) > 0).sum() >= 14:
+        saldos = saldos_padrao()
+        saldo = [saldos.saldo(s) for s in skus]
+        st.caption(f"Histórico real: baixas dos últimos {DIAS_HIST} dias no razão de eventos; saldos em tempo real.")
+    else:
+        _, y, saldo = previsao.gerar(len(CATALOGO), DIAS_HIST, seed=7)
+        skus = list(CATALOGO)
+        st.caption("Histórico **sintético** (o razão de eventos ainda tem menos de 14 dias de baixas).")
+
+    prev = previsao.prever(skus, y, saldo, lead, cobertura, nivel, processos=1)
+    prev.insert(1, "Insumo", prev["SKU"].map(CATALOGO))
+    prev["DIAS_ATE_RUPTURA"] = prev["DIAS_ATE_RUPTURA"].replace(float("inf"), None)
+    st.dataframe(
+        prev.drop(columns=["SIGMA", "PEDIR"]).rename(columns={
+            "MODELO": "Modelo", "CONSUMO_DIA": "Consumo/dia", "SALDO": "Saldo", "DIAS_ATE_RUPTURA": "Dias até ruptura",
+            "DATA_RUPTURA": "Ruptura prevista", "PONTO_PEDIDO": "Ponto de pedido", "SUGESTAO": "Sugestão de pedido"}),
+        use_container_width=True, hide_index=True,
+        column_config={c: st.column_config.NumberColumn(format="%.1f")
+                       for c in ("Consumo/dia", "Dias até ruptura", "Ponto de pedido")},
+    )
+    pedir = int(prev["PEDIR"].sum())
+    if pedir:
+        st.warning(f"{pedir} insumo(s) no ponto de pedido ou abaixo: a sugestão cobre {lead} + {cobertura} dias "
+                   f"com {nivel:.0%} de nível de serviço.")
+st.caption("Os modelos são vetorizados em todos os SKUs de uma vez; catálogos inteiros rodam em lote "
+           "(`python -m estoque.previsao --skus 200000` mede SKUs/s).")
+
 # ========= Conclusão =========
 st.success("✅ Este roadmap mostra que a solução começa simples (QR), já gera valor imediato e evolui até IA preditiva para uma gestão de estoque totalmente automatizada.")
+
+finalizar_pagina()
@@ -1,48 +1,31 @@
 # pages/5_Analise_SQL.py
 # -*- coding: utf-8 -*-
 
-import base64
+import os
+import time
 import pandas as pd
-import plotly.express as px
 import streamlit as st
 
+from estoque import graficos, unidades
+from estoque.assincrono import Executor
+from estoque.backends import Backend, OracleBackend, abrir_local
+from estoque.bootstrap import finalizar_pagina, iniciar_pagina
+from estoque.dataset import InsumosDataset
+from estoque.delta import MARCA_PADRAO, SnapshotStore
+from estoque.disco import CacheDisco, disco_config
+from estoque.export import FORMATOS, exportar
+from estoque.oracle import get_pool, make_dsn, pool_config
+from estoque.perf import anotar, etapa, fechar, latencias, medir, registrar, tamanho
+from estoque.query import COLUNAS, Filtros, FrameSource, SqlSource
+from estoque.search import MODOS
+from estoque.synthetic import gerar, salvar_parquet, salvar_sqlite
+
+
 # =========================
 # Config & estilo
 # =========================
-st.set_page_config(page_title="Análise via Oracle | Estoque Inteligente", page_icon="🗄️", layout="wide")
-
-def set_background_image_with_blur(image_file: str):
-    """Fundo com blur (leve e compatível)."""
-    try:
-        with open(image_file, "rb") as f:
-            encoded = base64.b64encode(f.read()).decode()
-        st.markdown(
-            f"""
-            <style>
-            [data-testid="stAppViewContainer"] {{
-                position: relative;
-                z-index: 0;
-            }}
-            [data-testid="stAppViewContainer"]::before {{
-                content: "";
-                background-image: url("data:image/png;base64,{encoded}");
-                background-size: cover;
-                background-repeat: no-repeat;
-                background-attachment: fixed;
-                background-position: center;
-                filter: blur(8px) brightness(0.5);
-                position: absolute;
-                inset: 0;
-                z-index: -1;
-            }}
-            </style>
-            """,
-            unsafe_allow_html=True
-        )
-    except Exception:
-        pass
-
-set_background_image_with_blur("BackGround/Dasa.png")
+_t_pagina = time.perf_counter()
+fundo = iniciar_pagina(page_title="Análise via Oracle | Estoque Inteligente", page_icon="🗄️")
 
 st.title("🗄️ Análise da Tabela de Insumos (Oracle)")
 
@@ -61,278 +44,609 @@ def read_secrets():
             "password": sec.get("password", ""),
             "schema": sec.get("schema", "RM556055"),
             "use_sid": bool(sec.get("use_sid", False)),
+            "pool": pool_config(sec),
+            "delta_col": sec.get("delta_col", MARCA_PADRAO),
+            "disco": disco_config(sec),
         }
     except Exception:
         return None
 
 defaults = read_secrets()
 
-# =========================
-# UI de conexão
-# =========================
-with st.expander("⚙️ Conexão ao Oracle", expanded=(defaults is None)):
-    c1, c2, c3 = st.columns([1, 0.6, 0.6])
-    host = c1.text_input("Host", value=(defaults["host"] if defaults else "oracle.fiap.com.br"))
-    port = c2.number_input("Porta", value=(defaults["port"] if defaults else 1521), step=1)
-    modo = c3.selectbox("Modo", ["Service Name (padrão)", "SID"],
-                        index=(1 if (defaults and defaults.get("use_sid")) else 0))
-
-    if modo.startswith("Service"):
-        service = st.text_input("Service Name", value=(defaults["service"] if defaults else "ORCL"))
-        sid = None
-    else:
-        sid = st.text_input("SID", value=(defaults["service"] if defaults else "ORCL"))
-        service = None
-
-    c4, c5, c6 = st.columns([0.7, 0.7, 0.7])
-    user = c4.text_input("Usuário", value=(defaults["user"] if defaults else "rm000000"))
-    password = c5.text_input("Senha", type="password", value=(defaults["password"] if defaults else ""))
-    schema = c6.text_input("Schema (OWNER)", value=(defaults["schema"] if defaults else "RM000000")).strip().upper()
-
-st.caption("Dica: use `.streamlit/secrets.toml` (seção [oracle]) para não digitar credenciais sempre.")
-
 # =========================
 # Conexão & consulta
 # =========================
-def _connect(_host, _port, _service, _sid, _user, _password):
-    import oracledb
-    if _sid:
-        dsn = oracledb.makedsn(_host, int(_port), sid=_sid)
-    else:
-        dsn = f"{_host}:{int(_port)}/{_service}"
-    return oracledb.connect(user=_user, password=_password, dsn=dsn)
-
-@st.cache_data(show_spinner=True)
-def query_insumos(_host, _port, _service, _sid, _user, _password, _schema) -> pd.DataFrame:
-    import oracledb
-    conn = _connect(_host, _port, _service, _sid, _user, _password)
-    sql = f"""
-        SELECT
-            INSUMO,
-            QUANTIDADE,
-            EXAME
-        FROM {_schema}.INSUMOS
+PAGINAS = [25, 50, 100, 250]  # opções de linhas por página do preview
+BANCOS = {"Oracle": "oracle", "SQLite (arquivo local)": "sqlite", "DuckDB (Parquet local)": "duckdb"}
+ARQUIVO_PADRAO = {"sqlite": "dados/insumos.db", "duckdb": "dados/insumos.parquet"}
+
+def _cx() -> dict:
+    """Parâmetros de conexão atuais (widgets do fragmento de conexão, via session_state)."""
+    s = st.session_state
+    banco = BANCOS[s.get("cx_banco", "Oracle")]
+    modo = s.get("cx_modo", "Service Name (padrão)")
+    return {
+        "banco": banco,
+        "arquivo": s.get(f"cx_arquivo_{banco}", ARQUIVO_PADRAO.get(banco)),
+        "host": s.get("cx_host"), "port": s.get("cx_port"),
+        "service": s.get("cx_service") if modo.startswith("Service") else None,
+        "sid": None if modo.startswith("Service") else s.get("cx_service"),
+        "user": s.get("cx_user"), "password": s.get("cx_password"),
+        "schema": (s.get("cx_schema") or "").strip().upper(),
+    }
+
+def _pool(_host, _port, _service, _sid, _user, _password):
+    """Pool compartilhado do processo (um por DSN/usuário): evita o handshake a cada consulta."""
+    cfg = defaults["pool"] if defaults else pool_config(None)
+    return get_pool(make_dsn(_host, _port, _service, _sid), _user, _password, **cfg)
+
+@st.cache_resource(show_spinner=False)
+def backend_local(tipo: str, caminho: str, mtime: int) -> Backend:
+    """Um backend por arquivo local (o mtime na chave descarta o de dados regerados)."""
+    return abrir_local(tipo, caminho)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def schemas_oracle(dsn: str, user: str, tokens: tuple, _pool) -> tuple:
+    """Schemas de `tokens`, com os padrões (RM%, LAB_*) expandidos em ALL_TABLES."""
+    return unidades.resolver(tokens, lambda p: _pool.query_df(unidades.SQL_SCHEMAS, {"p": p})["OWNER"].tolist())
+
+def _backend() -> Backend:
+    """Banco escolhido no fragmento de conexão: Oracle (pool) ou arquivo local."""
+    c = _cx()
+    if c["banco"] == "oracle":
+        pool = _pool(c["host"], c["port"], c["service"], c["sid"], c["user"], c["password"])
+        schemas = schemas_oracle(pool.dsn, pool.user, unidades.parse_schemas(c["schema"]), pool)
+        if not schemas:
+            raise FileNotFoundError(f"Nenhum schema com a tabela INSUMOS em `{c['schema']}`.")
+        return OracleBackend(pool, schemas if len(schemas) > 1 else schemas[0])
+    if not os.path.exists(c["arquivo"]):
+        raise FileNotFoundError(f"Arquivo `{c['arquivo']}` não encontrado: gere dados sintéticos primeiro.")
+    return backend_local(c["banco"], c["arquivo"], os.stat(c["arquivo"]).st_mtime_ns)
+
+@st.cache_resource
+def cache_disco() -> CacheDisco:
+    """Snapshots em `.cache/snapshots`, compartilhados entre processos/réplicas e reinícios."""
+    return CacheDisco(**(defaults["disco"] if defaults else disco_config(None)))
+
+@st.cache_resource
+def snapshot_store() -> SnapshotStore:
+    """Snapshots da tabela completa, compartilhados por todas as sessões do processo."""
+    return SnapshotStore(cache_disco())
+
+def _unidades(b: OracleBackend) -> tuple:
+    return (b.schema,) if isinstance(b.schema, str) else b.schema
+
+def _chave_snapshot(b: OracleBackend, schema: str) -> tuple:
+    """Banco + schema + a consulta que gerou o snapshot (a coluna de marca muda o SELECT)."""
+    return ("oracle", b.pool.dsn, b.pool.user, schema, defaults["delta_col"] if defaults else MARCA_PADRAO)
+
+def _carregado(b: OracleBackend) -> bool:
+    """Todas as unidades do backend já têm snapshot (pré-requisito do refresh incremental)."""
+    return all(snapshot_store().get(_chave_snapshot(b, s)) is not None for s in _unidades(b))
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def uniao(versoes: tuple, _snaps: dict) -> InsumosDataset:
+    """Dataset de várias unidades (chave = schema/versão de cada snapshot), compartilhado pelas sessões."""
+    anotar(uniao="miss")
+    return unidades.unir({s: snap.dados for s, snap in _snaps.items()})
+
+def _juntar(snaps: dict) -> InsumosDataset:
+    snaps = {s: snap for s, snap in snaps.items() if snap is not None}
+    if len(snaps) == 1:
+        return next(iter(snaps.values())).dados
+    return uniao(tuple((s, snap.versao, snap.carregado_em) for s, snap in snaps.items()), snaps)
+
+def _relatorio_carga(relatorio: list, ms: float, linhas: dict, origem: dict):
+    """Carga por unidade para o expander do fragmento de conexão."""
+    st.session_state["carga_unidades"] = {
+        "unidades": [{**r, "linhas": linhas.get(r["schema"]), "origem": origem.get(r["schema"])} for r in relatorio],
+        "ms": ms,
+    }
+
+@st.cache_resource(show_spinner="Carregando tabela completa…")
+def carregar_local(chave: tuple, _backend: Backend) -> InsumosDataset:
+    anotar(cache="miss")   # o corpo só roda quando não há dataset no processo; o disco pode ter
+    return cache_disco().obter(chave, _backend.carregar)
+
+def query_insumos(b: Backend) -> InsumosDataset:
+    """Tabela completa (modo opt-in): carrega uma vez por processo.
+
+    No Oracle fica num snapshot que depois só recebe deltas; nos bancos locais,
+    regerar o arquivo muda a chave e a próxima carga lê tudo de novo.
     """
-    df = pd.read_sql(sql, conn)
-    conn.close()
-
-    # Normalização
-    df.columns = [str(c).upper().strip() for c in df.columns]
-    if "QUANTIDADE" in df.columns:
-        df["QUANTIDADE"] = pd.to_numeric(df["QUANTIDADE"], errors="coerce").fillna(0).astype(int)
-    for c in ("INSUMO", "EXAME"):
-        if c in df.columns:
-            df[c] = df[c].astype("string").fillna("").str.strip()
+    with etapa("query_insumos", cache="hit") as e:
+        if not isinstance(b, OracleBackend):
+            ds = carregar_local(b.chave, b)
+            st.session_state.pop("carga_unidades", None)
+        else:
+            store, schemas, origem = snapshot_store(), _unidades(b), {}
+
+            def carregar(schema):
+                # Uma thread por unidade, cada uma com a sua conexão do pool
+                chave = _chave_snapshot(b, schema)
+                snap = store.get(chave)
+                origem[schema] = "cache"
+                if snap is None:
+                    origem[schema] = "banco"
+                    with b.pool.acquire() as conn:
+                        # Lotes Arrow grandes; TRIM/coerção numérica já vêm feitos do SELECT
+                        snap = store.load(chave, conn, schema, chave[-1])
+                return snap
+
+            with st.spinner(f"Carregando {len(schemas)} unidade(s)…"), \
+                    etapa("carga paralela", unidades=len(schemas)) as c:
+                snaps, relatorio, c["ms_total"] = unidades.paralelo(schemas, carregar, b.pool.stats()["max"])
+            if "banco" in origem.values():
+                e["cache"] = "miss"
+            ds = _juntar(snaps)
+            _relatorio_carga(relatorio, c["ms_total"], {s: len(v.dados) for s, v in snaps.items() if v}, origem)
+        e["linhas"] = len(ds)
+    return ds
+
+@st.cache_resource
+def executor_consultas() -> Executor:
+    """Consultas no banco em paralelo + resultados (chave = banco + SQL + binds), do processo."""
+    return Executor((defaults["pool"] if defaults else pool_config(None))["pool_max"])
+
+def _consultar(b: Backend, sql, binds) -> pd.DataFrame:
+    with etapa("consulta_sql") as e:
+        df = executor_consultas().obter(b, sql, binds, grupo=st.session_state.get("_sessao"))
+        e["linhas"], e["bytes"] = len(df), tamanho(df)
     return df
 
-def _dados_exemplo() -> pd.DataFrame:
-    return pd.DataFrame({
+def _planejar(b: Backend, consultas: list):
+    with etapa("consultas em paralelo", consultas=len(consultas)) as e:
+        e.update(executor_consultas().planejar(b, consultas, st.session_state.get("_sessao")))
+
+def _sql_source(b: Backend) -> SqlSource:
+    # Exportação usa `b.lotes`: lotes direto do cursor, sem guardar o resultado inteiro no cache
+    return SqlSource(lambda sql, binds: _consultar(b, sql, binds), b.schema, b.lotes, b.dialeto,
+                     planejar=lambda consultas: _planejar(b, consultas))
+
+def _dados_exemplo() -> InsumosDataset:
+    return InsumosDataset.from_frame(pd.DataFrame({
         "INSUMO": ["Seringa 5ml", "Swab estéril", "Tubo EDTA 4ml"],
         "QUANTIDADE": [100, 60, 240],
         "EXAME": ["Hemograma", "PCR", "Hemograma"],
-    })
+    }))
 
-# -------------------------
-# Botões de ação
-# -------------------------
-b1, b2 = st.columns([0.5, 0.5])
-conectar = b1.button("🔌 Conectar e carregar do Oracle", use_container_width=True)
-recarregar = b2.button("🔄 Atualizar (limpar cache e ler novamente)", use_container_width=True)
+def _avisar(tipo: str, msg: str):
+    """Mensagem exibida depois do rerun completo (st.success/st.error/st.info)."""
+    st.session_state.setdefault("avisos", []).append((tipo, msg))
 
-if recarregar:
-    query_insumos.clear()
-    st.session_state.pop("insumos_df", None)
+def _latencia(t: dict):
+    st.caption(f"⏱️ {t['secao']}: {t['ms']:.0f} ms")
 
-if conectar:
-    try:
-        df = query_insumos(host, port, service, sid, user, password, schema)
-        st.session_state["insumos_df"] = df
-        st.success(f"✅ {len(df)} registros carregados de `{schema}.INSUMOS`.")
-    except ModuleNotFoundError:
-        st.error("Pacote `oracledb` não está instalado. Instale com: `pip install oracledb`")
-    except Exception as e:
-        try:
-            import oracledb  # para inspecionar códigos ORA
-            if isinstance(e, oracledb.DatabaseError) and getattr(e, "args", None):
-                err = e.args[0]
-                code = getattr(err, "code", None)
-                msg = getattr(err, "message", str(e))
-
-                if code == 28000:
-                    st.error("🚫 ORA-28000: sua CONTA do Oracle está **bloqueada**. "
-                             "Peça o desbloqueio ao DBA/professor e troque a senha.")
-                    st.info("Carregando **dados de exemplo** para seguir a análise…")
-                    st.session_state["insumos_df"] = _dados_exemplo()
-                elif code == 1017:
-                    st.error("❌ ORA-01017: usuário/senha inválidos. Confira credenciais.")
-                else:
-                    st.error(f"❌ Erro Oracle ({code}): {msg}")
+# =========================
+# UI de conexão (fragmento: digitar credenciais não reexecuta a página)
+# =========================
+@st.fragment
+def secao_conexao():
+    with medir("Conexão") as t:
+        for tipo, msg in st.session_state.pop("avisos", []):
+            getattr(st, tipo)(msg)
+
+        with st.expander("⚙️ Conexão ao banco", expanded=(defaults is None)):
+            banco = BANCOS[st.radio("Banco", list(BANCOS), horizontal=True, key="cx_banco",
+                                    help="Os bancos locais usam a mesma interface de consultas, "
+                                         "para testar e medir a página sem o Oracle.")]
+            if banco == "oracle":
+                c1, c2, c3 = st.columns([1, 0.6, 0.6])
+                c1.text_input("Host", value=(defaults["host"] if defaults else "oracle.fiap.com.br"), key="cx_host")
+                c2.number_input("Porta", value=(defaults["port"] if defaults else 1521), step=1, key="cx_port")
+                modo = c3.selectbox("Modo", ["Service Name (padrão)", "SID"],
+                                    index=(1 if (defaults and defaults.get("use_sid")) else 0), key="cx_modo")
+
+                st.text_input("Service Name" if modo.startswith("Service") else "SID",
+                              value=(defaults["service"] if defaults else "ORCL"), key="cx_service")
+
+                c4, c5, c6 = st.columns([0.7, 0.7, 0.7])
+                c4.text_input("Usuário", value=(defaults["user"] if defaults else "rm000000"), key="cx_user")
+                c5.text_input("Senha", type="password", value=(defaults["password"] if defaults else ""), key="cx_password")
+                c6.text_input("Schema(s) (OWNER)", value=(defaults["schema"] if defaults else "RM000000"), key="cx_schema",
+                              help="Uma unidade ou várias, separadas por vírgula; aceita padrões (`RM%`, `LAB_*`). "
+                                   "Com várias, as tabelas são lidas em paralelo e unidas com a coluna UNIDADE.")
             else:
-                st.error("❌ Não foi possível conectar ou consultar o Oracle.")
-                st.exception(e)
-        except Exception:
-            st.error("❌ Falha na conexão com o Oracle.")
-            st.exception(e)
-
-# Se já há dados em sessão, usa
-df = st.session_state.get("insumos_df")
-
-st.divider()
-if df is None or df.empty:
-    st.info("Clique em **Conectar e carregar do Oracle** para continuar.")
-    st.stop()
+                a1, a2, a3 = st.columns([0.5, 0.25, 0.25])
+                arquivo = a1.text_input("Arquivo", value=ARQUIVO_PADRAO[banco], key=f"cx_arquivo_{banco}")
+                linhas = a2.number_input("Linhas sintéticas", min_value=1_000, max_value=50_000_000,
+                                         value=1_000_000, step=100_000, key="cx_linhas")
+                a3.write("")
+                if a3.button("🧪 Gerar dados sintéticos", use_container_width=True):
+                    with st.spinner(f"Gerando {linhas:,} linhas…".replace(",", ".")):
+                        df_sint = gerar(int(linhas))
+                        (salvar_sqlite if banco == "sqlite" else salvar_parquet)(df_sint, arquivo)
+                    st.success(f"✅ `{arquivo}` com {len(df_sint):,} linhas. Agora use **Conectar e carregar**."
+                               .replace(",", "."))
+
+            carga = st.radio(
+                "Modo de análise",
+                ["Consultas no banco (filtros e agregações no banco)", "Tabela completa em memória"],
+                horizontal=True,
+                help="No modo padrão só volta do banco o resultado de cada gráfico. "
+                     "A tabela completa lê todas as linhas de INSUMOS e filtra em pandas.",
+                key="cx_carga",
+            )
+            pushdown = carga.startswith("Consultas")
+
+        st.caption("Dica: use `.streamlit/secrets.toml` (seção [oracle]) para não digitar credenciais sempre.")
+        c = _cx()
+        origem = f"{', '.join(unidades.parse_schemas(c['schema']))}.INSUMOS" if c["banco"] == "oracle" else c["arquivo"]
+
+        # -------------------------
+        # Botões de ação (o que muda os dados pede rerun da página inteira)
+        # -------------------------
+        b1, b2, b3 = st.columns([0.34, 0.33, 0.33])
+        conectar = b1.button("🔌 Conectar e carregar", use_container_width=True)
+        recarregar = b2.button("🔄 Atualizar (limpar cache e ler novamente)", use_container_width=True)
+        incremental = b3.button("⚡ Atualização incremental (só o que mudou)", use_container_width=True)
+        mudou = False
+
+        if recarregar:
+            snapshot_store().drop()   # memória e arquivos em disco
+            carregar_local.clear()
+            executor_consultas().limpar()
+            st.session_state.pop("insumos_ds", None)
+            st.session_state.pop("pushdown", None)
+            st.session_state.pop("carga_unidades", None)
+            mudou = True
+
+        if incremental:
+            if st.session_state.get("pushdown"):
+                executor_consultas().limpar()  # consultas no banco: basta descartar os resultados em cache
+                _avisar("success", "✅ Resultados em cache descartados; as próximas consultas leem o estado atual do banco.")
+                mudou = True
+            elif c["banco"] != "oracle":
+                st.info("O refresh incremental usa ROWID/ORA_ROWSCN do Oracle; nos bancos locais use **Atualizar**.")
+            elif not _carregado(b := _backend()):
+                st.info("Nenhuma tabela completa carregada ainda: use **Conectar e carregar** primeiro.")
+            else:
+                def atualizar(schema):
+                    with b.pool.acquire() as conn:
+                        return snapshot_store().refresh(_chave_snapshot(b, schema), conn)
+
+                try:
+                    res, relatorio, ms = unidades.paralelo(_unidades(b), atualizar, b.pool.stats()["max"])
+                    ok = {s: r for s, r in res.items() if r is not None}
+                    st.session_state["insumos_ds"] = _juntar({s: snap for s, (snap, _) in ok.items()})
+                    _relatorio_carga(relatorio, ms, {s: len(snap.dados) for s, (snap, _) in ok.items()},
+                                     dict.fromkeys(ok, "delta"))
+                    tot = {k: sum(d[k] for _, d in ok.values()) for k in ("inseridas", "alteradas", "removidas")}
+                    versao = (f"Snapshot v{next(iter(ok.values()))[0].versao}" if len(res) == 1
+                              else f"{len(ok)}/{len(res)} unidades")
+                    _avisar("success" if len(ok) == len(res) else "warning",
+                            f"✅ {versao}: +{tot['inseridas']} inseridas, ~{tot['alteradas']} alteradas, "
+                            f"-{tot['removidas']} removidas em {ms:.0f} ms.")
+                    mudou = True
+                except Exception as e:
+                    st.error("❌ Falha na atualização incremental; use **Atualizar** para recarregar tudo.")
+                    st.exception(e)
+
+        if conectar:
+            try:
+                b = _backend()
+                if pushdown:
+                    dom = _sql_source(b).dominios()  # valida a conexão e já aquece os widgets
+                    st.session_state.pop("insumos_ds", None)
+                    st.session_state["pushdown"] = b   # o banco conectado, não o que está nos widgets
+                    _avisar("success", f"✅ Conectado a `{origem}`: {len(dom['insumos'])} insumos e "
+                                       f"{len(dom['exames'])} exames. Filtros e gráficos serão calculados no banco.")
+                else:
+                    ds = query_insumos(b)
+                    st.session_state["insumos_ds"] = ds
+                    st.session_state.pop("pushdown", None)
+                    _avisar("success", f"✅ {len(ds)} registros carregados de `{origem}`.")
+                    falhas = [u["schema"] for u in st.session_state.get("carga_unidades", {}).get("unidades", ())
+                              if u["erro"]]
+                    if falhas:
+                        _avisar("warning", f"⚠️ Fora da análise por erro: {', '.join(falhas)} (detalhes em 🏥 Unidades).")
+                st.session_state["oracle_ok"] = c["banco"] == "oracle"
+                mudou = True
+            except ModuleNotFoundError as e:
+                st.error(f"Pacote `{e.name}` não está instalado. Instale com: `pip install {e.name}`")
+            except FileNotFoundError as e:
+                st.error(f"❌ {e}")
+            except Exception as e:
+                try:
+                    import oracledb  # para inspecionar códigos ORA
+                    if isinstance(e, oracledb.DatabaseError) and getattr(e, "args", None):
+                        err = e.args[0]
+                        code = getattr(err, "code", None)
+                        msg = getattr(err, "message", str(e))
+
+                        if code == 28000:
+                            _avisar("error", "🚫 ORA-28000: sua CONTA do Oracle está **bloqueada**. "
+                                             "Peça o desbloqueio ao DBA/professor e troque a senha.")
+                            _avisar("info", "Carregando **dados de exemplo** para seguir a análise… "
+                                            "Para volume real sem o Oracle, use um banco local com dados sintéticos.")
+                            st.session_state["insumos_ds"] = _dados_exemplo()
+                            st.session_state.pop("pushdown", None)
+                            mudou = True
+                        elif code == 1017:
+                            st.error("❌ ORA-01017: usuário/senha inválidos. Confira credenciais.")
+                        else:
+                            st.error(f"❌ Erro Oracle ({code}): {msg}")
+                    else:
+                        st.error("❌ Não foi possível conectar ou consultar o banco.")
+                        st.exception(e)
+                except Exception:
+                    st.error("❌ Falha na conexão com o banco.")
+                    st.exception(e)
+
+        # Métricas do pool (para dimensionar min/max/increment no secrets.toml)
+        if st.session_state.get("oracle_ok") and c["banco"] == "oracle":
+            with st.expander("📈 Pool de conexões"):
+                ps = _pool(c["host"], c["port"], c["service"], c["sid"], c["user"], c["password"]).stats()
+                p1, p2, p3, p4 = st.columns(4)
+                p1.metric("Sessões abertas / máx.", f"{ps['abertas']} / {ps['max']}")
+                p2.metric("Ocupadas agora", ps["ocupadas"])
+                p3.metric("Espera média (ms)", f"{ps['espera_media_ms']:.1f}", help=f"Máx.: {ps['espera_max_ms']:.1f} ms")
+                p4.metric("Uso médio (ms)", f"{ps['uso_medio_ms']:.1f}", help=f"{ps['acquires']} acquires")
+
+        # Carga por unidade (várias unidades: o total deve ficar perto da mais lenta, não da soma)
+        if (cu := st.session_state.get("carga_unidades")) and not st.session_state.get("pushdown"):
+            with st.expander(f"🏥 Unidades ({len(cu['unidades'])})"):
+                st.dataframe(pd.DataFrame(cu["unidades"]), hide_index=True, use_container_width=True)
+                soma = sum(u["ms"] for u in cu["unidades"])
+                st.caption(f"Total {cu['ms']:.0f} ms com as unidades em paralelo (soma das unidades: {soma:.0f} ms). "
+                           "Unidades com erro ficam de fora da análise.")
+
+    if mudou:
+        fechar()    # o rerun interrompe o script: publica o rastro desta execução antes
+        st.rerun()  # KPIs, filtros e gráficos dependem dos dados: reexecuta a página inteira
+    _latencia(t)
 
 # =========================
-# KPIs rápidos
+# KPIs rápidos (só mudam com os dados: calculados no rerun completo)
 # =========================
-total_reg = int(len(df))
-total_insumos = int(df["INSUMO"].nunique()) if "INSUMO" in df else 0
-qtd_total = int(df["QUANTIDADE"].sum()) if "QUANTIDADE" in df else 0
-qtd_mediana = int(df["QUANTIDADE"].median()) if "QUANTIDADE" in df and len(df) > 0 else 0
-
-k1, k2, k3, k4 = st.columns(4)
-k1.metric("Registros", f"{total_reg:,}".replace(",", "."))
-k2.metric("Itens únicos (INSUMO)", f"{total_insumos:,}".replace(",", "."))
-k3.metric("Quantidade total", f"{qtd_total:,}".replace(",", "."))
-k4.metric("Mediana de quantidade", f"{qtd_mediana:,}".replace(",", "."))
-
-st.divider()
+def secao_kpis(src, ds):
+    with medir("KPIs") as t:
+        kpi = src.kpis()
+
+        k1, k2, k3, k4 = st.columns(4)
+        k1.metric("Registros", f"{kpi['registros']:,}".replace(",", "."))
+        k2.metric("Itens únicos (INSUMO)", f"{kpi['itens']:,}".replace(",", "."))
+        k3.metric("Quantidade total", f"{kpi['total']:,}".replace(",", "."))
+        k4.metric("Mediana de quantidade", f"{kpi['mediana']:,}".replace(",", "."))
+
+        # Tabela completa: uma instância compacta por snapshot, só referenciada pela sessão
+        if isinstance(src, FrameSource):
+            with st.expander("🧠 Memória do snapshot"):
+                mem = ds.memoria()
+                m1, m2, m3 = st.columns(3)
+                m1.metric("Total em memória", f"{mem['total'] / 2**20:,.2f} MiB".replace(",", "X").replace(".", ",").replace("X", "."))
+                m2.metric("Bytes por linha", f"{mem['bytes_por_linha']:.1f}")
+                m3.metric("Valores distintos", " / ".join(f"{c}: {n}" for c, n in mem["distintos"].items()))
+                if mem["cubo"] is not None:
+                    st.caption(f"Cubo INSUMO × EXAME (agregações dos gráficos): {mem['cubo'] / 1024:,.1f} KiB")
+                st.caption("Por coluna: " + ", ".join(f"{c} {b / 1024:,.1f} KiB" for c, b in mem["colunas"].items()))
+                disco, arquivos = cache_disco(), cache_disco().entradas()
+                st.caption(f"Cache em disco (compartilhado entre processos): {len(arquivos)} snapshot(s), "
+                           f"{sum(a['bytes'] for a in arquivos) / 2**20:.1f} MiB de {disco.limite / 2**20:.0f} MiB; "
+                           f"validade de {disco.ttl / 3600:g} h.")
+    _latencia(t)
 
 # =========================
-# Filtros e visão (slider robusto)
+# Filtros e visão (fragmento: mudar um filtro reexecuta só a análise)
 # =========================
-st.subheader("Filtros e visão")
-colF1, colF2, colF3 = st.columns([0.4, 0.3, 0.3])
-
-with colF1:
-    termo = st.text_input("🔍 Filtrar por nome do insumo (contém)", "")
-
-with colF2:
-    exames_unicos = ["(todos)"] + sorted(df["EXAME"].dropna().unique().tolist()) if "EXAME" in df else ["(todos)"]
-    exame_sel = st.selectbox("Filtrar por exame", exames_unicos)
-
-with colF3:
-    # calcula min/max de forma segura
-    if "QUANTIDADE" in df and not df["QUANTIDADE"].dropna().empty:
-        qmin = int(df["QUANTIDADE"].min())
-        qmax = int(df["QUANTIDADE"].max())
-    else:
-        qmin, qmax = 0, 1  # fallback
-
-    # evita min == max
-    if qmin == qmax:
-        qmin_adj, qmax_adj = qmin - 1, qmax + 1
-        help_txt = "Só há um valor de QUANTIDADE na base; ampliamos o intervalo para habilitar o filtro."
-    else:
-        qmin_adj, qmax_adj = qmin, qmax
-        help_txt = None
-
-    faixa = st.slider(
-        "Faixa de quantidade",
-        min_value=int(qmin_adj),
-        max_value=int(qmax_adj),
-        value=(int(qmin_adj), int(qmax_adj)),
-        step=1,
-        help=help_txt,
-        key="faixa_qtd",
-    )
+@st.fragment
+def secao_analise(src):
+    with medir("Filtros") as t:
+        dom = src.dominios()
+
+        st.subheader("Filtros e visão")
+        colF1, colF2, colF3 = st.columns([0.4, 0.3, 0.3])
+
+        with colF1:
+            termo = st.text_input("🔍 Filtrar por nome do insumo", "", help="Sem distinção de maiúsculas e acentos.")
+            modo_busca = st.radio("Tipo de busca", list(MODOS), horizontal=True, label_visibility="collapsed")
+
+        with colF2:
+            exames_unicos = ["(todos)"] + dom["exames"]
+            exame_sel = st.selectbox("Filtrar por exame", exames_unicos)
+
+        with colF3:
+            # calcula min/max de forma segura
+            if dom["qmin"] is not None:
+                qmin, qmax = dom["qmin"], dom["qmax"]
+            else:
+                qmin, qmax = 0, 1  # fallback
 
-# Multiselect de insumos
-insumos_opts = sorted(df["INSUMO"].dropna().unique().tolist()) if "INSUMO" in df else []
-insumos_sel = st.multiselect("Selecionar insumos específicos (opcional)", insumos_opts, default=[])
-
-# Aplica filtros
-df_view = df.copy()
-if termo:
-    df_view = df_view[df_view["INSUMO"].str.contains(termo, case=False, na=False)]
-if exame_sel != "(todos)":
-    df_view = df_view[df_view["EXAME"] == exame_sel]
-if insumos_sel:
-    df_view = df_view[df_view["INSUMO"].isin(insumos_sel)]
-if "QUANTIDADE" in df_view:
-    df_view = df_view[(df_view["QUANTIDADE"] >= faixa[0]) & (df_view["QUANTIDADE"] <= faixa[1])]
+            # evita min == max
+            if qmin == qmax:
+                qmin_adj, qmax_adj = qmin - 1, qmax + 1
+                help_txt = "Só há um valor de QUANTIDADE na base; ampliamos o intervalo para habilitar o filtro."
+            else:
+                qmin_adj, qmax_adj = qmin, qmax
+                help_txt = None
+
+            faixa = st.slider(
+                "Faixa de quantidade",
+                min_value=int(qmin_adj),
+                max_value=int(qmax_adj),
+                value=(int(qmin_adj), int(qmax_adj)),
+                step=1,
+                help=help_txt,
+                key="faixa_qtd",
+            )
+
+        # Multiselect de insumos
+        insumos_sel = st.multiselect("Selecionar insumos específicos (opcional)", dom["insumos"], default=[])
+
+        # Estado dos filtros (aplicado no banco ou em pandas, conforme a fonte)
+        filtros = Filtros(
+            termo=termo.strip(),
+            busca=MODOS[modo_busca],
+            exame=None if exame_sel == "(todos)" else exame_sel,
+            insumos=tuple(insumos_sel),
+            # Faixa inteira = sem filtro (o cubo responde no nível de célula, sem a distribuição)
+            faixa=None if tuple(faixa) == (int(qmin_adj), int(qmax_adj)) else (int(faixa[0]), int(faixa[1])),
+        )
+        # No banco, as consultas das seções abaixo saem juntas; cada seção só espera a sua
+        src.antecipar(*_pedidos(filtros, dom["exames"]))
+    _latencia(t)
+
+    # Cada seção abaixo é um fragmento próprio: os widgets dela só reexecutam a própria seção
+    secao_preview(src, filtros)
+    st.divider()
+    st.subheader("Visualizações")
+    secao_top(src, filtros)
+    secao_agregacao(src, filtros)
+    secao_comparacao(src, filtros, dom["exames"])
+
+def _pedidos(filtros, exames) -> list:
+    """Consultas que preview e gráficos vão fazer com os widgets atuais (ver `SqlSource.antecipar`)."""
+    s = st.session_state
+    ordem, desc, tam = s.get("pv_ordem", COLUNAS[0]), s.get("pv_desc", False), s.get("pv_tam", PAGINAS[0])
+    pagina = s.get("pv_pagina", 1) if s.get("pv_chave") == (filtros, ordem, desc, tam) else 1
+    return [
+        ("contar", filtros),
+        ("pagina", filtros, ordem, desc, (pagina - 1) * tam, tam),
+        ("top", filtros, s.get("topn", 10)),
+        ("agregacao", filtros, s.get("ag_eixo", "EXAME"), s.get("ag_metrica", "Soma")),
+        ("comparacao", filtros, [e for e in s.get("cmp_exames", ()) if e in exames]),
+    ]
 
 # =========================
 # Preview e download
 # =========================
-st.subheader("Preview dos dados filtrados")
-st.dataframe(df_view, use_container_width=True, height=320)
-
-csv_bytes = df_view.to_csv(index=False).encode("utf-8")
-st.download_button(
-    "⬇️ Baixar CSV (dados filtrados)",
-    data=csv_bytes,
-    file_name="insumos_filtrados.csv",
-    mime="text/csv",
-    use_container_width=True
-)
-
-st.divider()
+@st.fragment
+def secao_preview(src, filtros):
+    with medir("Preview") as t:
+        st.subheader("Preview dos dados filtrados")
+        p1, p2, p3, p4 = st.columns([0.3, 0.2, 0.2, 0.3])
+        ordem = p1.selectbox("Ordenar por", COLUNAS, key="pv_ordem")
+        desc = p2.toggle("Decrescente", key="pv_desc")
+        tam = p3.selectbox("Linhas por página", PAGINAS, key="pv_tam")
+
+        total = src.contar(filtros)
+        paginas = max(1, -(-total // tam))
+        # Filtro/ordem novos voltam à primeira página; a página nunca passa da última
+        chave = (filtros, ordem, desc, tam)
+        if st.session_state.get("pv_chave") != chave:
+            st.session_state["pv_chave"] = chave
+            st.session_state["pv_pagina"] = 1
+        st.session_state["pv_pagina"] = min(st.session_state.get("pv_pagina", 1), paginas)
+        pagina = p4.number_input("Página", min_value=1, max_value=paginas, step=1, key="pv_pagina")
+
+        # Só a página atual é consultada e enviada ao navegador
+        inicio = (pagina - 1) * tam
+        df_view = src.pagina(filtros, ordem, desc, inicio, tam)
+        with etapa("preview (st.dataframe)", linhas=len(df_view), bytes=tamanho(df_view)):
+            st.dataframe(df_view, use_container_width=True, height=320, hide_index=True)
+        st.caption(f"Página {pagina:,} de {paginas:,}: linhas {min(inicio + 1, total):,}–{inicio + len(df_view):,} "
+                   f"de {total:,}; "
+                   "a exportação traz todas as linhas filtradas.".replace(",", "."))
+    _latencia(t)
+    secao_exportacao(src, filtros)
+
+@st.fragment
+def secao_exportacao(src, filtros):
+    # O arquivo só é gerado no clique, em outra thread, lendo os dados lote a lote
+    c1, c2 = st.columns([0.3, 0.7])
+    formato = c1.selectbox("Formato", list(FORMATOS), key="exp_formato", label_visibility="collapsed")
+    ext, mime = FORMATOS[formato]
+    c2.download_button(
+        f"⬇️ Baixar {formato} (dados filtrados)",
+        data=lambda: exportar(src.lotes(filtros), formato),
+        file_name=f"insumos_filtrados.{ext}",
+        mime=mime,
+        on_click="ignore",
+        use_container_width=True
+    )
 
 # =========================
 # Visualizações
 # =========================
-st.subheader("Visualizações")
-
 # 1) Top-N por insumo (barra)
-with st.container():
-    st.markdown("### 📦 Top insumos por quantidade")
-    top_n = st.slider("Quantos itens exibir", 3, 30, 10, key="topn")
-    top_df = (
-        df_view.groupby("INSUMO", as_index=False)["QUANTIDADE"]
-               .sum()
-               .sort_values("QUANTIDADE", ascending=False)
-               .head(top_n)
-    )
-    if top_df.empty:
-        st.warning("Nenhum dado após os filtros.")
-    else:
-        fig1 = px.bar(top_df, x="INSUMO", y="QUANTIDADE", text="QUANTIDADE", title="Top insumos")
-        fig1.update_traces(textposition="outside")
-        fig1.update_layout(margin=dict(l=10, r=10, t=40, b=10), height=380)
-        st.plotly_chart(fig1, use_container_width=True)
+@st.fragment
+def secao_top(src, filtros):
+    with medir("Top insumos") as t:
+        st.markdown("### 📦 Top insumos por quantidade")
+        top_n = st.slider("Quantos itens exibir", 3, 30, 10, key="topn")
+        top_df = src.top(filtros, top_n)
+        if top_df.empty:
+            st.warning("Nenhum dado após os filtros.")
+        else:
+            graficos.mostrar(graficos.top(top_df))
+    _latencia(t)
 
 # 2) Agregações flexíveis
-st.markdown("### 🧭 Exploração por agregação")
-colA, colB, colC = st.columns([0.4, 0.3, 0.3])
-with colA:
-    eixo = st.selectbox("Agrupar por", ["EXAME", "INSUMO"])
-with colB:
-    metrica = st.selectbox("Métrica", ["Soma", "Média", "Mediana", "Máximo", "Mínimo"])
-with colC:
-    tipo = st.selectbox("Gráfico", ["Barra", "Pizza", "Treemap"])
-
-if df_view.empty:
-    st.info("Ajuste os filtros acima para visualizar as agregações.")
-else:
-    agg_map = {"Soma": "sum", "Média": "mean", "Mediana": "median", "Máximo": "max", "Mínimo": "min"}
-    agg_df = (
-        df_view.groupby(eixo, as_index=False)["QUANTIDADE"]
-               .agg(agg_map[metrica])
-               .rename(columns={"QUANTIDADE": metrica})
-               .sort_values(metrica, ascending=(metrica == "Mínimo"))
-    )
-    if tipo == "Barra":
-        fig = px.bar(agg_df, x=eixo, y=metrica, title=f"{metrica} de QUANTIDADE por {eixo}")
-    elif tipo == "Pizza":
-        fig = px.pie(agg_df, names=eixo, values=metrica, title=f"{metrica} por {eixo}")
-    else:
-        fig = px.treemap(agg_df, path=[eixo], values=metrica, title=f"{metrica} por {eixo}")
-    fig.update_layout(margin=dict(l=10, r=10, t=40, b=10), height=420)
-    st.plotly_chart(fig, use_container_width=True)
+@st.fragment
+def secao_agregacao(src, filtros):
+    with medir("Agregação") as t:
+        st.markdown("### 🧭 Exploração por agregação")
+        colA, colB, colC = st.columns([0.4, 0.3, 0.3])
+        with colA:
+            eixo = st.selectbox("Agrupar por", ["EXAME", "INSUMO"], key="ag_eixo")
+        with colB:
+            metrica = st.selectbox("Métrica", ["Soma", "Média", "Mediana", "Máximo", "Mínimo"], key="ag_metrica")
+        with colC:
+            tipo = st.selectbox("Gráfico", graficos.TIPOS)
+
+        agg_df = src.agregacao(filtros, eixo, metrica)
+        if agg_df.empty:
+            st.info("Ajuste os filtros acima para visualizar as agregações.")
+        else:
+            graficos.mostrar(graficos.agregacao(agg_df, eixo, metrica, tipo))
+    _latencia(t)
 
 # 3) Comparar exames (stacked bar)
-st.markdown("### 🧪 Comparar exames (barras empilhadas)")
-exames_comp = st.multiselect("Escolha exames para comparar", sorted(df["EXAME"].dropna().unique().tolist()))
-if exames_comp:
-    df_comp = df_view[df_view["EXAME"].isin(exames_comp)]
-    if df_comp.empty:
-        st.warning("Nenhum dado após os filtros/seleção.")
-    else:
-        pivot = df_comp.groupby(["INSUMO", "EXAME"], as_index=False)["QUANTIDADE"].sum()
-        fig3 = px.bar(pivot, x="INSUMO", y="QUANTIDADE", color="EXAME", barmode="stack",
-                      title="Quantidade por Insumo (exames selecionados)")
-        fig3.update_layout(margin=dict(l=10, r=10, t=40, b=10), height=420)
-        st.plotly_chart(fig3, use_container_width=True)
-
-st.caption("Use **Atualizar** após inserir novos registros no Oracle para recarregar.")
+@st.fragment
+def secao_comparacao(src, filtros, exames):
+    with medir("Comparação") as t:
+        st.markdown("### 🧪 Comparar exames (barras empilhadas)")
+        exames_comp = st.multiselect("Escolha exames para comparar", exames, key="cmp_exames")
+        if exames_comp:
+            pivot = src.comparacao(filtros, exames_comp)
+            if pivot.empty:
+                st.warning("Nenhum dado após os filtros/seleção.")
+            else:
+                graficos.mostrar(graficos.comparacao(pivot))
+    _latencia(t)
+
+@st.fragment
+def painel_latencias():
+    with st.expander("⏱️ Latência por interação"):
+        st.caption("Um rerun de fragmento aparece só com a própria seção; o rerun completo inclui a linha **Página**.")
+        if fundo["url"]:
+            st.caption(f"Fundo: {fundo['bytes_origem']:,} B → {fundo['bytes']:,} B em `{fundo['url']}` "
+                       f"(preparado uma vez em {fundo['ms']:.0f} ms); CSS por rerun: {len(fundo['css']):,} B "
+                       f"(antes: {fundo['css_inline']:,} B com a imagem embutida).".replace(",", "."))
+        if st.session_state.get("pushdown"):
+            ex = executor_consultas().stats()
+            st.caption(f"Consultas no banco (até {ex['max_concorrentes']} em paralelo): {ex['miss']} executadas, "
+                       f"{ex['em voo']} aproveitadas de outra idêntica em andamento, {ex['hit']} do cache, "
+                       f"{ex['canceladas']} canceladas por mudança de filtro; {ex['rodando']} rodando agora.")
+        st.button("Atualizar medições", key="lat_atualizar")  # reexecuta só este painel
+        st.dataframe(pd.DataFrame(latencias(), columns=["hora", "secao", "ms"]), use_container_width=True,
+                     hide_index=True, height=240)
+
+# =========================
+# Página
+# =========================
+secao_conexao()
+
+# Se já há dados em sessão (tabela completa) usa; senão, consultas no banco
+ds = st.session_state.get("insumos_ds")
+
+st.divider()
+if ds is not None and len(ds):
+    src = FrameSource(ds)
+elif st.session_state.get("pushdown"):
+    src = _sql_source(st.session_state["pushdown"])
+else:
+    st.info("Clique em **Conectar e carregar** para continuar.")
+    finalizar_pagina()
+    st.stop()
+
+src.antecipar(("kpis", Filtros()), ("dominios",))   # KPIs e domínios dos filtros ao mesmo tempo
+secao_kpis(src, ds)
+st.divider()
+secao_analise(src)
+
+st.caption("Use **Atualização incremental** após inserir/alterar registros no Oracle; **Atualizar** relê tudo do zero.")
+registrar("Página", (time.perf_counter() - _t_pagina) * 1000)
+painel_latencias()
+
+finalizar_pagina()
@@ -0,0 +1,23 @@
+# tests/conftest.py
+# -*- coding: utf-8 -*-
+import pytest
+
+
+class Razao:
+    """Razão em lista (posição = índice + 1), no formato de `DestinoSqlite.ler_desde`."""
+    descricao = "teste"
+
+    def __init__(self):
+        self.linhas = []
+
+    def add(self, sku, acao, quantidade, local="ALMOXARIFADO", lote="", validade=None):
+        self.linhas.append((len(self.linhas) + 1, sku, local, acao, quantidade, lote, validade))
+
+    def ler_desde(self, posicao, limite):
+        return self.linhas[posicao:posicao + limite]
+
+
+@pytest.fixture
+def razao():
+    """Fábrica de razões em memória (um teste pode precisar de mais de uma)."""
+    return Razao
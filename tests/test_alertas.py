@@ -0,0 +1,62 @@
+# tests/test_alertas.py
+# -*- coding: utf-8 -*-
+from datetime import date, timedelta
+
+from estoque.alertas import Alertas, alertas_config
+from estoque.saldos import Saldos
+
+HOJE = date(2026, 1, 10)
+
+
+def _dia(d: int) -> str:
+    return (HOJE + timedelta(days=d)).isoformat()
+
+
+def test_minimo_dispara_e_normaliza(tmp_path, razao):
+    r = razao()
+    r.add("INS-001", "ENTRADA", 10)
+    s = Saldos(r, tmp_path)
+    a = Alertas(s, {"INS-001": 8, "INS-002": 1})
+    assert not a.abaixo("INS-001") and a.abaixo("INS-002")    # sem saldo desde a partida
+
+    r.add("INS-001", "BAIXA", 3)
+    s.atualizar()
+    assert a.abaixo("INS-001")
+    r.add("INS-001", "ENTRADA", 5)
+    s.atualizar()
+    assert not a.abaixo("INS-001")
+    assert [(h[1], h[2], h[3]) for h in a.historico] == [("disparou", "INS-001", 7), ("normalizou", "INS-001", 12)]
+
+    a.definir_minimo("INS-001", 20)
+    assert a.abaixo("INS-001")
+    a.definir_minimo("INS-001", None)
+    assert not a.abaixo("INS-001") and "INS-001" not in a.minimos
+
+
+def test_proximos_vencimentos_em_ordem_sem_lotes_zerados(tmp_path, razao):
+    r = razao()
+    for i, d in enumerate([40, -2, 10, 200, 5]):
+        r.add("INS-003", "ENTRADA", 2, lote=f"L{i}", validade=_dia(d))
+    s = Saldos(r, tmp_path)
+    a = Alertas(s, antecedencia_dias=30)
+    r.add("INS-003", "BAIXA", 2)                              # FEFO zera L1 (vencido)
+    r.add("INS-004", "ENTRADA", 1, lote="X", validade=_dia(1))
+    s.atualizar()
+
+    prox = a.proximos(3)
+    assert [(v, l) for v, _, l, _ in prox] == [(_dia(1), "X"), (_dia(5), "L4"), (_dia(10), "L2")]
+    assert prox == a.proximos(3)                              # consultar não altera o heap
+    assert [v for v, _, _, _ in a.proximos(10)] == sorted(v for _, _, _, v in s.lotes())
+
+    ativos = a.ativos(HOJE)
+    assert [(x["tipo"], x["lote"]) for x in ativos] == [("validade", "X"), ("validade", "L4"), ("validade", "L2")]
+    r.add("INS-003", "ENTRADA", 1, lote="V", validade=_dia(-1))
+    s.atualizar()
+    assert a.ativos(HOJE)[0]["tipo"] == "vencido" and a.ativos(HOJE)[0]["lote"] == "V"
+
+
+def test_alertas_config():
+    cfg = alertas_config({"antecedencia_dias": "10", "minimos": {"ins-001": "5", "SKU-X": 3}})
+    assert cfg["antecedencia_dias"] == 10
+    assert cfg["minimos"]["INS-001"] == 5 and cfg["minimos"]["SKU-X"] == 3
+    assert alertas_config(None)["minimos"]["INS-002"] == 50
@@ -0,0 +1,46 @@
+# tests/test_cenarios.py
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from estoque.cenarios import CENARIOS, PERCENTIS, simular
+
+
+def test_bandas_ordenadas_e_centradas_na_conta_deterministica():
+    r = simular(5000, 0.08, 0.7, 0.3, n=20_000)
+    b = r["bandas"]
+    assert list(b.index) == list(CENARIOS) and list(b.columns) == [f"p{p}" for p in PERCENTIS] + ["média"]
+    assert (b[[f"p{p}" for p in PERCENTIS]].diff(axis=1).iloc[:, 1:] >= 0).all().all()   # percentis crescem
+    assert (b["p50"].diff().iloc[1:] <= 0).all()                                          # QR e ML só reduzem
+    # Médias próximas da conta antiga (5000 × 8% = 400; QR tira 70% × 75%; ML 30% × 90%)
+    hoje = 400
+    assert b.loc["Hoje (manual)", "média"] == pytest.approx(hoje, rel=0.02)
+    assert b.loc["Com QR", "média"] == pytest.approx(hoje * (1 - 0.7 * 0.75), rel=0.05)
+    assert b.loc["Com QR + ML", "média"] == pytest.approx(hoje * (1 - 0.7 * 0.75 - 0.3 * 0.9), rel=0.15)
+
+
+def test_semente_fixa_e_incerteza():
+    a, b = simular(5000, 0.08, 0.7, 0.0), simular(5000, 0.08, 0.7, 0.0)
+    assert a["bandas"].equals(b["bandas"])
+    larguras = []
+    for incerteza in ("baixa", "média", "alta"):
+        faixa = simular(5000, 0.08, 0.7, 0.0, incerteza=incerteza)["bandas"].loc["Com QR"]
+        larguras.append(faixa["p95"] - faixa["p5"])
+    assert larguras == sorted(larguras) and larguras[0] < larguras[-1]
+
+
+def test_extremos_sao_certezas():
+    r = simular(5000, 0.0, 0.5, 0.5)
+    assert (r["resultados"] == 0).all()
+    assert (r["sensibilidade"]["spearman"] == 0).all()
+    r = simular(5000, 0.08, 1.0, 0.0, eficacia_qr=1.0)
+    assert (r["resultados"][1] == 0).all()
+
+
+def test_sensibilidade():
+    r = simular(5000, 0.08, 0.7, 0.0)
+    s = r["sensibilidade"].set_index("parâmetro")
+    assert "Adoção ML" not in s.index and "Eficácia ML" not in s.index     # ML com adoção 0%: fora
+    assert s.loc["Erro manual", "spearman"] > 0 and s.loc["Erro manual", "efeito"] > 0
+    assert s.loc["Eficácia QR", "spearman"] < 0 and s.loc["Adoção QR", "efeito"] < 0
+    assert np.all(np.diff(np.abs(r["sensibilidade"]["efeito"].to_numpy())) <= 0)         # maior efeito primeiro
@@ -0,0 +1,65 @@
+# tests/test_conciliacao.py
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+from estoque.conciliacao import Regras, avaliar, conciliar, gerar
+
+
+def _lado(linhas, valor, minimo=False):
+    cols = ["SKU", "UNIDADE", valor] + (["MINIMO"] if minimo else [])
+    return pd.DataFrame(linhas, columns=cols)
+
+
+def test_avaliar_regras():
+    sap = _lado([("A", "U1", 100, 50.0), ("B", "U1", 10, None), ("C", "U1", 5, 1.0)], "SAP", True)
+    fis = _lado([("A", "U1", 96), ("B", "U1", 10), ("D", "U1", 3)], "REAL")
+    df = avaliar(sap, fis, Regras(tolerancia_abs=2, tolerancia_rel=0.03)).set_index("SKU")
+    assert df.loc["A", "DELTA"] == -4 and df.loc["A", "DIVERGENTE"]       # limite max(2, 3% de 100) = 3
+    assert not df.loc["B", "DIVERGENTE"] and not df.loc["B", "ABAIXO_MINIMO"]   # sem mínimo
+    assert df.loc["C", "REAL"] == 0 and df.loc["C", "ABAIXO_MINIMO"] and df.loc["C", "ORIGEM"] == "só SAP"
+    assert df.loc["D", "SAP"] == 0 and df.loc["D", "DELTA"] == 3 and df.loc["D", "ORIGEM"] == "só físico"
+    assert df.loc["A", "ORIGEM"] == "ambos"
+    assert not avaliar(sap, fis, Regras(tolerancia_abs=4)).set_index("SKU").loc["A", "DIVERGENTE"]
+
+
+def _ordenar(df):
+    return df.sort_values(["SKU", "UNIDADE"]).reset_index(drop=True)[["SKU", "UNIDADE", "SAP", "REAL", "DELTA"]]
+
+
+@pytest.mark.parametrize("processos", [1, 2])
+def test_particionado_igual_a_memoria(tmp_path, processos):
+    sap, fisico = gerar(2_000, 3, seed=1)
+    sap = pd.concat([sap, sap.head(50)], ignore_index=True)   # linhas repetidas somam
+    mem = conciliar(sap, fisico)
+    part = conciliar(sap, fisico, saida=tmp_path / "saida", particoes=5, processos=processos, lote=1_000)
+    assert mem.saida is None and part.saida == tmp_path / "saida"
+    assert part.resumo == mem.resumo
+    pd.testing.assert_frame_equal(_ordenar(part.divergencias()), _ordenar(mem.divergencias()),
+                                  check_dtype=False)
+
+
+def test_saida_so_apaga_as_proprias_divergencias(tmp_path):
+    saida = tmp_path / "saida"
+    saida.mkdir()
+    (saida / "outro.txt").write_text("fica")
+    (saida / "divergencias-9999.parquet").write_bytes(b"antigo")
+    sap, fisico = gerar(500, 2, seed=2)
+    r = conciliar(sap, fisico, saida=saida, particoes=3, processos=1, lote=300)
+    assert (saida / "outro.txt").read_text() == "fica"
+    assert not (saida / "divergencias-9999.parquet").exists()
+    div = r.divergencias()
+    assert len(div) and (div["DIVERGENTE"] | div["ABAIXO_MINIMO"]).all()
+
+
+def test_entradas_vazias(tmp_path):
+    vazio = tmp_path / "vazio.parquet"
+    pd.DataFrame({"SKU": pd.Series(dtype=str), "QUANTIDADE": pd.Series(dtype="int64")}).to_parquet(vazio)
+    (tmp_path / "vazio.csv").write_text("")
+    sap, _ = gerar(100, 1)
+
+    r = conciliar(vazio, tmp_path / "vazio.csv")
+    assert r.resumo["chaves"] == 0 and r.divergencias().empty and r.maiores.empty
+
+    r = conciliar(sap, pd.DataFrame())
+    assert r.resumo["chaves"] == len(sap) and r.resumo["so_sap"] == len(sap) and r.resumo["total_real"] == 0
@@ -0,0 +1,108 @@
+# tests/test_eventos.py
+# -*- coding: utf-8 -*-
+import json
+from dataclasses import asdict
+
+import pytest
+
+from estoque.eventos import DestinoSqlite, Evento, Ingestor, LogEventos, ler_etiqueta
+
+
+def _linha(ev: Evento) -> bytes:
+    return (json.dumps(asdict(ev)) + "\n").encode("utf-8")
+
+
+def test_reparar_descarta_linha_pela_metade(tmp_path):
+    evs = [Evento("INS-001", "BAIXA", "CAM-1"), Evento("INS-002", "ENTRADA", "CAM-1")]
+    inteiro = b"".join(_linha(e) for e in evs)
+    (tmp_path / "eventos.jsonl").write_bytes(inteiro + _linha(Evento("INS-003", "BAIXA", "CAM-1"))[:20])
+    log = LogEventos(tmp_path)
+    try:
+        assert log.pos == len(inteiro)
+        assert (tmp_path / "eventos.jsonl").read_bytes() == inteiro
+        assert [ev.id for ev, _ in log.pendentes()] == [e.id for e in evs]
+    finally:
+        log.fechar()
+
+
+def test_pendentes_depois_do_checkpoint_e_pula_linha_invalida(tmp_path):
+    evs = [Evento("INS-001", "BAIXA", "CAM-1") for _ in range(3)]
+    linhas = [_linha(e) for e in evs]
+    (tmp_path / "eventos.jsonl").write_bytes(linhas[0] + b"{lixo\n" + linhas[1] + linhas[2])
+    (tmp_path / "checkpoint").write_text(str(len(linhas[0]) + 3))   # no meio de uma linha
+    log = LogEventos(tmp_path)
+    try:
+        pend = log.pendentes()
+        assert [ev.id for ev, _ in pend] == [evs[1].id, evs[2].id]
+        assert pend[-1][1] == log.pos
+        log.confirmar(pend[-1][1])
+        assert log.pendentes() == []
+    finally:
+        log.fechar()
+
+
+def test_checkpoint_alem_do_fim_rele_o_log(tmp_path):
+    ev = Evento("INS-001", "BAIXA", "CAM-1")
+    (tmp_path / "eventos.jsonl").write_bytes(_linha(ev))
+    (tmp_path / "checkpoint").write_text("999999")
+    log = LogEventos(tmp_path)
+    try:
+        assert [e.id for e, _ in log.pendentes()] == [ev.id]
+    finally:
+        log.fechar()
+
+
+def test_cada_log_tem_um_so_dono(tmp_path):
+    a = LogEventos(tmp_path)
+    b = LogEventos(tmp_path)
+    try:
+        assert a.arquivo != b.arquivo
+        pos_a = a.anexar(Evento("INS-001", "BAIXA", "CAM-A"))
+        b.anexar(Evento("INS-002", "BAIXA", "CAM-B"))
+        a.sincronizar()
+        b.sincronizar()
+        assert a.arquivo.stat().st_size == pos_a
+        assert [ev.camera for ev, _ in a.pendentes()] == ["CAM-A"]
+        assert [ev.camera for ev, _ in b.pendentes()] == ["CAM-B"]
+    finally:
+        a.fechar()
+        b.fechar()
+    c = LogEventos(tmp_path)   # vaga liberada: volta para a primeira
+    try:
+        assert c.arquivo == a.arquivo
+    finally:
+        c.fechar()
+
+
+def test_ingestor_reenvia_o_que_ficou_so_no_log(tmp_path):
+    log = LogEventos(tmp_path / "log")
+    evs = [Evento("INS-001", "BAIXA", "CAM-1", lote="L1") for _ in range(5)]
+    for ev in evs:
+        log.anexar(ev)
+    log.sincronizar()
+    log.fechar()   # "queda": nada chegou ao banco
+
+    destino = DestinoSqlite(tmp_path / "eventos.db")
+    ing = Ingestor(destino, tmp_path / "log", lote_max=2, intervalo_ms=10)
+    try:
+        assert ing.reenviados == 5
+        assert ing.aguardar(ing.registrar(Evento("INS-002", "ENTRADA", "CAM-1")))
+    finally:
+        ing.fechar()
+    linhas = destino.ler_desde(0, 100)
+    assert [r[1] for r in linhas] == ["INS-001"] * 5 + ["INS-002"]
+    log = LogEventos(tmp_path / "log")
+    try:
+        assert log.pendentes() == []
+    finally:
+        log.fechar()
+
+
+def test_ler_etiqueta_e_validacao():
+    assert ler_etiqueta("SKU=ins-002;LOTE=l07;VAL=2026-03-31") == {"sku": "INS-002", "lote": "L07",
+                                                                   "validade": "2026-03-31"}
+    assert ler_etiqueta("INS-001")["lote"] == ""
+    with pytest.raises(ValueError):
+        Evento.de_dict({"sku": "INS-001", "acao": "PERDA"})
+    with pytest.raises(ValueError):
+        Evento.de_dict({"sku": "INS-001", "quantidade": 0})
@@ -0,0 +1,42 @@
+# tests/test_export.py
+# -*- coding: utf-8 -*-
+import gzip
+import io
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from estoque.backends import SqliteBackend
+from estoque.export import exportar
+from estoque.query import Filtros, SqlSource
+from estoque.synthetic import salvar_sqlite
+
+INSUMOS = pd.DataFrame({
+    "INSUMO": ["Swab estéril", "Seringa 5ml", "Tubo EDTA 4ml"],
+    "QUANTIDADE": [1, 2, 3],
+    "EXAME": ["A", "B", "A"],
+})
+NADA = Filtros(termo="nao existe")
+
+
+@pytest.fixture(scope="module")
+def fonte(tmp_path_factory):
+    b = SqliteBackend(salvar_sqlite(INSUMOS, tmp_path_factory.mktemp("sqlite") / "insumos.db"))
+    return SqlSource(b.consultar, b.schema, b.lotes, b.dialeto)
+
+
+def test_csv_com_linhas(fonte):
+    df = pd.read_csv(io.BytesIO(exportar(fonte.lotes(Filtros()), "CSV")))
+    assert list(df.columns) == ["INSUMO", "QUANTIDADE", "EXAME"] and len(df) == 3
+
+
+def test_csv_sem_linhas_tem_cabecalho(fonte):
+    assert exportar(fonte.lotes(NADA), "CSV").decode("utf-8").splitlines() == ["INSUMO,QUANTIDADE,EXAME"]
+    gz = exportar(fonte.lotes(NADA), "CSV compactado (gzip)")
+    assert gzip.decompress(gz).decode("utf-8").splitlines() == ["INSUMO,QUANTIDADE,EXAME"]
+
+
+def test_parquet_sem_linhas_e_valido(fonte):
+    tbl = pq.read_table(io.BytesIO(exportar(fonte.lotes(NADA), "Parquet")))
+    assert tbl.num_rows == 0 and tbl.column_names == ["INSUMO", "QUANTIDADE", "EXAME"]
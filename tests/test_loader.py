@@ -0,0 +1,51 @@
+# tests/test_loader.py
+# -*- coding: utf-8 -*-
+import sqlite3
+
+from estoque.loader import iter_lotes
+
+
+class _Cursor:
+    """Cursor DB-API sem `fetch_df_batches` (oracledb antigo) sobre um SQLite em memória."""
+
+    def __init__(self, conn):
+        self._cur = conn.cursor()
+        self.arraysize = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cur.close()
+
+    def execute(self, sql, binds):
+        self._cur.execute(sql, binds)
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def fetchmany(self):
+        return self._cur.fetchmany(self.arraysize)
+
+
+class _Conexao:
+    def __init__(self, linhas):
+        self._conn = sqlite3.connect(":memory:")
+        self._conn.execute("CREATE TABLE insumos (insumo TEXT, quantidade INTEGER, exame TEXT)")
+        self._conn.executemany("INSERT INTO insumos VALUES (?, ?, ?)", linhas)
+
+    def cursor(self):
+        return _Cursor(self._conn)
+
+
+def test_fallback_do_cursor_entrega_um_lote_por_fetchmany():
+    conn = _Conexao([(f"TUBO {i}", i, None) for i in range(5)])
+    lotes = list(iter_lotes(conn, "SELECT insumo, quantidade, exame FROM insumos", batch=2))
+    assert [len(df) for df in lotes] == [2, 2, 1]
+    assert list(lotes[0].columns) == ["INSUMO", "QUANTIDADE", "EXAME"]
+    assert str(lotes[0]["INSUMO"].dtype) == "string" and lotes[0]["EXAME"].tolist() == ["", ""]
+
+
+def test_fallback_do_cursor_sem_linhas_nao_entrega_lote():
+    assert list(iter_lotes(_Conexao([]), "SELECT insumo, quantidade, exame FROM insumos")) == []
@@ -0,0 +1,22 @@
+# tests/test_oracle.py
+# -*- coding: utf-8 -*-
+import sys
+import types
+
+from estoque.oracle import _abrir_pool, get_pool
+
+
+def test_senha_corrigida_abre_pool_novo(monkeypatch):
+    senhas = []
+    oracledb = types.SimpleNamespace(POOL_GETMODE_TIMEDWAIT=2, create_pool_async=None,
+                                     create_pool=lambda **kw: senhas.append(kw["password"]) or object())
+    monkeypatch.setitem(sys.modules, "oracledb", oracledb)
+    _abrir_pool.clear()
+    try:
+        errada = get_pool("db:1521/svc", "app", "errada")
+        certa = get_pool("db:1521/svc", "app", "certa")
+        assert errada is not certa
+        assert get_pool("db:1521/svc", "app", "certa") is certa   # mesma senha: mesmo pool
+        assert senhas == ["errada", "certa"]
+    finally:
+        _abrir_pool.clear()
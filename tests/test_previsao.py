@@ -0,0 +1,54 @@
+# tests/test_previsao.py
+# -*- coding: utf-8 -*-
+from datetime import date
+
+import numpy as np
+import pytest
+
+from estoque.previsao import MODELOS, _ajustar_um, ajustar, ajustar_paralelo, gerar, historico, prever
+
+
+def test_vetorizado_igual_ao_laco_por_sku():
+    _, y, _ = gerar(300, 60, seed=3)
+    y[0] = 0                      # sem consumo
+    y[1, :] = 0
+    y[1, ::10] = 7                # intermitente
+    m = ajustar(y)
+    ref = [_ajustar_um(list(linha)) for linha in y]
+    np.testing.assert_allclose(m["taxa"], [t for t, _ in ref], rtol=1e-9, atol=1e-12)
+    assert m["modelo"].tolist() == [k for _, k in ref]
+    assert MODELOS[m["modelo"][0]] == "sem consumo" and MODELOS[m["modelo"][1]] == "Croston (SBA)"
+
+
+def test_blocos_e_pool_iguais_ao_ajuste_direto():
+    _, y, _ = gerar(1_000, 30, seed=4)
+    direto = ajustar(y)
+    for processos, bloco in ((1, 128), (2, 300)):
+        par = ajustar_paralelo(y, processos=processos, bloco=bloco)
+        for k in direto:
+            np.testing.assert_allclose(par[k], direto[k])
+
+
+def test_prever_ruptura_e_sugestao():
+    y = np.full((3, 30), 2.0)     # consumo constante: taxa 2/dia, sem erro
+    y[2] = 0
+    df = prever(["A", "B", "C"], y, [10, 0, 5], lead_time_dias=3, cobertura_dias=7, nivel_servico=0.95,
+                hoje=date(2026, 1, 1), processos=1).set_index("SKU")
+    assert df.loc["A", "CONSUMO_DIA"] == pytest.approx(2.0)
+    assert df.loc["A", "DIAS_ATE_RUPTURA"] == pytest.approx(5.0)
+    assert str(df.loc["A", "DATA_RUPTURA"].date()) == "2026-01-06"
+    assert not df.loc["A", "PEDIR"] and df.loc["A", "SUGESTAO"] == 0       # 10 > ponto de pedido 6
+    assert df.loc["B", "DIAS_ATE_RUPTURA"] == 0 and df.loc["B", "PEDIR"] and df.loc["B", "SUGESTAO"] == 20
+    assert np.isinf(df.loc["C", "DIAS_ATE_RUPTURA"]) and df.loc["C", "MODELO"] == "sem consumo"
+    assert list(df.index) == ["B", "A", "C"]                               # ruptura mais próxima primeiro
+
+
+def test_historico_comeca_no_primeiro_dia_do_razao():
+    hoje = date(2026, 3, 10)
+    linhas = [("B", "2026-03-08", 2), ("A", "2026-03-10", 1), ("A", "2026-03-08", 3), ("A", "2025-01-01", 9)]
+    skus, y = historico(linhas[:3], dias=90, hoje=hoje)
+    assert skus.tolist() == ["A", "B"] and y.tolist() == [[3, 0, 1], [2, 0, 0]]
+    skus, y = historico(linhas, dias=5, hoje=hoje)     # fora da janela: ignorado
+    assert y.shape == (2, 5) and y.sum() == 6
+    skus, y = historico([], dias=5, hoje=hoje)
+    assert len(skus) == 0 and y.shape == (0, 5)
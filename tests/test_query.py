@@ -0,0 +1,53 @@
+# tests/test_query.py
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+from estoque.backends import SqliteBackend
+from estoque.query import FrameSource, Filtros, SqlSource
+from estoque.synthetic import salvar_sqlite
+
+INSUMOS = pd.DataFrame({
+    "INSUMO": ["Swab estéril", "Gaze ESTÉRIL", "Seringa 5ml", "Álcool 70% 1L", "Tubo EDTA 4ml"],
+    "QUANTIDADE": [1, 2, 3, 4, 5],
+    "EXAME": ["A", "B", "A", "B", "A"],
+})
+
+
+@pytest.fixture(scope="module")
+def fontes(tmp_path_factory):
+    caminho = salvar_sqlite(INSUMOS, tmp_path_factory.mktemp("sqlite") / "insumos.db")
+    b = SqliteBackend(caminho)
+    return SqlSource(b.consultar, b.schema, dialeto=b.dialeto), FrameSource(b.carregar())
+
+
+@pytest.mark.parametrize("busca", ["contem", "prefixo", "aproximada"])
+@pytest.mark.parametrize("termo", ["esteril", "ESTÉRIL", "alcool", "tubo ed", "ring"])
+def test_busca_igual_no_banco_e_em_memoria(fontes, termo, busca):
+    sql, frame = fontes
+    f = Filtros(termo=termo, busca=busca)
+    assert sorted(sql.linhas(f)["INSUMO"]) == sorted(frame.linhas(f)["INSUMO"])
+
+
+def test_contem_sem_acento_nem_caixa(fontes):
+    sql, _ = fontes
+    assert sorted(sql.linhas(Filtros(termo="esteril"))["INSUMO"]) == ["Gaze ESTÉRIL", "Swab estéril"]
+    assert sql.contar(Filtros(termo="ÁLCOOL")) == 1
+
+
+EMPATES = pd.DataFrame({
+    "INSUMO": ["Tubo", "Gaze", "Tubo", "Agulha", "Gaze", "Tubo", "Agulha"],
+    "QUANTIDADE": [5, 2, 5, 9, 2, 1, 9],
+    "EXAME": ["B", "C", "A", "A", "A", "C", "B"],
+})
+
+
+@pytest.mark.parametrize("desc", [False, True])
+@pytest.mark.parametrize("ordem", ["INSUMO", "QUANTIDADE", "EXAME"])
+def test_pagina_igual_no_banco_e_em_memoria(tmp_path, ordem, desc):
+    b = SqliteBackend(salvar_sqlite(EMPATES, tmp_path / "empates.db"))
+    sql, frame = SqlSource(b.consultar, b.schema, dialeto=b.dialeto), FrameSource(b.carregar())
+    for inicio in (0, 3, 6):
+        esperado = sql.pagina(Filtros(), ordem, desc, inicio, 3)
+        obtido = frame.pagina(Filtros(), ordem, desc, inicio, 3)
+        assert obtido.astype(str).values.tolist() == esperado.astype(str).values.tolist()
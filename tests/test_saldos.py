@@ -0,0 +1,88 @@
+# tests/test_saldos.py
+# -*- coding: utf-8 -*-
+from estoque.saldos import Saldos
+
+
+def test_saldos_por_local_e_por_sku(tmp_path, razao):
+    r = razao()
+    r.add("INS-001", "ENTRADA", 10)
+    r.add("INS-001", "BAIXA", 3)
+    r.add("INS-001", "ENTRADA", 5, local="SALA-1")
+    r.add("INS-002", "BAIXA", 2, local="SALA-1")
+    s = Saldos(r, tmp_path)
+    assert s.saldo("INS-001") == 12
+    assert s.saldo("INS-001", "ALMOXARIFADO") == 7
+    assert s.saldo("INS-002", "SALA-1") == -2
+    assert s.saldo("INS-999") == 0
+    assert s.tabela() == [("INS-001", "ALMOXARIFADO", 7), ("INS-001", "SALA-1", 5), ("INS-002", "SALA-1", -2)]
+
+    r.add("INS-002", "ENTRADA", 4, local="SALA-1")
+    assert s.atualizar() == 1
+    assert s.saldo("INS-002") == 2 and s.posicao == 5
+
+
+def test_partida_a_frio_reaplica_so_depois_do_snapshot(tmp_path, razao):
+    r = razao()
+    for i in range(10):
+        r.add(f"INS-00{i % 3}", "ENTRADA", i + 1)
+    s = Saldos(r, tmp_path)
+    s.snapshot()
+    r.add("INS-000", "BAIXA", 4)
+    r.add("INS-001", "BAIXA", 1)
+
+    s2 = Saldos(r, tmp_path)
+    assert s2.partida["snapshot"] == 10 and s2.partida["reaplicados"] == 2
+    s.atualizar()
+    assert s2.tabela() == s.tabela()
+
+
+def test_razao_recriado_descarta_snapshot(tmp_path, razao):
+    r = razao()
+    for _ in range(5):
+        r.add("INS-001", "ENTRADA", 10)
+    Saldos(r, tmp_path).snapshot()
+
+    novo = razao()
+    novo.add("INS-001", "ENTRADA", 1)
+    s = Saldos(novo, tmp_path)
+    assert s.saldo("INS-001") == 1 and s.partida["snapshot"] == 0
+
+
+def test_snapshot_automatico(tmp_path, razao):
+    r = razao()
+    for _ in range(7):
+        r.add("INS-001", "ENTRADA", 1)
+    s = Saldos(r, tmp_path, snapshot_cada=5)
+    assert s.posicao_snapshot == 7
+    assert Saldos(r, tmp_path).partida["reaplicados"] == 0
+
+
+def test_baixa_sem_lote_consome_o_que_vence_primeiro(tmp_path, razao):
+    r = razao()
+    r.add("INS-001", "ENTRADA", 5, lote="L3", validade="2026-03-01")
+    r.add("INS-001", "ENTRADA", 5, lote="L1", validade="2026-01-01")
+    r.add("INS-001", "ENTRADA", 5, lote="SV")                 # sem validade: por último
+    r.add("INS-001", "ENTRADA", 5, lote="L2", validade="2026-02-01")
+    r.add("INS-001", "BAIXA", 7)                               # L1 inteiro + 2 de L2
+    s = Saldos(r, tmp_path)
+    assert [s.saldo_lote("INS-001", l) for l in ("L1", "L2", "L3", "SV")] == [0, 3, 5, 5]
+
+    r.add("INS-001", "BAIXA", 2, lote="L3")                    # baixa com lote: só nele
+    r.add("INS-001", "BAIXA", 9)                               # resto de L2 e L3, 3 de SV
+    s.atualizar()
+    assert [s.saldo_lote("INS-001", l) for l in ("L1", "L2", "L3", "SV")] == [0, 0, 0, 2]
+    assert s.saldo("INS-001") == 2
+    assert s.lotes() == [("INS-001", "SV", 2, None)]
+
+
+def test_lotes_e_fila_fefo_sobrevivem_ao_snapshot(tmp_path, razao):
+    r = razao()
+    r.add("INS-002", "ENTRADA", 4, lote="B", validade="2026-06-01")
+    r.add("INS-002", "ENTRADA", 4, lote="A", validade="2026-05-01")
+    Saldos(r, tmp_path).snapshot()
+    r.add("INS-002", "BAIXA", 5)
+
+    s = Saldos(r, tmp_path)
+    assert s.partida["reaplicados"] == 1
+    assert (s.saldo_lote("INS-002", "A"), s.saldo_lote("INS-002", "B")) == (0, 3)
+    assert s.validade("INS-002", "B") == "2026-06-01"